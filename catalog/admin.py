@@ -1,5 +1,15 @@
-from django.contrib import admin
-from .models import Watch
+import io
+
+from django.contrib import admin, messages
+from django.http import StreamingHttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from . import watch_io
+from .models import TelegramOutbox, TelegramUpdate, Watch
+
+MAX_REPORTED_ERRORS = 20
 
 
 @admin.register(Watch)
@@ -16,3 +26,80 @@ class WatchAdmin(admin.ModelAdmin):
     list_filter = ("is_active", "is_hero", "is_featured", "badge")
     search_fields = ("name", "description", "tag")
     list_editable = ("price", "badge", "is_active", "is_hero", "is_featured", "sort_order")
+    actions = ("export_csv", "export_ndjson")
+    change_list_template = "admin/catalog/watch/change_list.html"
+
+    # =========================
+    # Экспорт / импорт (catalog/watch_io.py)
+    # =========================
+    def _export(self, queryset, fmt):
+        response = StreamingHttpResponse(
+            watch_io.export_lines(queryset, fmt),
+            content_type="text/csv; charset=utf-8" if fmt == "csv" else "application/x-ndjson",
+        )
+        response["Content-Disposition"] = f'attachment; filename="watches.{fmt}"'
+        return response
+
+    @admin.action(description="Выгрузить в CSV")
+    def export_csv(self, request, queryset):
+        return self._export(queryset, "csv")
+
+    @admin.action(description="Выгрузить в NDJSON")
+    def export_ndjson(self, request, queryset):
+        return self._export(queryset, "ndjson")
+
+    def get_urls(self):
+        return [
+            path(
+                "import/",
+                self.admin_site.admin_view(self.import_view),
+                name="catalog_watch_import",
+            ),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        if not self.has_change_permission(request) or not self.has_add_permission(request):
+            return redirect("admin:catalog_watch_changelist")
+
+        if request.method == "POST" and request.FILES.get("file"):
+            upload = request.FILES["file"]
+            fmt = watch_io.detect_format(upload.name)
+            stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+            result = watch_io.import_rows(
+                watch_io.read_rows(stream, fmt), dry_run=bool(request.POST.get("dry_run")),
+            )
+
+            prefix = "Проверено (без записи)" if request.POST.get("dry_run") else "Импорт"
+            messages.info(
+                request,
+                f"{prefix}: создано {result.created}, обновлено {result.updated}, "
+                f"ошибок {len(result.errors)}",
+            )
+            for line_no, message in result.errors[:MAX_REPORTED_ERRORS]:
+                messages.error(request, f"Строка {line_no}: {message}")
+            if len(result.errors) > MAX_REPORTED_ERRORS:
+                messages.error(request, f"... и ещё ошибок: {len(result.errors) - MAX_REPORTED_ERRORS}")
+            return redirect("admin:catalog_watch_changelist")
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Импорт часов",
+            "fields": watch_io.FIELDS,
+        }
+        return TemplateResponse(request, "admin/catalog/watch/import.html", context)
+
+
+@admin.register(TelegramOutbox)
+class TelegramOutboxAdmin(admin.ModelAdmin):
+    list_display = ("order", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status",)
+    readonly_fields = ("created_at", "sent_at", "message_id", "last_error")
+
+
+@admin.register(TelegramUpdate)
+class TelegramUpdateAdmin(admin.ModelAdmin):
+    list_display = ("update_id", "chat_id", "status", "attempts", "received_at", "processed_at")
+    list_filter = ("status",)
+    readonly_fields = ("update_id", "chat_id", "payload", "received_at", "processed_at", "last_error")
+
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class CatalogConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "catalog"
+
+    def ready(self):
+        # подключаем обработчики сигналов (сброс кэша каталога и т.п.)
+        from . import checks, signals  # noqa: F401
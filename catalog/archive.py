@@ -0,0 +1,207 @@
+"""
+Архив заказов: завершённые заказы (ARCHIVE_STATUSES) старше
+ORDER_ARCHIVE_AFTER_DAYS переносятся из Order/OrderItem в
+ArchivedOrder/ArchivedOrderItem командой `manage.py archive_orders`.
+Рабочие таблицы (оформление, отчёты /orders, кнопки бота) так остаются
+размером с «живые» заказы, а не со всю историю.
+
+UserOrderHistory — история заказов пользователя по обеим таблицам
+для страницы аккаунта.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Value
+from django.utils import timezone
+
+from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem, Watch
+
+ARCHIVE_STATUSES = ("delivered", "canceled")
+
+ORDER_FIELDS = [
+    "id", "user_id", "created_at", "location", "latitude", "longitude", "phone",
+    "status", "uzum_payment_id", "total_amount", "items_count",
+]
+ITEM_FIELDS = ["order_id", "watch_id", "quantity", "price"]
+
+
+def archivable(cutoff):
+    return (
+        Order.objects.filter(status__in=ARCHIVE_STATUSES, created_at__lt=cutoff)
+        # уведомление ещё не ушло — воркер outbox должен его отправить
+        .exclude(telegram_notifications__status="pending")
+    )
+
+
+def archive_batch(cutoff, limit: int) -> int:
+    """
+    Переносит до limit самых старых подходящих заказов в одной транзакции.
+    Возвращает число перенесённых (0 — переносить больше нечего).
+    """
+    with transaction.atomic():
+        ids = list(
+            archivable(cutoff).select_for_update()
+            .order_by("created_at", "id")
+            .values_list("id", flat=True)[:limit]
+        )
+        if not ids:
+            return 0
+
+        ArchivedOrder.objects.bulk_create([
+            ArchivedOrder(**dict(zip(ORDER_FIELDS, row)))
+            for row in Order.objects.filter(id__in=ids).values_list(*ORDER_FIELDS)
+        ])
+        ArchivedOrderItem.objects.bulk_create([
+            ArchivedOrderItem(**dict(zip(ITEM_FIELDS, row)))
+            for row in OrderItem.objects.filter(order_id__in=ids).order_by("id").values_list(*ITEM_FIELDS)
+        ])
+
+        # Позиции — одним DELETE: через ORM на каждую ушёл бы сигнал
+        # refresh_order_totals с пересчётом уже удаляемого заказа.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM {} WHERE {} IN ({})".format(
+                    connection.ops.quote_name(OrderItem._meta.db_table),
+                    connection.ops.quote_name(OrderItem._meta.get_field("order").column),
+                    ", ".join(["%s"] * len(ids)),
+                ),
+                ids,
+            )
+        Order.objects.filter(id__in=ids).delete()
+    return len(ids)
+
+
+def archive_orders(days: int = None, batch_size: int = None, progress=None) -> int:
+    """
+    Переносит всё подходящее пачками по batch_size, каждая — в своей
+    транзакции (блокировки короткие, оформление заказов не ждёт).
+    progress(n) вызывается после каждой пачки.
+    """
+    days = settings.ORDER_ARCHIVE_AFTER_DAYS if days is None else days
+    batch_size = batch_size or settings.ORDER_ARCHIVE_BATCH_SIZE
+    cutoff = timezone.now() - timedelta(days=days)
+
+    total = 0
+    while True:
+        moved = archive_batch(cutoff, batch_size)
+        if not moved:
+            return total
+        total += moved
+        if progress is not None:
+            progress(total)
+
+
+# =========================
+# История заказов пользователя
+# =========================
+
+class UserOrderHistory:
+    """
+    Заказы пользователя из Order и ArchivedOrder, новые сверху, как одна
+    последовательность: count() и срезы — то, что нужно Paginator.
+
+    Три запроса при любом числе заказов и любом их делении между
+    таблицами: COUNT по UNION ALL, страница — UNION ALL строк заказов
+    с сортировкой и LIMIT/OFFSET по индексам (user, -created_at) обеих
+    таблиц, позиции страницы с часами — ещё один UNION ALL.
+    """
+
+    # поля часов, которые нужны странице аккаунта
+    WATCH_FIELDS = ["id", "name", "image", "currency"]
+
+    def __init__(self, user):
+        self.user = user
+        self._count = None
+
+    def count(self) -> int:
+        if self._count is None:
+            self._count = (
+                Order.objects.filter(user=self.user).order_by().values_list("id")
+                .union(
+                    ArchivedOrder.objects.filter(user=self.user).order_by().values_list("id"),
+                    all=True,
+                )
+                .count()
+            )
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def orders_queryset(self):
+        """
+        UNION ALL строк заказов обеих таблиц, новые сверху; последнее
+        поле — из архива ли строка. Срез даёт страницу (его же проверяет
+        `manage.py explain_hot_queries`).
+        """
+        return (
+            Order.objects.filter(user=self.user).order_by()
+            .values_list(*ORDER_FIELDS, Value(False))
+            .union(
+                ArchivedOrder.objects.filter(user=self.user).order_by()
+                .values_list(*ORDER_FIELDS, Value(True)),
+                all=True,
+            )
+            .order_by("-created_at", "-id")
+        )
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+
+        db = Order.objects.db
+        rows = self.orders_queryset()[index]
+        orders = [
+            _from_row(ArchivedOrder if archived else Order, db, ORDER_FIELDS, values)
+            for *values, archived in rows
+        ]
+        if not orders:
+            return orders
+
+        # ids заказов в Order и ArchivedOrder не пересекаются (архив
+        # сохраняет номер), но ключ всё равно с таблицей
+        items = {(isinstance(order, ArchivedOrder), order.pk): [] for order in orders}
+        item_fields = ["id", "order_id", "quantity", "price", "watch_id"]
+
+        def lines(model, archived):
+            return model.objects.filter(
+                order_id__in=[pk for in_archive, pk in items if in_archive == archived],
+            ).order_by().values_list(
+                *item_fields, *(f"watch__{name}" for name in self.WATCH_FIELDS), Value(archived),
+            )
+
+        for *values, archived in (
+            lines(OrderItem, False).union(lines(ArchivedOrderItem, True), all=True).order_by("id")
+        ):
+            archived = bool(archived)
+            item = _from_row(
+                ArchivedOrderItem if archived else OrderItem, db, item_fields, values[:len(item_fields)],
+            )
+            item.watch = _from_row(Watch, db, self.WATCH_FIELDS, values[len(item_fields):])
+            items[archived, item.order_id].append(item)
+
+        for order in orders:
+            _set_prefetched_items(order, items[isinstance(order, ArchivedOrder), order.pk])
+        return orders
+
+
+def _from_row(model, db, names, values):
+    """
+    Экземпляр модели из строки values_list (остальные поля отложены).
+    from_db ждёт значения в порядке полей модели, а у ArchivedOrder он
+    другой: id и created_at переопределены.
+    """
+    row = dict(zip(names, values))
+    attnames = [f.attname for f in model._meta.concrete_fields if f.attname in row]
+    return model.from_db(db, attnames, [row[name] for name in attnames])
+
+
+def _set_prefetched_items(order, items: list) -> None:
+    """
+    order.items.all() без запроса — так же, как это делает prefetch_related.
+    """
+    queryset = order.items.all()
+    queryset._result_cache = items
+    queryset._prefetch_done = True
+    order._prefetched_objects_cache = {"items": queryset}
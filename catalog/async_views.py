@@ -0,0 +1,108 @@
+"""
+Async-версии API каталога, webhook Telegram и выгрузки заказов для ASGI (uvicorn).
+
+Подключаются вместо синхронных через timepiece_site/urls_asgi.py
+(AsgiUrlconfMiddleware); под WSGI (gunicorn) работают обычные вьюхи
+из views.py. Разбор параметров, запросы и формат ответа — общие.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import PermissionDenied
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
+
+from . import order_export, search
+from .cache import acached_json_response, catalog_etag, catalog_last_modified
+from .facets import facet_counts
+from .updates import aenqueue_update
+from .views import (
+    _featured_queryset,
+    _hero_queryset,
+    _order_export_params,
+    _order_export_response,
+    _search_page,
+    _search_params,
+    _search_queryset,
+    _serialize_watch,
+    _watches_all_page,
+    _watches_all_params,
+    _watches_all_queryset,
+    _webhook_update,
+)
+
+
+@condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)
+async def hero_watch(request):
+    async def build():
+        watch = await _hero_queryset().afirst()
+        return {"item": _serialize_watch(watch) if watch else None}
+
+    return await acached_json_response("hero", build)
+
+
+@condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)
+async def watches_featured(request):
+    async def build():
+        return {"items": [_serialize_watch(w) async for w in _featured_queryset()]}
+
+    return await acached_json_response("featured", build)
+
+
+@condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)
+async def watches_all(request):
+    try:
+        params = _watches_all_params(request)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    async def build():
+        watches = [w async for w in _watches_all_queryset(params)]
+        data = _watches_all_page(watches, params)
+        if not params["cursor"]:
+            data["facets"] = await sync_to_async(facet_counts)(params["filters"])
+        return data
+
+    return await acached_json_response(params["cache_name"], build)
+
+
+@condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)
+async def watches_search(request):
+    try:
+        params = _search_params(request)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    async def build():
+        ids = await sync_to_async(search.search_watch_ids)(params["query"], params["limit"])
+        watches = await _search_queryset(params["fields"]).ain_bulk(ids) if ids else {}
+        return _search_page(ids, watches, params["fields"])
+
+    return await acached_json_response(params["cache_name"], build)
+
+
+@csrf_exempt
+async def telegram_webhook(request):
+    token = getattr(settings, "TELEGRAM_BOT_TOKEN", None)
+    if not token:
+        return JsonResponse({"ok": True})
+
+    try:
+        update = _webhook_update(request)
+    except PermissionDenied:
+        return JsonResponse({"ok": False}, status=403)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    await aenqueue_update(update)
+    return JsonResponse({"ok": True})
+
+
+@staff_member_required
+async def orders_export(request):
+    try:
+        params = _order_export_params(request)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    return _order_export_response(order_export.aexport_chunks(**params), params["fmt"])
@@ -0,0 +1,173 @@
+"""
+Обработка апдейтов Telegram-бота (кнопки заказов и /orders).
+
+handle_update — корутина: БД через асинхронный ORM, Bot API через
+telegram.acall, независимые вызовы (ответ на кнопку + правка сообщения)
+уходят параллельно. Вызывается воркером очереди
+апдейтов (catalog/updates.py, `manage.py telegram_updates`): ошибки сети,
+Bot API (кроме окончательных 4xx, см. _call) и БД уходят наружу,
+и очередь повторяет апдейт с backoff.
+"""
+import asyncio
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import telegram
+from .models import Order
+from .reports import format_report, order_report, report_keyboard
+
+logger = logging.getLogger(__name__)
+
+ORDERS_KEYBOARD = {
+    "inline_keyboard": [
+        [{"text": "🕐 Последний час", "callback_data": "orders:hour"}],
+        [{"text": "📅 Последний день", "callback_data": "orders:day"}],
+        [{"text": "🗓 Последняя неделя", "callback_data": "orders:week"}],
+    ]
+}
+
+
+def is_admin_update(update: dict) -> bool:
+    admin_ids = getattr(settings, "TELEGRAM_ADMIN_IDS", [])
+    if not admin_ids:
+        return True  # если список не задан — не ограничиваем
+
+    user_id = None
+    if "message" in update:
+        user_id = update["message"].get("from", {}).get("id")
+    elif "callback_query" in update:
+        user_id = update["callback_query"].get("from", {}).get("id")
+
+    return user_id in admin_ids
+
+
+async def _set_order_status_safe(order: Order, status_value: str) -> bool:
+    """
+    Ставит статус, только если он есть в choices.
+    Возвращает True если установили, иначе False. Ошибка БД уходит
+    наружу — апдейт повторит очередь.
+    """
+    choices = getattr(Order, "STATUS_CHOICES", None) or getattr(order, "STATUS_CHOICES", None)
+    if choices:
+        allowed = {k for (k, _) in choices}
+        if status_value not in allowed:
+            return False
+    order.status = status_value
+    await order.asave(update_fields=["status"])
+    return True
+
+
+async def _call(method: str, payload: dict):
+    """
+    Вызов Bot API из воркера очереди. Сеть, 5xx и 429 дольше
+    TELEGRAM_MAX_RETRY_AFTER — TelegramError наружу: updates._process_chat
+    повторит апдейт с backoff. Прочие 4xx (кнопка устарела, сообщение
+    не изменилось, чат недоступен) повтор не исправит — только в лог.
+    """
+    try:
+        return await telegram.acall(method, json=payload)
+    except telegram.TelegramError as e:
+        if e.status is not None and 400 <= e.status < 500 and e.status != 429:
+            logger.warning("Telegram %s: %s", method, e)
+            return None
+        raise
+
+
+def _answer(cq_id, text):
+    return _call("answerCallbackQuery", {"callback_query_id": cq_id, "text": text})
+
+
+def _report_payload(chat_id, period: str, page: int) -> dict:
+    report = order_report(period, page)
+    return {
+        "chat_id": chat_id,
+        "text": format_report(report),
+        "reply_markup": report_keyboard(report),
+    }
+
+
+async def handle_update(update: dict) -> None:
+    if not is_admin_update(update):
+        return
+
+    # =====================================================
+    # 1) CALLBACK QUERY (кнопки)
+    # =====================================================
+    if "callback_query" in update:
+        cq = update["callback_query"]
+        data = cq.get("data", "")
+        cq_id = cq.get("id")
+        message = cq.get("message", {})
+        chat_id = message.get("chat", {}).get("id")
+        message_id = message.get("message_id")
+
+        if ":" in data:
+            action, value = data.split(":", 1)
+
+            # -------------------------------------------------
+            # ✅ ПОДТВЕРДИТЬ / ОТКАЗАТЬ
+            # -------------------------------------------------
+            if action in ("deliver", "cancel"):
+                try:
+                    order = await Order.objects.aget(id=int(value))
+                except (Order.DoesNotExist, ValueError):
+                    await _answer(cq_id, "Заказ не найден")
+                    return
+
+                if action == "deliver":
+                    ok = await _set_order_status_safe(order, "delivered")
+                    text = "✅ Заказ подтверждён (Доставлен)" if ok else "❗ Статус delivered не найден"
+                else:
+                    ok = await _set_order_status_safe(order, "cancelled")
+                    if not ok:
+                        ok = await _set_order_status_safe(order, "canceled")
+                    text = "❌ Заказ отменён" if ok else "❗ Статус отмены не найден"
+
+                # ответ на кнопку и удаление кнопок друг от друга не зависят
+                await asyncio.gather(
+                    _answer(cq_id, text),
+                    _call("editMessageReplyMarkup", {
+                        "chat_id": chat_id,
+                        "message_id": message_id,
+                        "reply_markup": {"inline_keyboard": []},
+                    }),
+                )
+                return
+
+            # -------------------------------------------------
+            # ✅ АРХИВ ЗАКАЗОВ (С ТОВАРАМИ)
+            # -------------------------------------------------
+            if action == "orders":
+                # orders:<period> — новое сообщение, orders:<period>:<page> — листание
+                period, _, page = value.partition(":")
+                payload = await sync_to_async(_report_payload)(
+                    chat_id, period, int(page) if page.isdigit() else 1
+                )
+
+                if page:
+                    send = _call("editMessageText", {**payload, "message_id": message_id})
+                else:
+                    send = _call("sendMessage", payload)
+
+                await asyncio.gather(send, _answer(cq_id, "Готово"))
+                return
+
+        # неизвестная кнопка
+        await _answer(cq_id, "Неизвестное действие")
+        return
+
+    # =====================================================
+    # 2) КОМАНДА /orders
+    # =====================================================
+    if "message" in update and update["message"].get("text"):
+        chat_id = update["message"]["chat"]["id"]
+        text = update["message"]["text"].strip()
+
+        if text == "/orders":
+            await _call("sendMessage", {
+                "chat_id": chat_id,
+                "text": "📦 Архив заказов — выберите период:",
+                "reply_markup": ORDERS_KEYBOARD,
+            })
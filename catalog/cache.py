@@ -0,0 +1,114 @@
+import hashlib
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.utils import timezone
+
+CATALOG_VERSION_KEY = "catalog:version"
+CATALOG_MODIFIED_KEY = "catalog:modified"
+
+
+def _meta_cache():
+    # версия и время изменения — в своём алиасе (CATALOG_META_CACHE_ALIAS):
+    # cull основного кэша, переполненного ответами, их не вытесняет
+    return caches[getattr(settings, "CATALOG_META_CACHE_ALIAS", "default")]
+
+
+def _new_version() -> int:
+    # Миллисекунды вместо 1: если ключ версии вытеснен из кэша,
+    # новая версия не совпадёт ни с одной из старых.
+    return int(time.time() * 1000)
+
+
+def get_catalog_version() -> int:
+    """
+    Текущая версия каталога. Меняется при каждом изменении Watch.
+    """
+    meta = _meta_cache()
+    version = meta.get(CATALOG_VERSION_KEY)
+    if version is None:
+        meta.add(CATALOG_MODIFIED_KEY, timezone.now(), None)
+        meta.add(CATALOG_VERSION_KEY, _new_version(), None)
+        version = meta.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version() -> None:
+    """
+    Инвалидирует все закэшированные ответы каталога.
+    """
+    meta = _meta_cache()
+    meta.set(CATALOG_MODIFIED_KEY, timezone.now(), None)
+    try:
+        meta.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        meta.set(CATALOG_VERSION_KEY, _new_version(), None)
+
+
+def catalog_etag(request, *args, **kwargs) -> str:
+    """
+    ETag ответа API: версия каталога + адрес запроса (вместе с параметрами).
+    Считается без обращения к БД.
+    """
+    path = hashlib.md5(request.get_full_path().encode("utf-8")).hexdigest()[:16]
+    return f"{get_catalog_version()}-{path}"
+
+
+def catalog_last_modified(request, *args, **kwargs):
+    """
+    Время последнего изменения каталога (для Last-Modified).
+    """
+    get_catalog_version()
+    return _meta_cache().get(CATALOG_MODIFIED_KEY)
+
+
+def catalog_key(name: str) -> str:
+    return f"catalog:{get_catalog_version()}:{name}"
+
+
+def cached_json_response(name: str, build) -> HttpResponse:
+    """
+    Отдаёт готовые байты JSON из кэша. build() вызывается только при промахе,
+    так что тёплый запрос не трогает ни ORM, ни json-энкодер.
+    name=None — ответ не кэшируется (неканонические параметры запроса).
+    """
+    if name is None:
+        return HttpResponse(
+            json.dumps(build(), cls=DjangoJSONEncoder).encode("utf-8"), content_type="application/json",
+        )
+    key = catalog_key(name)
+    body = cache.get(key)
+    if body is None:
+        body = json.dumps(build(), cls=DjangoJSONEncoder).encode("utf-8")
+        cache.set(key, body, getattr(settings, "CATALOG_CACHE_TIMEOUT", 60 * 60 * 24))
+    return HttpResponse(body, content_type="application/json")
+
+
+# =========================
+# Async-версии (catalog/async_views.py)
+# =========================
+
+def _cached_body(name: str):
+    key = catalog_key(name)
+    return key, cache.get(key)
+
+
+async def acached_json_response(name: str, build) -> HttpResponse:
+    """
+    То же, что cached_json_response, но build — корутина. Ключи общие
+    с синхронными вьюхами. Версия и тело читаются за один переход в поток.
+    """
+    if name is None:
+        return HttpResponse(
+            json.dumps(await build(), cls=DjangoJSONEncoder).encode("utf-8"), content_type="application/json",
+        )
+    key, body = await sync_to_async(_cached_body)(name)
+    if body is None:
+        body = json.dumps(await build(), cls=DjangoJSONEncoder).encode("utf-8")
+        await cache.aset(key, body, getattr(settings, "CATALOG_CACHE_TIMEOUT", 60 * 60 * 24))
+    return HttpResponse(body, content_type="application/json")
@@ -1,67 +1,118 @@
+from dataclasses import dataclass
 from decimal import Decimal
+
+from . import metrics
+from .cart_storage import get_cart_storage
 from .models import Watch
 
-CART_SESSION_ID = "cart"
+
+@dataclass(frozen=True)
+class CartLine:
+    """
+    Строка корзины для шаблонов: item.watch, item.quantity, item.price,
+    item.total_price. Цена всегда текущая, из каталога.
+    """
+    watch: Watch
+    quantity: int
+
+    @property
+    def price(self):
+        return Decimal(self.watch.price)
+
+    @property
+    def total_price(self):
+        return self.price * self.quantity
 
 
 class Cart:
-    def __init__(self, request):
-        self.session = request.session
-        cart = self.session.get(CART_SESSION_ID)
-        if not cart:
-            cart = self.session[CART_SESSION_ID] = {}
-        self.cart = cart
+    """
+    Хранится только {"<watch_id>": quantity} (где — решает CART_STORAGE);
+    запись происходит лишь когда корзина действительно меняется. Часы
+    грузятся одним запросом при первом обращении к строкам и запоминаются
+    на request.
+    """
 
-    def add(self, watch_id, quantity=1, update_quantity=False):
-        watch = Watch.objects.get(id=watch_id)
-        watch_id_str = str(watch_id)
+    def __init__(self, request):
+        self.request = request
+        self.storage = get_cart_storage()
+        self.cart = self._decode(self.storage.load(request))
 
-        if watch_id_str not in self.cart:
-            self.cart[watch_id_str] = {
-                "quantity": 0,
-                "price": str(watch.price),  # Watch.price — IntegerField
-            }
+    @staticmethod
+    def _decode(raw) -> dict:
+        # старый формат: {"<id>": {"quantity": n, "price": "..."}}
+        cart = {}
+        for watch_id, value in raw.items():
+            quantity = value.get("quantity", 0) if isinstance(value, dict) else value
+            try:
+                watch_id, quantity = int(watch_id), int(quantity)
+            except (TypeError, ValueError):
+                continue
+            if quantity > 0:
+                cart[watch_id] = quantity
+        return cart
 
-        if update_quantity:
-            self.cart[watch_id_str]["quantity"] = quantity
-        else:
-            self.cart[watch_id_str]["quantity"] += quantity
+    def add(self, watch_id, quantity=1, update_quantity=False):
+        watch_id = int(watch_id)
+        current = self.cart.get(watch_id, 0)
+        new = quantity if update_quantity else current + quantity
 
-        self.save()
+        if new <= 0:
+            self.remove(watch_id)
+        elif new != current:
+            self.cart[watch_id] = new
+            self.save()
+            metrics.CART_OPERATIONS.inc(operation="add")
 
     def remove(self, watch_id):
-        watch_id_str = str(watch_id)
-        if watch_id_str in self.cart:
-            del self.cart[watch_id_str]
+        if self.cart.pop(int(watch_id), None) is not None:
             self.save()
+            metrics.CART_OPERATIONS.inc(operation="remove")
+
     def __len__(self):
-        return sum(int(item.get("quantity", 0)) for item in self.cart.values())
+        return sum(self.cart.values())
 
     def __bool__(self):
         return self.__len__() > 0
 
-
     def clear(self):
-        self.session[CART_SESSION_ID] = {}
-        self.session.modified = True
+        self.cart = {}
+        self.save()
+        metrics.CART_OPERATIONS.inc(operation="clear")
 
     def save(self):
-        self.session[CART_SESSION_ID] = self.cart
-        self.session.modified = True
+        self.storage.save(self.request, {str(k): v for k, v in self.cart.items()})
+
+    @property
+    def lines(self) -> tuple:
+        """
+        Неизменяемый снимок корзины. Один запрос к каталогу на request.
+        """
+        ids = frozenset(self.cart)
+        cached = getattr(self.request, "_cart_watches", None)
+        if cached is not None and ids <= cached[0]:
+            watches = cached[1]
+        else:
+            watches = Watch.objects.filter(is_active=True).in_bulk(ids) if ids else {}
+            self.request._cart_watches = (ids, watches)
+
+        if not ids <= watches.keys():
+            # убираем снятые с продажи / удалённые модели
+            self.cart = {k: v for k, v in self.cart.items() if k in watches}
+            self.save()
+
+        return tuple(
+            CartLine(watch=watches[watch_id], quantity=quantity)
+            for watch_id, quantity in self.cart.items()
+        )
 
     def __iter__(self):
-        watch_ids = self.cart.keys()
-        watches = Watch.objects.filter(id__in=watch_ids)
+        return iter(self.lines)
 
-        for watch in watches:
-            item = self.cart[str(watch.id)]
-            item["watch"] = watch
-            item["price"] = Decimal(item["price"])
-            item["total_price"] = item["price"] * item["quantity"]
-            yield item
+    def quantities(self):
+        """
+        {watch_id: quantity} — всё, что нужно для оформления заказа.
+        """
+        return dict(self.cart)
 
     def get_total_price(self):
-        total = Decimal("0")
-        for item in self:
-            total += item["total_price"]
-        return total
+        return sum((line.total_price for line in self.lines), Decimal("0"))
@@ -0,0 +1,134 @@
+import secrets
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+CART_SESSION_ID = "cart"
+
+
+def get_cart_storage():
+    """
+    Хранилище корзины из settings.CART_STORAGE (путь к классу).
+    """
+    return import_string(settings.CART_STORAGE)()
+
+
+class CartStorage:
+    """
+    Где живёт компактная корзина {"<watch_id>": quantity}.
+    process_response вызывается CartMiddleware, если хранилищу нужно
+    что-то записать в ответ (cookie).
+    """
+
+    def load(self, request) -> dict:
+        raise NotImplementedError
+
+    def save(self, request, data: dict) -> None:
+        raise NotImplementedError
+
+    def process_response(self, request, response):
+        return response
+
+
+class SessionCartStorage(CartStorage):
+    """
+    Корзина внутри Django-сессии (по умолчанию — строка в django_session).
+    """
+
+    def load(self, request):
+        return request.session.get(CART_SESSION_ID) or {}
+
+    def save(self, request, data):
+        if data:
+            request.session[CART_SESSION_ID] = data
+        else:
+            request.session.pop(CART_SESSION_ID, None)
+        request.session.modified = True
+
+
+class _CookieMixin:
+    def _set_cookie(self, response, value):
+        if value is None:
+            response.delete_cookie(
+                settings.CART_COOKIE_NAME,
+                samesite=settings.SESSION_COOKIE_SAMESITE,
+            )
+            return
+        response.set_cookie(
+            settings.CART_COOKIE_NAME,
+            value,
+            max_age=settings.CART_COOKIE_AGE,
+            secure=settings.SESSION_COOKIE_SECURE,
+            httponly=True,
+            samesite=settings.SESSION_COOKIE_SAMESITE,
+        )
+
+
+class SignedCookieCartStorage(_CookieMixin, CartStorage):
+    """
+    Корзина целиком в подписанной cookie: ни БД, ни кэша.
+    """
+    salt = "catalog.cart"
+
+    def load(self, request):
+        if hasattr(request, "_cart_cookie_data"):
+            return request._cart_cookie_data
+        raw = request.COOKIES.get(settings.CART_COOKIE_NAME)
+        if not raw:
+            return {}
+        try:
+            data = signing.loads(raw, salt=self.salt, max_age=settings.CART_COOKIE_AGE)
+        except signing.BadSignature:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def save(self, request, data):
+        request._cart_cookie_data = data
+        request._cart_dirty = True
+
+    def process_response(self, request, response):
+        if getattr(request, "_cart_dirty", False):
+            data = request._cart_cookie_data
+            self._set_cookie(
+                response,
+                signing.dumps(data, salt=self.salt, compress=True) if data else None,
+            )
+        return response
+
+
+class CacheCartStorage(_CookieMixin, CartStorage):
+    """
+    Корзина в Django-кэше (settings.CART_CACHE_ALIAS); в cookie — только
+    случайный id корзины.
+    """
+
+    @property
+    def cache(self):
+        return caches[settings.CART_CACHE_ALIAS]
+
+    def _cart_id(self, request):
+        return getattr(request, "_cart_id", None) or request.COOKIES.get(settings.CART_COOKIE_NAME)
+
+    def load(self, request):
+        cart_id = self._cart_id(request)
+        if not cart_id:
+            return {}
+        return self.cache.get(f"cart:{cart_id}") or {}
+
+    def save(self, request, data):
+        cart_id = self._cart_id(request)
+        if not data:
+            if cart_id:
+                self.cache.delete(f"cart:{cart_id}")
+            return
+        if not cart_id:
+            cart_id = request._cart_id = secrets.token_urlsafe(24)
+            request._cart_dirty = True
+        self.cache.set(f"cart:{cart_id}", data, settings.CART_COOKIE_AGE)
+
+    def process_response(self, request, response):
+        if getattr(request, "_cart_dirty", False):
+            self._set_cookie(response, request._cart_id)
+        return response
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+SET_WEBHOOK_HINT = (
+    "Задайте TELEGRAM_WEBHOOK_SECRET (любая строка 1-256 символов A-Z a-z 0-9 _ -) "
+    "и передайте то же значение боту: "
+    "curl https://api.telegram.org/bot<TOKEN>/setWebhook "
+    "-d url=https://<домен>/telegram/webhook/ -d secret_token=<секрет>"
+)
+
+
+@register()
+def telegram_webhook_secret(app_configs, **kwargs):
+    """
+    Без секрета webhook отвечает 403 на все апдейты: бот с токеном,
+    но без TELEGRAM_WEBHOOK_SECRET молча перестал бы работать.
+    """
+    if getattr(settings, "TELEGRAM_BOT_TOKEN", None) and not getattr(settings, "TELEGRAM_WEBHOOK_SECRET", ""):
+        return [
+            Error(
+                "TELEGRAM_BOT_TOKEN задан, а TELEGRAM_WEBHOOK_SECRET пуст: "
+                "/telegram/webhook/ отклоняет все апдейты (403).",
+                hint=SET_WEBHOOK_HINT,
+                id="catalog.E001",
+            )
+        ]
+    return []
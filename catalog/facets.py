@@ -0,0 +1,196 @@
+"""
+Фильтры и счётчики фасетов для /api/watches/all/.
+
+Все счётчики считаются из одного сгруппированного запроса
+(badge, currency, is_featured, ценовой отрезок) -> count, который
+кэшируется на версию каталога. Дальше — только Python: для каждого фасета
+применяются все фильтры, кроме его собственного (как обычно в магазинах:
+выбранный "Limited" не обнуляет счётчик у "New").
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, Count, IntegerField, Value, When
+
+from .cache import catalog_key
+from .models import Watch
+
+TRUE_VALUES = {"1", "true", "yes"}
+FALSE_VALUES = {"0", "false", "no"}
+
+
+def parse_filters(params) -> dict:
+    """
+    ?badge=New,Limited&currency=сум&price_min=0&price_max=5000000&is_featured=1
+
+    badge, currency — несколько значений через запятую;
+    price_min включительно, price_max не включительно;
+    пустые параметры игнорируются. Некорректное значение — ValueError.
+    """
+    filters = {}
+    for name in ("badge", "currency"):
+        values = {v.strip() for v in params.get(name, "").split(",") if v.strip()}
+        if values:
+            filters[name] = frozenset(values)
+
+    for name in ("price_min", "price_max"):
+        raw = params.get(name, "").strip()
+        if raw:
+            try:
+                filters[name] = int(raw)
+            except ValueError:
+                raise ValueError(f"Invalid {name}")
+
+    raw = params.get("is_featured", "").strip().lower()
+    if raw in TRUE_VALUES:
+        filters["is_featured"] = True
+    elif raw in FALSE_VALUES:
+        filters["is_featured"] = False
+    elif raw:
+        raise ValueError("Invalid is_featured")
+
+    return filters
+
+
+def filters_key(filters: dict) -> str:
+    """
+    Стабильная строка фильтров для ключа кэша.
+    """
+    parts = []
+    for name in sorted(filters):
+        value = filters[name]
+        if isinstance(value, frozenset):
+            value = ",".join(sorted(value))
+        parts.append(f"{name}={value}")
+    return "&".join(parts)
+
+
+def prices_on_buckets(filters: dict) -> bool:
+    """
+    price_min/price_max (если заданы) — границы WATCH_PRICE_BUCKETS.
+    Только такие ответы и счётчики кэшируются: произвольные цены
+    плодили бы ключи без предела.
+    """
+    edges = {0, *getattr(settings, "WATCH_PRICE_BUCKETS", ())}
+    return all(filters[name] in edges for name in ("price_min", "price_max") if name in filters)
+
+
+def apply_filters(qs, filters: dict):
+    if "badge" in filters:
+        qs = qs.filter(badge__in=filters["badge"])
+    if "currency" in filters:
+        qs = qs.filter(currency__in=filters["currency"])
+    if "price_min" in filters:
+        qs = qs.filter(price__gte=filters["price_min"])
+    if "price_max" in filters:
+        qs = qs.filter(price__lt=filters["price_max"])
+    if "is_featured" in filters:
+        qs = qs.filter(is_featured=filters["is_featured"])
+    return qs
+
+
+def _segments(filters: dict) -> list:
+    """
+    Ценовые отрезки [(min, max), ...] (max не включительно): границы
+    WATCH_PRICE_BUCKETS плюс price_min/price_max из запроса, так что
+    любой отрезок целиком либо проходит ценовой фильтр, либо нет.
+    """
+    edges = set(getattr(settings, "WATCH_PRICE_BUCKETS", ()))
+    edges.update(filters[name] for name in ("price_min", "price_max") if name in filters)
+    edges = sorted(e for e in edges if e > 0)
+    return list(zip([0] + edges, edges + [None]))
+
+
+def _facet_rows(segments: list) -> list:
+    """
+    [(badge, currency, is_featured, номер отрезка, count), ...] по активным
+    часам. Один GROUP BY на версию каталога и набор границ.
+    """
+    edges = [high for _, high in segments[:-1]]
+    # только границы корзин — иначе без кэша (см. prices_on_buckets)
+    cacheable = set(edges) <= set(getattr(settings, "WATCH_PRICE_BUCKETS", ()))
+    key = catalog_key(f"facet_rows:{','.join(map(str, edges))}")
+    rows = cache.get(key) if cacheable else None
+    if rows is None:
+        segment = Case(
+            *(When(price__lt=edge, then=Value(i)) for i, edge in enumerate(edges)),
+            default=Value(len(edges)),
+            output_field=IntegerField(),
+        )
+        rows = list(
+            Watch.objects.filter(is_active=True)
+            .annotate(segment=segment)
+            .values_list("badge", "currency", "is_featured", "segment")
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+        if cacheable:
+            cache.set(key, rows, getattr(settings, "CATALOG_CACHE_TIMEOUT", 60 * 60 * 24))
+    return rows
+
+
+def _price_buckets():
+    """
+    Границы из WATCH_PRICE_BUCKETS -> [(min, max), ...], max не включительно,
+    у последней корзины max = None.
+    """
+    edges = sorted(getattr(settings, "WATCH_PRICE_BUCKETS", ()))
+    lows = [0] + edges
+    return list(zip(lows, edges + [None]))
+
+
+def _within(low, high, outer_low, outer_high) -> bool:
+    return low >= outer_low and (
+        outer_high is None or (high is not None and high <= outer_high)
+    )
+
+
+def facet_counts(filters: dict) -> dict:
+    """
+    {"badge": [{"value": "Limited", "count": 3}, ...], "currency": [...],
+     "is_featured": [...], "price": [{"min": 0, "max": 1000000, "count": 5}, ...]}
+    """
+    buckets = _price_buckets()
+    segments = _segments(filters)
+    price_min, price_max = filters.get("price_min", 0), filters.get("price_max")
+    # отрезок -> (проходит ли ценовой фильтр, номер корзины фасета)
+    placed = [
+        (
+            _within(low, high, price_min, price_max),
+            next(i for i, (b_low, b_high) in enumerate(buckets) if _within(low, high, b_low, b_high)),
+        )
+        for low, high in segments
+    ]
+    counts = {"badge": {}, "currency": {}, "is_featured": {}, "price": [0] * len(buckets)}
+
+    for badge, currency, is_featured, segment, count in _facet_rows(segments):
+        in_price, bucket = placed[segment]
+        matches = {
+            "badge": "badge" not in filters or badge in filters["badge"],
+            "currency": "currency" not in filters or currency in filters["currency"],
+            "is_featured": "is_featured" not in filters or is_featured == filters["is_featured"],
+            "price": in_price,
+        }
+        failed = [name for name, ok in matches.items() if not ok]
+        if len(failed) > 1:
+            continue
+
+        for name, value in (("badge", badge), ("currency", currency), ("is_featured", is_featured)):
+            if not failed or failed == [name]:
+                counts[name][value] = counts[name].get(value, 0) + count
+
+        if not failed or failed == ["price"]:
+            counts["price"][bucket] += count
+
+    result = {
+        name: [
+            {"value": value, "count": count}
+            for value, count in sorted(counts[name].items(), key=lambda item: (-item[1], str(item[0])))
+            if value != ""
+        ]
+        for name in ("badge", "currency", "is_featured")
+    }
+    result["price"] = [
+        {"min": low, "max": high, "count": count}
+        for (low, high), count in zip(buckets, counts["price"])
+    ]
+    return result
@@ -0,0 +1,154 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from .cache import bump_catalog_version
+from .models import Watch
+
+logger = logging.getLogger(__name__)
+
+# формат -> (формат Pillow, расширение, параметры save)
+FORMATS = {
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def derivative_name(name: str, width: int, fmt: str) -> str:
+    """
+    watches/noir.png -> watches/noir.png__w640.webp (рядом с оригиналом).
+    Расширение оригинала остаётся в имени: иначе превью noir.png
+    и noir.jpg затирали бы друг друга.
+    """
+    return f"{name}__w{width}.{FORMATS[fmt][1]}"
+
+
+def build_derivatives(name: str) -> dict:
+    """
+    Режет оригинал на ширины IMAGE_DERIVATIVE_WIDTHS во всех FORMATS.
+    Не трогает БД, поэтому годится для запуска в отдельном процессе.
+    """
+    with default_storage.open(name, "rb") as f:
+        original = ImageOps.exif_transpose(Image.open(f))
+        original.load()
+
+    result = {"source": name}
+    widths = sorted({min(w, original.width) for w in settings.IMAGE_DERIVATIVE_WIDTHS})
+    for width in widths:
+        resized = original.copy()
+        resized.thumbnail((width, original.height), Image.LANCZOS)
+        for fmt, (pil_format, _, options) in FORMATS.items():
+            image = resized
+            if pil_format == "JPEG" and image.mode != "RGB":
+                image = image.convert("RGB")
+            buf = BytesIO()
+            image.save(buf, pil_format, **options)
+
+            target = derivative_name(name, width, fmt)
+            if default_storage.exists(target):
+                default_storage.delete(target)
+            saved = default_storage.save(target, ContentFile(buf.getvalue()))
+            result.setdefault(fmt, {})[str(width)] = saved
+    return result
+
+
+def _derivative_files(data: dict) -> set:
+    return {name for fmt in FORMATS for name in (data.get(fmt) or {}).values()}
+
+
+def delete_derivatives(data: dict, keep: dict = None) -> None:
+    """
+    Удаляет файлы превью из data, кроме тех, что есть и в keep.
+    """
+    for name in _derivative_files(data) - _derivative_files(keep or {}):
+        try:
+            default_storage.delete(name)
+        except OSError:
+            pass
+
+
+def srcset(data: dict) -> dict:
+    """
+    {"webp": "<url> 320w, <url> 640w", "jpeg": "..."} для <source srcset>.
+    """
+    return {
+        fmt: ", ".join(
+            f"{default_storage.url(name)} {width}w"
+            for width, name in sorted(data[fmt].items(), key=lambda x: int(x[0]))
+        )
+        for fmt in FORMATS
+        if data.get(fmt)
+    }
+
+
+def save_derivatives(watch_id: int, data: dict, image_name: str) -> bool:
+    """
+    Сохраняет результат, только если фото за это время не сменили.
+    update() не шлёт сигналов, поэтому кэш каталога сбрасываем сами.
+    """
+    old = Watch.objects.filter(id=watch_id).values_list("image_derivatives", flat=True).first()
+    updated = Watch.objects.filter(id=watch_id, image=image_name).update(image_derivatives=data)
+    if not updated:
+        delete_derivatives(data)
+        return False
+    if old:
+        # прежние файлы, которые не перезаписаны новыми (другой оригинал
+        # или превью со старой схемой имён)
+        delete_derivatives(old, keep=data)
+    bump_catalog_version()
+    return True
+
+
+def refresh_watch_derivatives(watch_id: int, force: bool = False) -> bool:
+    watch = Watch.objects.only("image", "image_derivatives").filter(id=watch_id).first()
+    if watch is None:
+        return False
+    if not watch.image:
+        if watch.image_derivatives:
+            delete_derivatives(watch.image_derivatives)
+            Watch.objects.filter(id=watch_id).update(image_derivatives={})
+            bump_catalog_version()
+        return False
+    if not force and watch.image_derivatives.get("source") == watch.image.name:
+        return False
+    return save_derivatives(watch_id, build_derivatives(watch.image.name), watch.image.name)
+
+
+# =========================
+# Фоновая генерация после сохранения Watch
+# =========================
+
+_executor = None
+
+
+def _run(watch_id: int) -> None:
+    try:
+        refresh_watch_derivatives(watch_id)
+    except Exception:
+        logger.exception("Не удалось сделать превью для Watch #%s", watch_id)
+
+
+def _run_in_thread(watch_id: int) -> None:
+    try:
+        _run(watch_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_derivatives(watch_id: int) -> None:
+    """
+    Генерирует превью в фоновом потоке после коммита, вне запроса.
+    """
+    global _executor
+    if not settings.IMAGE_DERIVATIVES_ASYNC:
+        transaction.on_commit(lambda: _run(watch_id))
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-derivatives")
+    transaction.on_commit(lambda: _executor.submit(_run_in_thread, watch_id))
@@ -0,0 +1,72 @@
+import heapq
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current = ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    """
+    Счётчики одного запроса: SQL (число, время, самые медленные),
+    и именованные отрезки времени (шаблоны, Telegram).
+    """
+
+    def __init__(self, keep_slow: int = 5):
+        self.queries = 0
+        self.db_time = 0.0
+        self.spans = {}
+        self._keep_slow = keep_slow
+        self._slow = []  # min-heap (секунды, порядковый номер, sql)
+
+    def add(self, name: str, seconds: float) -> None:
+        total, count = self.spans.get(name, (0.0, 0))
+        self.spans[name] = (total + seconds, count + 1)
+
+    def __call__(self, execute, sql, params, many, context):
+        """
+        connection.execute_wrapper: считает каждый SQL-запрос.
+        """
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            spent = time.perf_counter() - start
+            self.queries += 1
+            self.db_time += spent
+            item = (spent, self.queries, sql)
+            if len(self._slow) < self._keep_slow:
+                heapq.heappush(self._slow, item)
+            else:
+                heapq.heappushpop(self._slow, item)
+
+    def slowest_queries(self) -> list:
+        return [(spent, sql) for spent, _, sql in sorted(self._slow, reverse=True)]
+
+
+@contextmanager
+def collect(keep_slow: int = 5):
+    metrics = RequestMetrics(keep_slow)
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+def record(name: str, seconds: float) -> None:
+    """
+    Добавляет отрезок к метрикам текущего запроса (если они собираются).
+    """
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.add(name, seconds)
+
+
+@contextmanager
+def timed(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
@@ -0,0 +1,118 @@
+"""
+Общие помощники для bench_* команд: временная тестовая БД, фейковый
+Telegram и замеры.
+"""
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+BENCH_CACHES = {
+    alias: {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": alias}
+    for alias in ("default", "catalog_meta", "carts")
+}
+
+
+@contextmanager
+def bench_environment(**settings_overrides):
+    """
+    Поднимает отдельную тестовую БД и локальный кэш, чтобы бенчмарк
+    не трогал боевые данные. После выхода всё удаляется.
+    """
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        with override_settings(CACHES=BENCH_CACHES, **settings_overrides):
+            yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def requests_per_second(func, seconds: float = 2.0, before=None) -> float:
+    """
+    Сколько раз в секунду выполняется func(). before() вызывается перед
+    каждым вызовом и в замер не входит.
+    """
+    calls = 0
+    spent = 0.0
+    while spent < seconds:
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        func()
+        spent += time.perf_counter() - start
+        calls += 1
+    return calls / spent
+
+
+def percentile(values, p: float) -> float:
+    """
+    p-й перцентиль (0..100) методом ближайшего ранга.
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, round(p / 100 * len(ordered) + 0.5))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class _FakeTelegramHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        payload = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        method = self.path.rsplit("/", 1)[-1]
+        with self.server.lock:
+            if self.server.calls is not None:
+                self.server.calls.append((method, payload))
+            scripted = self.server.responses.pop(0) if self.server.responses else None
+        if scripted is not None:
+            status, data = scripted
+        else:
+            result = [] if method == "sendMediaGroup" else {"message_id": 1}
+            status, data = 200, {"ok": True, "result": result}
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@contextmanager
+def fake_telegram_server(delay: float = 0.0, responses=None, calls=None):
+    """
+    Локальный Bot API, который на всё отвечает ok. Отдаёт базовый URL
+    для TELEGRAM_API_URL. delay — имитация сетевой задержки до Telegram (сек).
+
+    Для тестов: responses — список (HTTP-статус, JSON-тело), которыми
+    по очереди отвечаются первые запросы; в calls (список) дописываются
+    (метод, тело запроса).
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeTelegramHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.responses = list(responses or [])
+    server.calls = calls
+    server.lock = threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
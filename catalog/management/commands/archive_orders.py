@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from catalog.archive import archivable, archive_orders
+
+
+class Command(BaseCommand):
+    help = (
+        "Переносит доставленные и отменённые заказы старше --days дней "
+        "в архивные таблицы (пачками, каждая в своей транзакции)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.ORDER_ARCHIVE_AFTER_DAYS)
+        parser.add_argument("--batch", type=int, default=settings.ORDER_ARCHIVE_BATCH_SIZE, help="Заказов в транзакции")
+        parser.add_argument("--dry-run", action="store_true", help="Только посчитать, ничего не переносить")
+
+    def handle(self, *args, **options):
+        if options["dry_run"]:
+            count = archivable(timezone.now() - timedelta(days=options["days"])).count()
+            self.stdout.write(f"Будет перенесено заказов: {count}")
+            return
+
+        moved = archive_orders(
+            options["days"],
+            options["batch"],
+            progress=lambda total: self.stdout.write(f"перенесено: {total}"),
+        )
+        self.stdout.write(f"Готово, перенесено заказов: {moved}")
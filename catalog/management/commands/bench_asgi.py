@@ -0,0 +1,228 @@
+import asyncio
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ._bench import percentile
+
+# Настройки серверов бенчмарка: свой SQLite-файл, локальный кэш в каждом
+# процессе. Webhook в Telegram не ходит (только очередь), токен нужен,
+# чтобы он принимал апдейты.
+SETTINGS_TEMPLATE = """
+from timepiece_site.settings import *
+
+DEBUG = False
+ALLOWED_HOSTS = ["127.0.0.1"]
+DATABASES = {{"default": {{
+    "ENGINE": "django.db.backends.sqlite3",
+    "NAME": {db!r},
+    "OPTIONS": {{"timeout": 30}},
+}}}}
+CACHES = {{
+    "default": {{"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    "catalog_meta": {{"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "meta"}},
+    "carts": {{"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "carts"}},
+}}
+TELEGRAM_BOT_TOKEN = "bench"
+TELEGRAM_WEBHOOK_SECRET = "bench"
+IMAGE_DERIVATIVES_ASYNC = False
+LOGGING = {{"version": 1, "disable_existing_loggers": False}}
+"""
+
+SEED_SCRIPT = """
+import sys, django
+django.setup()
+from catalog.models import Watch
+from catalog import search
+Watch.objects.bulk_create(
+    Watch(name=f"Bench {i}", tag="BENCH", description="Автоподзавод", price=1_000_000 + i,
+          badge=("", "New", "Limited")[i % 3], is_featured=i % 10 == 0, is_hero=i == 0, sort_order=i)
+    for i in range(int(sys.argv[1]))
+)
+search.index_watches()
+"""
+
+SERVERS = {
+    "gunicorn (sync)": [
+        "-m", "gunicorn", "timepiece_site.wsgi:application",
+        "--workers", "{workers}", "--bind", "127.0.0.1:{port}", "--log-level", "warning",
+    ],
+    "uvicorn (asgi)": [
+        "-m", "uvicorn", "timepiece_site.asgi:application",
+        "--workers", "{workers}", "--host", "127.0.0.1", "--port", "{port}",
+        "--log-level", "warning", "--no-access-log",
+    ],
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(port: int, proc, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise CommandError(f"Сервер завершился с кодом {proc.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise CommandError("Сервер не поднялся")
+
+
+async def _load(base_url: str, scenario, concurrency: int, seconds: float) -> dict:
+    """
+    concurrency клиентов шлют запросы по кругу seconds секунд.
+    """
+    method, path, make_body = scenario
+    latencies = []
+    errors = 0
+
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        timeout=30,
+        limits=httpx.Limits(max_connections=concurrency),
+    ) as client:
+        async def one():
+            body = make_body() if make_body else None
+            response = await client.request(
+                method, path, content=body,
+                headers={
+                    "Content-Type": "application/json",
+                    "X-Telegram-Bot-Api-Secret-Token": "bench",
+                } if body else None,
+            )
+            return response.status_code
+
+        for _ in range(concurrency):  # прогрев
+            await one()
+
+        deadline = time.perf_counter() + seconds
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    status = await one()
+                except httpx.HTTPError:
+                    status = 599
+                latencies.append((time.perf_counter() - start) * 1000)
+                errors += status >= 400
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        spent = time.perf_counter() - started
+
+    return {
+        "rps": round(len(latencies) / spent, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "requests": len(latencies),
+        "errors": errors,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Пропускная способность API каталога и webhook: gunicorn (sync-воркеры) "
+        "против uvicorn (ASGI, async-вьюхи) при одинаковом числе процессов."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2, help="Процессов у каждого сервера")
+        parser.add_argument("--concurrency", type=int, default=32, help="Одновременных клиентов")
+        parser.add_argument("--seconds", type=float, default=5.0, help="Длительность сценария")
+        parser.add_argument("--watches", type=int, default=1000)
+        parser.add_argument("--only", default="", help="Только эти сценарии (через запятую)")
+        parser.add_argument("--output", help="Куда записать результаты (JSON)")
+
+    def scenarios(self):
+        # webhook только ставит апдейт в очередь; update_id каждый раз новый,
+        # иначе вставка отбрасывается как повтор
+        update_ids = itertools.count(1)
+
+        def update():
+            return json.dumps({"update_id": next(update_ids), "callback_query": {
+                "id": "1", "data": "deliver:1",
+                "message": {"chat": {"id": 1}, "message_id": 1},
+            }})
+
+        return {
+            "watches_all": ("GET", "/api/watches/all/?limit=50", None),
+            "watches_search": ("GET", "/api/watches/search/?q=bench", None),
+            "hero_watch": ("GET", "/api/watches/hero/", None),
+            "telegram_webhook": ("POST", "/telegram/webhook/", update),
+        }
+
+    def handle(self, *args, **options):
+        only = {name.strip() for name in options["only"].split(",") if name.strip()}
+        scenarios = {
+            name: scenario for name, scenario in self.scenarios().items()
+            if not only or name in only
+        }
+
+        results = {}
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "bench_asgi_settings.py"), "w", encoding="utf-8") as f:
+                f.write(SETTINGS_TEMPLATE.format(db=os.path.join(tmp, "db.sqlite3")))
+            env = {
+                **os.environ,
+                "DJANGO_SETTINGS_MODULE": "bench_asgi_settings",
+                "PYTHONPATH": os.pathsep.join([tmp, str(settings.BASE_DIR)]),
+            }
+
+            def run(*cmd):
+                subprocess.run([sys.executable, *cmd], cwd=settings.BASE_DIR, env=env, check=True)
+
+            run("manage.py", "migrate", "-v", "0")
+            run("-c", SEED_SCRIPT, str(options["watches"]))
+
+            for server, template in SERVERS.items():
+                port = _free_port()
+                cmd = [
+                    part.format(workers=options["workers"], port=port) for part in template
+                ]
+                proc = subprocess.Popen([sys.executable, *cmd], cwd=settings.BASE_DIR, env=env)
+                try:
+                    _wait_ready(port, proc)
+                    for name, scenario in scenarios.items():
+                        result = asyncio.run(_load(
+                            f"http://127.0.0.1:{port}", scenario,
+                            options["concurrency"], options["seconds"],
+                        ))
+                        results.setdefault(name, {})[server] = result
+                        self.report(name, server, result)
+                finally:
+                    proc.terminate()
+                    proc.wait(timeout=30)
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump({
+                    "meta": {k: options[k] for k in (
+                        "workers", "concurrency", "seconds", "watches",
+                    )},
+                    "results": results,
+                }, f, ensure_ascii=False, indent=2)
+
+    def report(self, name, server, result):
+        line = (
+            f"{name:<28} {server:<16} {result['rps']:>8.1f} rps  "
+            f"p50 {result['p50_ms']:>8.2f} мс  p95 {result['p95_ms']:>8.2f} мс  "
+            f"ошибок {result['errors']}"
+        )
+        self.stdout.write(self.style.ERROR(line) if result["errors"] else line)
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+from catalog.cache import bump_catalog_version
+from catalog.models import Watch
+
+from ._bench import bench_environment, requests_per_second
+
+
+class Command(BaseCommand):
+    help = "Сравнивает холодные и тёплые запросы к /api/watches/* (запросов в секунду)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--watches", type=int, default=500, help="Сколько часов создать")
+        parser.add_argument("--seconds", type=float, default=2.0, help="Длительность замера")
+
+    def handle(self, *args, **options):
+        with bench_environment():
+            Watch.objects.bulk_create(
+                Watch(
+                    name=f"Watch {i}",
+                    tag="BENCH · AUTOMATIC",
+                    description="Описание " * 40,
+                    price=1_000_000 + i,
+                    badge="New" if i % 5 == 0 else "",
+                    is_hero=i == 0,
+                    is_featured=i % 7 == 0,
+                    sort_order=i,
+                )
+                for i in range(options["watches"])
+            )
+
+            client = Client()
+            for name in ("hero_watch", "watches_featured", "watches_all"):
+                url = reverse(name)
+                cold = requests_per_second(
+                    lambda: client.get(url), options["seconds"], before=bump_catalog_version
+                )
+                client.get(url)
+                warm = requests_per_second(lambda: client.get(url), options["seconds"])
+                self.stdout.write(
+                    f"{url:<28} cold: {cold:9.1f} req/s   warm: {warm:9.1f} req/s   "
+                    f"x{warm / cold:.1f}"
+                )
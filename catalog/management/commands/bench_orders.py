@@ -0,0 +1,66 @@
+import time
+
+from django.db import connection
+from django.core.management.base import BaseCommand
+from django.test.utils import CaptureQueriesContext
+
+from catalog.models import Order, OrderItem, Watch
+from catalog.outbox import enqueue_order_notification
+from catalog.services import create_order
+
+from ._bench import bench_environment
+
+
+def legacy_create_order(lines, prices):
+    """
+    Прежний путь из views: заказ + OrderItem.objects.create на каждую строку,
+    без общей транзакции, цены от клиента.
+    """
+    order = Order.objects.create(
+        location="Bench", phone="+998000000000", latitude=41.3, longitude=69.2, status="waiting",
+    )
+    for watch_id, quantity in lines:
+        OrderItem.objects.create(
+            order=order, watch_id=watch_id, quantity=quantity, price=prices[watch_id],
+        )
+    enqueue_order_notification(order)
+    return order
+
+
+def service_create_order(lines, prices):
+    return create_order(
+        user=None, location="Bench", phone="+998000000000", latitude=41.3, longitude=69.2, lines=lines,
+    )
+
+
+class Command(BaseCommand):
+    help = "Сравнивает создание заказа: построчный create против create_order (bulk_create)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1,10,50,200", help="Размеры корзин через запятую")
+        parser.add_argument("--repeat", type=int, default=20, help="Заказов на каждый замер")
+
+    def handle(self, *args, **options):
+        sizes = [int(x) for x in options["sizes"].split(",")]
+
+        with bench_environment():
+            Watch.objects.bulk_create(
+                Watch(name=f"Watch {i}", price=1_000_000 + i, sort_order=i)
+                for i in range(max(sizes))
+            )
+            watch_ids = list(Watch.objects.values_list("id", flat=True))
+            prices = dict(Watch.objects.values_list("id", "price"))
+
+            self.stdout.write(f"{'позиций':>8} {'путь':>8} {'мс/заказ':>10} {'запросов':>9}")
+            for size in sizes:
+                lines = [(watch_id, 1) for watch_id in watch_ids[:size]]
+                for name, func in (("legacy", legacy_create_order), ("service", service_create_order)):
+                    with CaptureQueriesContext(connection) as queries:
+                        start = time.perf_counter()
+                        for _ in range(options["repeat"]):
+                            func(lines, prices)
+                        spent = time.perf_counter() - start
+                    self.stdout.write(
+                        f"{size:>8} {name:>8} {spent / options['repeat'] * 1000:>10.2f} "
+                        f"{len(queries) // options['repeat']:>9}"
+                    )
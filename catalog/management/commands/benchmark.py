@@ -0,0 +1,309 @@
+import itertools
+import json
+import logging
+import random
+import subprocess
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from catalog import reports, search
+from catalog.cache import bump_catalog_version
+from catalog.models import Order, OrderItem, UserProfile, Watch
+
+from ._bench import bench_environment, fake_telegram_server, percentile
+
+# Бюджеты по умолчанию: максимум SQL-запросов на один запрос и p95 в мс.
+# Переопределяются файлом --budgets с тем же форматом.
+DEFAULT_BUDGETS = {
+    "watches_all": {"queries": 0, "p95_ms": 50},
+    "watches_all (cold)": {"queries": 2, "p95_ms": 500},
+    "watches_featured": {"queries": 0, "p95_ms": 50},
+    "watches_featured (cold)": {"queries": 1, "p95_ms": 100},
+    "hero_watch": {"queries": 0, "p95_ms": 50},
+    "hero_watch (cold)": {"queries": 1, "p95_ms": 100},
+    "watches_search": {"queries": 0, "p95_ms": 50},
+    "watches_search (cold)": {"queries": 2, "p95_ms": 100},
+    "cart_detail": {"queries": 3, "p95_ms": 200},
+    "checkout": {"queries": 12, "p95_ms": 300},
+    "api_create_order": {"queries": 8, "p95_ms": 300},
+    "account": {"queries": 6, "p95_ms": 300},
+    # webhook только ставит апдейт в очередь (catalog/updates.py)
+    "telegram_webhook (enqueue)": {"queries": 3, "p95_ms": 50},
+    # сводка /orders за неделю, которую воркер очереди шлёт в Telegram
+    "orders_report (week)": {"queries": 5, "p95_ms": 300},
+}
+
+BADGES = ["", "", "New", "Bestseller", "Limited"]
+BATCH = 5000
+
+
+def seed(watches: int, orders: int, users: int, rng: random.Random) -> User:
+    """
+    Синтетический каталог и история заказов. Возвращает пользователя
+    с самой длинной историей (для /account/).
+    """
+    Watch.objects.bulk_create(
+        (
+            Watch(
+                name=f"Bench {i}",
+                tag="BENCH · AUTOMATIC",
+                description="Сапфировое стекло, автоподзавод. " * 8,
+                price=rng.randrange(500_000, 50_000_000, 1000),
+                badge=BADGES[i % len(BADGES)],
+                is_hero=i == 0,
+                is_featured=i % 10 == 0,
+                sort_order=i,
+            )
+            for i in range(watches)
+        ),
+        batch_size=BATCH,
+    )
+    prices = dict(Watch.objects.values_list("id", "price"))
+    watch_ids = list(prices)
+
+    User.objects.bulk_create(
+        (User(username=f"bench{i}", password="!") for i in range(users)),
+        batch_size=BATCH,
+    )
+    user_ids = list(User.objects.filter(username__startswith="bench").values_list("id", flat=True))
+    UserProfile.objects.bulk_create(
+        (UserProfile(user_id=uid, phone="+998000000000") for uid in user_ids),
+        batch_size=BATCH,
+    )
+    heavy_user_id = user_ids[0]
+
+    # created_at раскидываем по последним 30 дням, auto_now_add бы всё затёр
+    created_at = Order._meta.get_field("created_at")
+    created_at.auto_now_add = False
+    try:
+        now = timezone.now()
+        for start in range(0, orders, BATCH):
+            batch = []
+            lines = []
+            for _ in range(min(BATCH, orders - start)):
+                picked = {rng.choice(watch_ids): rng.randint(1, 3) for _ in range(rng.randint(1, 3))}
+                order = Order(
+                    # пятая часть заказов — у одного постоянного клиента
+                    user_id=heavy_user_id if rng.random() < 0.2 else rng.choice(user_ids + [None]),
+                    created_at=now - timedelta(seconds=rng.randrange(30 * 24 * 3600)),
+                    location="Ташкент",
+                    phone="+998000000000",
+                    latitude=41.3,
+                    longitude=69.2,
+                    status=rng.choice(["waiting", "delivered", "canceled"]),
+                    total_amount=sum(Decimal(prices[w]) * q for w, q in picked.items()),
+                    items_count=sum(picked.values()),
+                )
+                batch.append(order)
+                lines.append(picked)
+            Order.objects.bulk_create(batch)
+            OrderItem.objects.bulk_create(
+                OrderItem(order=order, watch_id=w, quantity=q, price=prices[w])
+                for order, picked in zip(batch, lines)
+                for w, q in picked.items()
+            )
+    finally:
+        created_at.auto_now_add = True
+
+    search.index_watches()  # bulk_create обходит сигналы
+    return User.objects.get(id=heavy_user_id)
+
+
+class Command(BaseCommand):
+    help = (
+        "Бенчмарк эндпоинтов на синтетических данных: p50/p95 и число SQL-запросов, "
+        "проверка бюджетов, результат в JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--watches", type=int, default=1000)
+        parser.add_argument("--orders", type=int, default=10000)
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--requests", type=int, default=50, help="Замеров на сценарий")
+        parser.add_argument("--only", default="", help="Только эти сценарии (через запятую)")
+        parser.add_argument("--budgets", help="JSON-файл с бюджетами (формат DEFAULT_BUDGETS)")
+        parser.add_argument("--output", help="Куда записать результаты (JSON)")
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        budgets = dict(DEFAULT_BUDGETS)
+        if options["budgets"]:
+            with open(options["budgets"], encoding="utf-8") as f:
+                budgets.update(json.load(f))
+        only = {name.strip() for name in options["only"].split(",") if name.strip()}
+
+        with fake_telegram_server() as telegram_url, bench_environment(
+            TELEGRAM_API_URL=telegram_url,
+            TELEGRAM_BOT_TOKEN="bench",
+            TELEGRAM_WEBHOOK_SECRET="bench",
+            TELEGRAM_CHAT_ID=1,
+            TELEGRAM_ADMIN_IDS=[],
+            CART_STORAGE="catalog.cart_storage.SessionCartStorage",
+        ):
+            started = time.perf_counter()
+            heavy_user = seed(
+                options["watches"], options["orders"], options["users"], random.Random(options["seed"])
+            )
+            self.stdout.write(f"Данные созданы за {time.perf_counter() - started:.1f} с")
+
+            # 500-е попадут в результаты; трейсбеки django.request здесь не нужны
+            logging.getLogger("django.request").disabled = True
+            results = {}
+            for name, run in self.scenarios(heavy_user):
+                if only and name not in only:
+                    continue
+                results[name] = self.measure(run, options["requests"])
+                results[name]["budget"] = budgets.get(name)
+                self.report(name, results[name])
+
+        payload = {
+            "meta": {
+                "commit": self.git_commit(),
+                "vendor": connection.vendor,
+                "timestamp": timezone.now().isoformat(),
+                "scale": {k: options[k] for k in ("watches", "orders", "users", "requests")},
+            },
+            "results": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, indent=2)
+
+        failures = [
+            f"{name}: {problem}"
+            for name, result in results.items()
+            for problem in result["problems"]
+        ]
+        if failures:
+            raise CommandError("Бюджеты превышены:\n" + "\n".join(failures))
+
+    def scenarios(self, heavy_user):
+        """
+        (название, (request, before)): request() делает один запрос и
+        возвращает ответ (None — сценарий без HTTP); before() готовит
+        данные и в замер не входит.
+        """
+        anonymous = Client(raise_request_exception=False)
+        logged_in = Client(raise_request_exception=False)
+        logged_in.force_login(heavy_user)
+        shopper = Client(raise_request_exception=False)
+        watch_ids = list(Watch.objects.values_list("id", flat=True)[:3])
+
+        def get(client, url):
+            return lambda: client.get(url)
+
+        for view in ("watches_all", "watches_featured", "hero_watch"):
+            url = reverse(view)
+            yield view, (get(anonymous, url), None)
+            yield f"{view} (cold)", (get(anonymous, url), bump_catalog_version)
+
+        url = reverse("watches_search") + "?q=bench+автоподзав"
+        yield "watches_search", (get(anonymous, url), None)
+        yield "watches_search (cold)", (get(anonymous, url), bump_catalog_version)
+
+        def fill_cart():
+            for watch_id in watch_ids:
+                shopper.post(reverse("cart_add", args=[watch_id]))
+
+        yield "cart_detail", (get(shopper, reverse("cart_detail")), fill_cart)
+        yield "checkout", (
+            lambda: shopper.post(reverse("checkout"), {
+                "location": "Ташкент", "phone": "+998000000000",
+                "latitude": "41.3", "longitude": "69.2",
+            }),
+            fill_cart,
+        )
+
+        order_body = json.dumps({
+            "location": "Ташкент", "phone": "+998000000000", "latitude": 41.3, "longitude": 69.2,
+            "items": [{"id": watch_id, "quantity": 1} for watch_id in watch_ids],
+        })
+        yield "api_create_order", (
+            lambda: anonymous.post(
+                reverse("api_create_order"), order_body, content_type="application/json"
+            ),
+            None,
+        )
+        yield "account", (get(logged_in, reverse("account")), None)
+
+        # каждый запрос — новый update_id, иначе он отбрасывается как повтор
+        update_ids = itertools.count(1)
+
+        def webhook():
+            update = json.dumps({"update_id": next(update_ids), "callback_query": {
+                "id": "1", "data": "orders:week",
+                "message": {"chat": {"id": 1}, "message_id": 1},
+            }})
+            return anonymous.post(
+                reverse("telegram_webhook"), update, content_type="application/json",
+                HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN="bench",
+            )
+
+        yield "telegram_webhook (enqueue)", (webhook, None)
+
+        def weekly_report():
+            reports.format_report(reports.order_report("week"))
+
+        yield "orders_report (week)", (weekly_report, None)
+
+    def measure(self, run, requests: int) -> dict:
+        request, before = run
+        timings = []
+        queries = []
+        statuses = set()
+        for i in range(requests + 3):
+            if before is not None:
+                before()
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = request()
+                spent = (time.perf_counter() - start) * 1000
+            if response is not None:
+                statuses.add(response.status_code)
+            if i >= 3:  # первые запросы — прогрев
+                timings.append(spent)
+                queries.append(len(captured))
+
+        return {
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "queries": max(queries),
+            "statuses": sorted(statuses),
+            "problems": [],
+        }
+
+    def report(self, name, result):
+        budget = result["budget"] or {}
+        problems = result["problems"]
+        if any(status >= 400 for status in result["statuses"]):
+            problems.append(f"HTTP {result['statuses']}")
+        if "queries" in budget and result["queries"] > budget["queries"]:
+            problems.append(f"запросов {result['queries']} > {budget['queries']}")
+        if "p95_ms" in budget and result["p95_ms"] > budget["p95_ms"]:
+            problems.append(f"p95 {result['p95_ms']} мс > {budget['p95_ms']} мс")
+
+        line = (
+            f"{name:<34} p50 {result['p50_ms']:>8.2f} мс  p95 {result['p95_ms']:>8.2f} мс  "
+            f"SQL {result['queries']:>3}"
+        )
+        self.stdout.write(self.style.ERROR(line) if problems else line)
+
+    @staticmethod
+    def git_commit():
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "HEAD"],
+                cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,45 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from catalog.images import build_derivatives, save_derivatives
+from catalog.models import Watch
+
+
+class Command(BaseCommand):
+    help = "Генерирует превью (WebP/JPEG) для фото часов параллельно в нескольких процессах."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None, help="Процессов (по умолчанию — по числу CPU)")
+        parser.add_argument("--force", action="store_true", help="Пересоздать даже актуальные превью")
+
+    def handle(self, *args, **options):
+        todo = [
+            (watch_id, name)
+            for watch_id, name, data in Watch.objects.exclude(image="")
+            .exclude(image__isnull=True)
+            .values_list("id", "image", "image_derivatives")
+            if options["force"] or (data or {}).get("source") != name
+        ]
+        if not todo:
+            self.stdout.write("Все превью актуальны.")
+            return
+
+        # соединения с БД не должны переехать в дочерние процессы
+        connections.close_all()
+
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=options["workers"], initializer=django.setup) as pool:
+            futures = {pool.submit(build_derivatives, name): (watch_id, name) for watch_id, name in todo}
+            for future in as_completed(futures):
+                watch_id, name = futures[future]
+                try:
+                    save_derivatives(watch_id, future.result(), name)
+                    done += 1
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"Watch #{watch_id} ({name}): {e}")
+
+        self.stdout.write(f"Готово: {done}, ошибок: {failed}")
@@ -0,0 +1,112 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from catalog.archive import UserOrderHistory
+from catalog.models import Order, OrderItem, TelegramOutbox, Watch
+
+
+def hot_queries():
+    """
+    (название, queryset, индекс или кортеж индексов, которые должны
+    использоваться). Держать в синхронизации с views / archive / reports / outbox.
+    """
+    now = timezone.now()
+    return [
+        (
+            "watches_all",
+            Watch.objects.filter(is_active=True).order_by("sort_order", "id")[:101],
+            "watch_active_sort_idx",
+        ),
+        (
+            "watches_all (cursor)",
+            Watch.objects.filter(is_active=True)
+            .filter(Q(sort_order__gt=10) | Q(sort_order=10, id__gt=100))
+            .order_by("sort_order", "id")[:101],
+            "watch_active_sort_idx",
+        ),
+        (
+            "watches_featured",
+            Watch.objects.filter(is_active=True, is_featured=True).order_by("sort_order", "id")[:3],
+            "watch_featured_sort_idx",
+        ),
+        (
+            "hero_watch",
+            Watch.objects.filter(is_active=True, is_hero=True).order_by("sort_order", "id")[:1],
+            "watch_hero_sort_idx",
+        ),
+        (
+            "account",
+            UserOrderHistory(1).orders_queryset()[:20],
+            ("order_user_created_idx", "arch_order_user_created_idx"),
+        ),
+        (
+            "orders report",
+            Order.objects.filter(created_at__gte=now - timedelta(days=1))
+            .order_by("-created_at", "-id")[:20],
+            "order_created_idx",
+        ),
+        (
+            "orders report: top watches",
+            OrderItem.objects.filter(
+                order__in=Order.objects.filter(created_at__gte=now - timedelta(days=1)).values("id")
+            )
+            .values("watch_id", "watch__name")
+            .annotate(units=Sum("quantity"))
+            .order_by("-units")[:5],
+            "order_created_idx",
+        ),
+        (
+            "telegram outbox",
+            TelegramOutbox.objects.filter(status="pending", next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:20],
+            "outbox_due_idx",
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Печатает EXPLAIN горячих запросов (SQLite / PostgreSQL)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--analyze", action="store_true", help="EXPLAIN ANALYZE (только PostgreSQL)"
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Ошибка, если запрос не использует ожидаемый индекс",
+        )
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        explain_options = {}
+        if options["analyze"]:
+            if vendor != "postgresql":
+                raise CommandError("--analyze поддерживается только на PostgreSQL")
+            explain_options["analyze"] = True
+
+        missing = []
+        with transaction.atomic():
+            if vendor == "postgresql" and options["check"]:
+                # на пустых/маленьких таблицах планировщик всё равно выберет seq scan
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+
+            for name, qs, indexes in hot_queries():
+                indexes = (indexes,) if isinstance(indexes, str) else indexes
+                plan = qs.explain(**explain_options)
+                self.stdout.write(self.style.MIGRATE_HEADING(
+                    f"== {name} (ожидается {', '.join(indexes)})"
+                ))
+                self.stdout.write(plan)
+                self.stdout.write("")
+                missing.extend(f"{name}: нет {index}" for index in indexes if index not in plan)
+
+            transaction.set_rollback(True)
+
+        if missing and options["check"]:
+            raise CommandError("Запросы без ожидаемых индексов:\n" + "\n".join(missing))
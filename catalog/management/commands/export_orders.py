@@ -0,0 +1,36 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.order_export import FORMATS, export_chunks, parse_range
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгружает заказы с позициями за период (CSV или NDJSON) — чанками "
+        "по (created_at, id), память не растёт с числом заказов."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="date_from", default="", help="YYYY-MM-DD, включительно")
+        parser.add_argument("--to", dest="date_to", default="", help="YYYY-MM-DD, включительно")
+        parser.add_argument("--format", choices=FORMATS, default="csv")
+        parser.add_argument("--output", "-o", help="Файл (по умолчанию stdout)")
+        parser.add_argument("--chunk", type=int, default=None, help="Заказов в одной выборке")
+
+    def handle(self, *args, **options):
+        try:
+            start, end = parse_range(options["date_from"], options["date_to"])
+        except ValueError as e:
+            raise CommandError(e)
+
+        if options["output"]:
+            stream = open(options["output"], "w", encoding="utf-8", newline="")
+        else:
+            stream = sys.stdout
+        try:
+            for chunk in export_chunks(start, end, options["format"], options["chunk"]):
+                stream.write(chunk)
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
@@ -0,0 +1,37 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from catalog.watch_io import FORMATS, detect_format, export_lines
+
+
+class Command(BaseCommand):
+    help = "Выгружает каталог часов в CSV или NDJSON (потоком, без загрузки всего в память)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", "-o", help="Файл (по умолчанию stdout)")
+        parser.add_argument("--format", choices=FORMATS, help="По умолчанию — по расширению файла, иначе csv")
+        parser.add_argument("--active", action="store_true", help="Только активные")
+
+    def handle(self, *args, **options):
+        fmt = options["format"] or detect_format(options["output"] or "")
+
+        from catalog.models import Watch
+        queryset = Watch.objects.filter(is_active=True) if options["active"] else Watch.objects.all()
+
+        if options["output"]:
+            stream = open(options["output"], "w", encoding="utf-8", newline="")
+        else:
+            stream = sys.stdout
+        rows = 0
+        try:
+            for line in export_lines(queryset, fmt):
+                stream.write(line)
+                rows += 1
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+
+        if options["output"]:
+            rows -= fmt == "csv"  # заголовок
+            self.stderr.write(f"Выгружено часов: {rows}")
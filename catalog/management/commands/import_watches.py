@@ -0,0 +1,45 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.watch_io import FORMATS, IMPORT_BATCH_SIZE, detect_format, import_rows, read_rows
+
+MAX_REPORTED_ERRORS = 100
+
+
+class Command(BaseCommand):
+    help = (
+        "Загружает каталог часов из CSV или NDJSON: строки с id обновляют часы "
+        "(только переданные колонки), без id — создают новые."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл ('-' — stdin)")
+        parser.add_argument("--format", choices=FORMATS, help="По умолчанию — по расширению файла, иначе csv")
+        parser.add_argument("--batch", type=int, default=IMPORT_BATCH_SIZE, help="Строк в пачке")
+        parser.add_argument("--dry-run", action="store_true", help="Только проверить, ничего не записывать")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or detect_format(path)
+
+        try:
+            stream = sys.stdin if path == "-" else open(path, encoding="utf-8-sig", newline="")
+        except OSError as e:
+            raise CommandError(e)
+        try:
+            result = import_rows(read_rows(stream, fmt), options["batch"], options["dry_run"])
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        for line_no, message in result.errors[:MAX_REPORTED_ERRORS]:
+            self.stderr.write(f"строка {line_no}: {message}")
+        if len(result.errors) > MAX_REPORTED_ERRORS:
+            self.stderr.write(f"... и ещё ошибок: {len(result.errors) - MAX_REPORTED_ERRORS}")
+
+        prefix = "Проверено (без записи)" if options["dry_run"] else "Готово"
+        self.stdout.write(
+            f"{prefix}: создано {result.created}, обновлено {result.updated}, "
+            f"ошибок {len(result.errors)}"
+        )
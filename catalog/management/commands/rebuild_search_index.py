@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from catalog import search
+from catalog.models import Watch
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересобирает индекс полнотекстового поиска по каталогу "
+        "(нужно после массовых update()/bulk_create в обход сигналов)."
+    )
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError(
+                "Таблица поиска не найдена: нужен SQLite с FTS5 или PostgreSQL и migrate."
+            )
+        with transaction.atomic():
+            search.index_watches()
+        self.stdout.write(
+            f"Проиндексировано часов: {Watch.objects.filter(is_active=True).count()}"
+        )
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog import telegram
+from catalog.outbox import deliver_pending
+
+
+class Command(BaseCommand):
+    help = "Воркер очереди уведомлений о заказах в Telegram."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Обработать очередь один раз и выйти")
+        parser.add_argument("--batch", type=int, default=20, help="Размер пачки")
+        parser.add_argument("--interval", type=float, default=2.0, help="Пауза, когда очередь пуста (сек)")
+
+    def handle(self, *args, **options):
+        if not telegram.is_configured():
+            raise CommandError("TELEGRAM_BOT_TOKEN / TELEGRAM_CHAT_ID не заданы")
+
+        while True:
+            sent, failed = deliver_pending(options["batch"])
+            if sent or failed:
+                self.stdout.write(f"отправлено: {sent}, ошибок: {failed}")
+            if options["once"]:
+                if sent or failed:
+                    continue
+                return
+            if not (sent or failed):
+                time.sleep(options["interval"])
@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog import telegram
+from catalog.updates import claim_batch, process_batch, purge_processed
+
+PURGE_EVERY = 60 * 60  # сек между чистками старых апдейтов
+
+
+class Command(BaseCommand):
+    help = "Воркер входящих апдейтов бота: по порядку update_id внутри каждого чата."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Обработать очередь один раз и выйти")
+        parser.add_argument("--batch", type=int, default=50, help="Размер пачки")
+        parser.add_argument("--interval", type=float, default=0.5, help="Пауза, когда очередь пуста (сек)")
+        parser.add_argument(
+            "--shard", default="0/1",
+            help="Какие чаты обрабатывать: i/n — chat_id %% n == i (по воркеру на шард)",
+        )
+        parser.add_argument("--keep-days", type=int, default=7, help="Сколько хранить обработанные апдейты")
+
+    def handle(self, *args, **options):
+        try:
+            shard, shards = (int(x) for x in options["shard"].split("/"))
+        except ValueError:
+            raise CommandError("--shard ожидается в виде i/n, например 0/2")
+        if not 0 <= shard < shards:
+            raise CommandError("--shard: нужно 0 <= i < n")
+
+        asyncio.run(self.run(shard, shards, options))
+
+    async def run(self, shard, shards, options):
+        # один event loop на всё время работы — httpx-клиент переиспользуется
+        purged_at = 0.0
+        try:
+            while True:
+                if time.monotonic() - purged_at > PURGE_EVERY:
+                    purged = await sync_to_async(purge_processed)(options["keep_days"])
+                    purged_at = time.monotonic()
+                    if purged:
+                        self.stdout.write(f"удалено старых апдейтов: {purged}")
+
+                entries = await sync_to_async(claim_batch)(options["batch"], shard, shards)
+                if entries:
+                    done, failed = await process_batch(entries)
+                    self.stdout.write(f"обработано: {done}, ошибок: {failed}")
+                    continue
+                if options["once"]:
+                    return
+                await asyncio.sleep(options["interval"])
+        finally:
+            await telegram.aclose_async_client()
@@ -0,0 +1,208 @@
+"""
+Метрики в текстовом формате Prometheus, без внешних зависимостей.
+
+Счётчики живут в памяти процесса. Если задан METRICS_MULTIPROC_DIR,
+каждый процесс (gunicorn-воркер) раз в METRICS_FLUSH_INTERVAL секунд
+сбрасывает свой снимок в <dir>/<pid>.json, а /metrics суммирует все файлы.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = {}
+_lock = threading.Lock()
+_last_flush = 0.0
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, help_text: str, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.values = {}
+        _registry[name] = self
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels[label]) for label in self.labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        _maybe_flush()
+
+    def snapshot(self) -> dict:
+        return {"|".join(key): value for key, value in self.values.items()}
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # ключ -> [счётчики по корзинам (не накопительно)..., +Inf, sum]
+        self.values = {}
+        _registry[name] = self
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels[label]) for label in self.labels)
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with _lock:
+            row = self.values.get(key)
+            if row is None:
+                row = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            row[index] += 1
+            row[-1] += value
+        _maybe_flush()
+
+    def snapshot(self) -> dict:
+        return {"|".join(key): list(row) for key, row in self.values.items()}
+
+
+# =========================
+# Метрики приложения
+# =========================
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Время обработки запроса", ["view"],
+)
+REQUESTS = Counter(
+    "http_requests_total", "Запросы по view и статусу", ["view", "status"],
+)
+DB_QUERIES = Counter(
+    "db_queries_total", "SQL-запросы по view", ["view"],
+)
+ORDERS_CREATED = Counter(
+    "orders_created_total", "Созданные заказы", ["source"],
+)
+TELEGRAM_LATENCY = Histogram(
+    "telegram_api_duration_seconds", "Время вызова Telegram Bot API", ["method"],
+)
+TELEGRAM_ERRORS = Counter(
+    "telegram_api_errors_total", "Ошибки Telegram Bot API", ["method"],
+)
+CART_OPERATIONS = Counter(
+    "cart_operations_total", "Операции с корзиной", ["operation"],
+)
+PAGE_CACHE = Counter(
+    "page_cache_requests_total", "Кэш страниц: hit / miss / bypass", ["page", "result"],
+)
+
+
+# =========================
+# Снимки и несколько процессов
+# =========================
+
+def snapshot() -> dict:
+    with _lock:
+        return {name: metric.snapshot() for name, metric in _registry.items()}
+
+
+def _multiproc_dir():
+    return getattr(settings, "METRICS_MULTIPROC_DIR", None)
+
+
+def flush() -> None:
+    """
+    Записывает снимок процесса в METRICS_MULTIPROC_DIR/<pid>.json.
+    """
+    global _last_flush
+    directory = _multiproc_dir()
+    if not directory:
+        return
+    _last_flush = time.monotonic()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{os.getpid()}.json")
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f)
+    os.replace(tmp, path)
+
+
+def _maybe_flush() -> None:
+    if _multiproc_dir() and time.monotonic() - _last_flush >= settings.METRICS_FLUSH_INTERVAL:
+        flush()
+
+
+atexit.register(flush)
+
+
+def _merge(total: dict, part: dict) -> None:
+    for name, samples in part.items():
+        target = total.setdefault(name, {})
+        for key, value in samples.items():
+            if isinstance(value, list):
+                row = target.setdefault(key, [0] * len(value))
+                for i, v in enumerate(value):
+                    row[i] += v
+            else:
+                target[key] = target.get(key, 0) + value
+
+
+def collect() -> dict:
+    """
+    Снимок этого процесса или, в режиме нескольких процессов, сумма всех.
+    """
+    directory = _multiproc_dir()
+    if not directory:
+        return snapshot()
+
+    flush()
+    total = {}
+    for filename in os.listdir(directory):
+        if not filename.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, filename), encoding="utf-8") as f:
+                _merge(total, json.load(f))
+        except (OSError, ValueError):
+            continue
+    return total
+
+
+# =========================
+# Текстовый формат
+# =========================
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, key: str, extra=()) -> str:
+    values = key.split("|") if names else []
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    pairs += [f'{n}="{v}"' for n, v in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def render() -> str:
+    data = collect()
+    lines = []
+    for name, metric in _registry.items():
+        lines.append(f"# HELP {name} {metric.help}")
+        lines.append(f"# TYPE {name} {metric.type}")
+        for key, value in sorted(data.get(name, {}).items()):
+            if metric.type == "counter":
+                lines.append(f"{name}{_labels(metric.labels, key)} {value}")
+                continue
+            cumulative = 0
+            for bound, count in zip(metric.buckets + ("+Inf",), value[:-1]):
+                cumulative += count
+                lines.append(
+                    f"{name}_bucket{_labels(metric.labels, key, [('le', bound)])} {cumulative}"
+                )
+            lines.append(f"{name}_sum{_labels(metric.labels, key)} {value[-1]}")
+            lines.append(f"{name}_count{_labels(metric.labels, key)} {cumulative}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,154 @@
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connection
+
+from . import metrics
+from .cart_storage import get_cart_storage
+from .instrumentation import collect
+
+timing_logger = logging.getLogger("catalog.timing")
+
+
+class AsyncCapableMiddleware:
+    """
+    Основа для middleware, которые работают и под WSGI, и под ASGI
+    без лишнего перехода между потоком и event loop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+
+class AsgiUrlconfMiddleware(AsyncCapableMiddleware):
+    """
+    Под ASGI подменяет urlconf на settings.ASGI_URLCONF, где API каталога
+    и webhook — async-вьюхи. Под WSGI ничего не делает.
+    """
+
+    def __call__(self, request):
+        if isinstance(request, ASGIRequest):
+            request.urlconf = settings.ASGI_URLCONF
+        return self.get_response(request)
+
+
+class CartMiddleware(AsyncCapableMiddleware):
+    """
+    Даёт хранилищу корзины записать cookie в ответ
+    (SignedCookieCartStorage / CacheCartStorage).
+    """
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        response = self.get_response(request)
+        return get_cart_storage().process_response(request, response)
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        return get_cart_storage().process_response(request, response)
+
+
+class RequestTimingMiddleware:
+    """
+    Опциональный (REQUEST_TIMING=1) замер запроса: число и время SQL,
+    рендер шаблонов, вызовы Telegram. Пишет Server-Timing и строку лога;
+    медленные запросы дополнительно логируют свои самые долгие SQL.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with collect(settings.REQUEST_TIMING_SLOW_SQL) as metrics:
+            with connection.execute_wrapper(metrics):
+                response = self.get_response(request)
+        end = time.perf_counter()
+        total = end - start
+        view_time = end - getattr(request, "_timing_view_start", end)
+
+        tpl_time, _ = metrics.spans.get("tpl", (0.0, 0))
+        tg_time, tg_calls = metrics.spans.get("tg", (0.0, 0))
+        response["Server-Timing"] = ", ".join([
+            f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} SQL"',
+            f"view;dur={view_time * 1000:.1f}",
+            f"tpl;dur={tpl_time * 1000:.1f}",
+            f'tg;dur={tg_time * 1000:.1f};desc="{tg_calls} calls"',
+            f"total;dur={total * 1000:.1f}",
+        ])
+
+        fields = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(total * 1000, 1),
+            "db_ms": round(metrics.db_time * 1000, 1),
+            "queries": metrics.queries,
+            "view_ms": round(view_time * 1000, 1),
+            "tpl_ms": round(tpl_time * 1000, 1),
+            "tg_ms": round(tg_time * 1000, 1),
+            "tg_calls": tg_calls,
+        }
+        if total * 1000 >= settings.REQUEST_TIMING_SLOW_MS:
+            fields["slow_sql"] = [
+                {"ms": round(spent * 1000, 1), "sql": sql[:500]}
+                for spent, sql in metrics.slowest_queries()
+            ]
+            timing_logger.warning(json.dumps(fields, ensure_ascii=False))
+        else:
+            timing_logger.info(json.dumps(fields, ensure_ascii=False))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._timing_view_start = time.perf_counter()
+
+
+class MetricsMiddleware(AsyncCapableMiddleware):
+    """
+    Prometheus-метрики запроса: время и статус по имени URL, число SQL.
+    Под ASGI SQL идут в других потоках, поэтому считаются только время и статус.
+    """
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        counter = _QueryCounter()
+        start = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        self.observe(request, response, time.perf_counter() - start, counter.count)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, response, time.perf_counter() - start, 0)
+        return response
+
+    @staticmethod
+    def observe(request, response, spent, queries):
+        match = getattr(request, "resolver_match", None)
+        view = (match.url_name if match else None) or "unmatched"
+        metrics.REQUEST_LATENCY.observe(spent, view=view)
+        metrics.REQUESTS.inc(view=view, status=response.status_code)
+        if queries:
+            metrics.DB_QUERIES.inc(queries, view=view)
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
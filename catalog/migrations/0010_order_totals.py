@@ -0,0 +1,45 @@
+# Generated by Django 6.0 on 2026-10-18 11:40
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_totals(apps, schema_editor):
+    Order = apps.get_model("catalog", "Order")
+    OrderItem = apps.get_model("catalog", "OrderItem")
+
+    items = OrderItem.objects.filter(order=models.OuterRef("pk")).values("order")
+    total = items.annotate(
+        s=models.Sum(
+            models.F("price") * models.F("quantity"),
+            output_field=models.DecimalField(max_digits=14, decimal_places=2),
+        )
+    ).values("s")
+    count = items.annotate(c=models.Sum("quantity")).values("c")
+    Order.objects.update(
+        total_amount=Coalesce(models.Subquery(total), models.Value(Decimal("0"))),
+        items_count=Coalesce(models.Subquery(count), models.Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0009_telegramoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='items_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Товаров, шт.'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='total_amount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Сумма'),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 13:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0012_watch_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='watch',
+            name='telegram_file_id',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='watch',
+            name='telegram_file_source',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+    ]
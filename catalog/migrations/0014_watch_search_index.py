@@ -0,0 +1,26 @@
+# Generated by Django 6.0 on 2026-10-18 15:10
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from catalog.search import create_index
+
+    create_index(schema_editor)
+
+
+def drop_search_index(apps, schema_editor):
+    from catalog.search import drop_index
+
+    drop_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0013_watch_telegram_file_id'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
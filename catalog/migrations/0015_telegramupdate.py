@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-18 19:19
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0014_watch_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TelegramUpdate',
+            fields=[
+                ('update_id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='update_id')),
+                ('chat_id', models.BigIntegerField(blank=True, null=True, verbose_name='Чат')),
+                ('payload', models.JSONField(verbose_name='Апдейт')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает обработки'), ('done', 'Обработан'), ('failed', 'Ошибка')], default='pending', max_length=20, verbose_name='Статус')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Попыток')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Следующая попытка')),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+                ('received_at', models.DateTimeField(auto_now_add=True, verbose_name='Получен')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Обработан')),
+            ],
+            options={
+                'verbose_name': 'Апдейт Telegram',
+                'verbose_name_plural': 'Апдейты Telegram',
+                'indexes': [models.Index(condition=models.Q(('status', 'pending')), fields=['update_id'], name='tg_update_pending_idx'), models.Index(fields=['status', 'processed_at'], name='tg_update_processed_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 6.0 on 2026-10-18 19:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0015_telegramupdate'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('location', models.CharField(max_length=255, verbose_name='Локация (адрес текстом)')),
+                ('latitude', models.FloatField(blank=True, null=True, verbose_name='Широта')),
+                ('longitude', models.FloatField(blank=True, null=True, verbose_name='Долгота')),
+                ('phone', models.CharField(max_length=32, verbose_name='Телефон')),
+                ('status', models.CharField(choices=[('new', 'Новый'), ('waiting', 'В ожидании подтверждения'), ('delivered', 'Доставлен'), ('canceled', 'Отменён')], default='waiting', max_length=20, verbose_name='Статус')),
+                ('uzum_payment_id', models.CharField(blank=True, max_length=100, verbose_name='ID оплаты Uzum')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Сумма')),
+                ('items_count', models.PositiveIntegerField(default=0, verbose_name='Товаров, шт.')),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='Номер заказа')),
+                ('created_at', models.DateTimeField(verbose_name='Создан')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='В архиве с')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Заказ (архив)',
+                'verbose_name_plural': 'Заказы (архив)',
+                'ordering': ['-created_at'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(default=1, verbose_name='Количество')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Цена за единицу')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='catalog.archivedorder', verbose_name='Заказ')),
+                ('watch', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='catalog.watch', verbose_name='Часы')),
+            ],
+            options={
+                'verbose_name': 'Позиция заказа (архив)',
+                'verbose_name_plural': 'Позиции заказа (архив)',
+                'abstract': False,
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['user', '-created_at'], name='arch_order_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['created_at', 'id'], name='arch_order_created_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 19:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0016_archived_orders'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='telegramupdate',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['chat_id', 'update_id'], name='tg_update_pending_chat_idx'),
+        ),
+    ]
@@ -1,7 +1,11 @@
+from decimal import Decimal
+
 from django.db import models
 from django.contrib.auth.models import User
+from django.db.models.functions import Coalesce
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
 
 
 class Watch(models.Model):
@@ -42,6 +46,20 @@ class Watch(models.Model):
         null=True,
     )
 
+    # Уменьшенные копии фото (см. catalog/images.py):
+    # {"source": <имя оригинала>, "webp": {"320": <имя файла>, ...}, "jpeg": {...}}
+    image_derivatives = models.JSONField(
+        "Превью фото",
+        default=dict,
+        blank=True,
+        editable=False,
+    )
+
+    # file_id фото в Telegram, чтобы не загружать его заново к каждому заказу.
+    # Действителен, только пока telegram_file_source совпадает с image.name.
+    telegram_file_id = models.CharField(max_length=255, blank=True, editable=False)
+    telegram_file_source = models.CharField(max_length=255, blank=True, editable=False)
+
     is_active = models.BooleanField(
         "Показывать на сайте",
         default=True,
@@ -69,6 +87,24 @@ class Watch(models.Model):
         ordering = ["sort_order", "id"]
         verbose_name = "Часы"
         verbose_name_plural = "Часы"
+        # под выборки API: активные/featured/hero в порядке sort_order, id
+        indexes = [
+            models.Index(
+                fields=["sort_order", "id"],
+                condition=models.Q(is_active=True),
+                name="watch_active_sort_idx",
+            ),
+            models.Index(
+                fields=["sort_order", "id"],
+                condition=models.Q(is_active=True, is_featured=True),
+                name="watch_featured_sort_idx",
+            ),
+            models.Index(
+                fields=["sort_order", "id"],
+                condition=models.Q(is_active=True, is_hero=True),
+                name="watch_hero_sort_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -112,7 +148,11 @@ from django.db import models
 from django.contrib.auth.models import User
 
 
-class Order(models.Model):
+class OrderBase(models.Model):
+    """
+    Общие поля заказа: рабочая таблица Order и архив ArchivedOrder
+    (завершённые заказы старше ORDER_ARCHIVE_AFTER_DAYS, см. catalog/archive.py).
+    """
     STATUS_CHOICES = [
         ("new", "Новый"),                          # только что оформлен
         ("waiting", "В ожидании подтверждения"),   # ждёт решения в Telegram
@@ -149,29 +189,55 @@ class Order(models.Model):
         blank=True,
     )
 
+    # Денормализованы: пересчитываются при записи позиций (refresh_totals),
+    # чтобы списки заказов не делали запрос на каждый заказ.
+    total_amount = models.DecimalField(
+        "Сумма",
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+    )
+    items_count = models.PositiveIntegerField("Товаров, шт.", default=0)
+
     class Meta:
+        abstract = True
         ordering = ["-created_at"]
-        verbose_name = "Заказ"
-        verbose_name_plural = "Заказы"
 
     def __str__(self):
         return f"Заказ #{self.id} ({self.get_status_display()})"
 
-    @property
-    def total_amount(self):
+
+class Order(OrderBase):
+    class Meta(OrderBase.Meta):
+        verbose_name = "Заказ"
+        verbose_name_plural = "Заказы"
+        indexes = [
+            # история заказов в аккаунте
+            models.Index(fields=["user", "-created_at"], name="order_user_created_idx"),
+            # отчёты /orders: диапазон по created_at
+            models.Index(fields=["created_at", "id"], name="order_created_idx"),
+        ]
+
+    @staticmethod
+    def refresh_totals(order_ids):
         """
-        Общая сумма заказа.
+        Пересчитывает total_amount и items_count по позициям одним UPDATE.
         """
-        return sum(item.total_price for item in self.items.all())
-
-
-class OrderItem(models.Model):
-    order = models.ForeignKey(
-        Order,
-        related_name="items",
-        on_delete=models.CASCADE,
-        verbose_name="Заказ",
-    )
+        items = OrderItem.objects.filter(order=models.OuterRef("pk")).values("order")
+        total = items.annotate(
+            s=models.Sum(
+                models.F("price") * models.F("quantity"),
+                output_field=models.DecimalField(max_digits=14, decimal_places=2),
+            )
+        ).values("s")
+        count = items.annotate(c=models.Sum("quantity")).values("c")
+        Order.objects.filter(pk__in=order_ids).update(
+            total_amount=Coalesce(models.Subquery(total), models.Value(Decimal("0"))),
+            items_count=Coalesce(models.Subquery(count), models.Value(0)),
+        )
+
+
+class OrderItemBase(models.Model):
     watch = models.ForeignKey(
         Watch,
         on_delete=models.PROTECT,
@@ -185,8 +251,7 @@ class OrderItem(models.Model):
     )
 
     class Meta:
-        verbose_name = "Позиция заказа"
-        verbose_name_plural = "Позиции заказа"
+        abstract = True
 
     def __str__(self):
         return f"{self.watch.name} x {self.quantity}"
@@ -197,3 +262,139 @@ class OrderItem(models.Model):
         Сумма по позиции.
         """
         return self.price * self.quantity
+
+
+class OrderItem(OrderItemBase):
+    order = models.ForeignKey(
+        Order,
+        related_name="items",
+        on_delete=models.CASCADE,
+        verbose_name="Заказ",
+    )
+
+    class Meta(OrderItemBase.Meta):
+        verbose_name = "Позиция заказа"
+        verbose_name_plural = "Позиции заказа"
+
+
+class ArchivedOrder(OrderBase):
+    """
+    Архив завершённых заказов. id тот же, что был у Order (номера заказов
+    не меняются), created_at переносится как есть.
+    """
+    id = models.BigIntegerField("Номер заказа", primary_key=True)
+    created_at = models.DateTimeField("Создан")
+    archived_at = models.DateTimeField("В архиве с", auto_now_add=True)
+
+    class Meta(OrderBase.Meta):
+        verbose_name = "Заказ (архив)"
+        verbose_name_plural = "Заказы (архив)"
+        indexes = [
+            models.Index(fields=["user", "-created_at"], name="arch_order_user_created_idx"),
+            models.Index(fields=["created_at", "id"], name="arch_order_created_idx"),
+        ]
+
+
+class ArchivedOrderItem(OrderItemBase):
+    order = models.ForeignKey(
+        ArchivedOrder,
+        related_name="items",
+        on_delete=models.CASCADE,
+        verbose_name="Заказ",
+    )
+
+    class Meta(OrderItemBase.Meta):
+        verbose_name = "Позиция заказа (архив)"
+        verbose_name_plural = "Позиции заказа (архив)"
+
+
+class TelegramOutbox(models.Model):
+    """
+    Очередь уведомлений о заказах. Пишется в одной транзакции с заказом,
+    отправляется воркером `manage.py telegram_outbox`.
+    """
+    STATUS_CHOICES = [
+        ("pending", "Ожидает отправки"),
+        ("sent", "Отправлено"),
+        ("failed", "Не удалось отправить"),
+    ]
+
+    order = models.ForeignKey(
+        Order,
+        related_name="telegram_notifications",
+        on_delete=models.CASCADE,
+        verbose_name="Заказ",
+    )
+    status = models.CharField(
+        "Статус",
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default="pending",
+    )
+    attempts = models.PositiveIntegerField("Попыток", default=0)
+    next_attempt_at = models.DateTimeField("Следующая попытка", default=timezone.now)
+    # id главного сообщения: при повторе не отправляем текст заказа второй раз
+    message_id = models.BigIntegerField("ID сообщения в Telegram", null=True, blank=True)
+    last_error = models.TextField("Последняя ошибка", blank=True)
+    created_at = models.DateTimeField("Создано", auto_now_add=True)
+    sent_at = models.DateTimeField("Отправлено", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Уведомление в Telegram"
+        verbose_name_plural = "Уведомления в Telegram"
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="outbox_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"Уведомление по заказу #{self.order_id} ({self.get_status_display()})"
+
+
+class TelegramUpdate(models.Model):
+    """
+    Входящий апдейт бота. Webhook только сохраняет его (повтор того же
+    update_id отбрасывается на вставке) и сразу отвечает 200; обрабатывает
+    воркер `manage.py telegram_updates` по порядку update_id внутри чата.
+    """
+    STATUS_CHOICES = [
+        ("pending", "Ожидает обработки"),
+        ("done", "Обработан"),
+        ("failed", "Ошибка"),
+    ]
+
+    update_id = models.BigIntegerField("update_id", primary_key=True)
+    chat_id = models.BigIntegerField("Чат", null=True, blank=True)
+    payload = models.JSONField("Апдейт")
+    status = models.CharField(
+        "Статус",
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default="pending",
+    )
+    attempts = models.PositiveIntegerField("Попыток", default=0)
+    next_attempt_at = models.DateTimeField("Следующая попытка", default=timezone.now)
+    last_error = models.TextField("Последняя ошибка", blank=True)
+    received_at = models.DateTimeField("Получен", auto_now_add=True)
+    processed_at = models.DateTimeField("Обработан", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Апдейт Telegram"
+        verbose_name_plural = "Апдейты Telegram"
+        indexes = [
+            models.Index(
+                fields=["update_id"],
+                condition=models.Q(status="pending"),
+                name="tg_update_pending_idx",
+            ),
+            # claim_batch: есть ли у чата более ранний ожидающий апдейт
+            models.Index(
+                fields=["chat_id", "update_id"],
+                condition=models.Q(status="pending"),
+                name="tg_update_pending_chat_idx",
+            ),
+            models.Index(fields=["status", "processed_at"], name="tg_update_processed_idx"),
+        ]
+
+    def __str__(self):
+        return f"Апдейт {self.update_id} ({self.get_status_display()})"
+
@@ -0,0 +1,215 @@
+"""
+Выгрузка заказов с позициями для бухгалтерии (CSV / NDJSON) — для
+/orders/export/ и команды export_orders.
+
+Заказы (рабочие и архивные) идут по (created_at, id) чанками по
+ORDER_EXPORT_CHUNK_SIZE: следующий чанк — по ключу последнего заказа
+(keyset, индексы order_created_idx / arch_order_created_idx), без OFFSET,
+так что каждый чанк стоит одинаково.
+Позиции с названиями часов подгружаются одной выборкой на чанк. В памяти только
+текущий чанк, первые байты уходят сразу после первой выборки.
+
+CSV — строка на позицию (поля заказа повторяются; заказ без позиций —
+одна строка с пустыми полями позиции; текст, похожий на формулу,
+экранирован апострофом). NDJSON — объект на заказ с массивом items.
+"""
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+
+FORMATS = ("csv", "ndjson")
+
+ORDER_FIELDS = [
+    "order_id", "created_at", "status", "user", "phone", "location",
+    "latitude", "longitude", "total_amount", "items_count",
+]
+ITEM_FIELDS = ["watch_id", "watch_name", "quantity", "price", "item_total"]
+CSV_HEADER = ORDER_FIELDS + [
+    "item_watch_id", "item_watch_name", "item_quantity", "item_price", "item_total",
+]
+
+
+def parse_range(date_from: str, date_to: str) -> tuple:
+    """
+    "YYYY-MM-DD" (обе границы включительно, пустая — без границы) ->
+    (начало, конец) как aware datetime, конец не включительно.
+    Некорректная дата — ValueError.
+    """
+    bounds = []
+    for name, raw, shift in (("from", date_from, 0), ("to", date_to, 1)):
+        raw = (raw or "").strip()
+        if not raw:
+            bounds.append(None)
+            continue
+        try:
+            day = parse_date(raw)
+        except ValueError:
+            day = None
+        if day is None:
+            raise ValueError(f"Invalid {name}")
+        bounds.append(timezone.make_aware(datetime.combine(day + timedelta(days=shift), time.min)))
+    return tuple(bounds)
+
+
+def _querysets(start, end) -> list:
+    """
+    [(выборка заказов, модель позиций)] — рабочие таблицы и архив
+    (catalog/archive.py): выгрузка видит заказ, где бы он ни лежал.
+    """
+    result = []
+    for model, item_model in ((Order, OrderItem), (ArchivedOrder, ArchivedOrderItem)):
+        qs = model.objects.all()
+        if start is not None:
+            qs = qs.filter(created_at__gte=start)
+        if end is not None:
+            qs = qs.filter(created_at__lt=end)
+        result.append((
+            qs.order_by("created_at", "id").values_list(
+                "id", "created_at", "status", "user__username", "phone", "location",
+                "latitude", "longitude", "total_amount", "items_count",
+            ),
+            item_model,
+        ))
+    return result
+
+
+def _fetch_chunk(querysets, after, size: int) -> list:
+    """
+    Следующие size заказов после ключа after = (created_at, id):
+    [(строка заказа, [строки позиций]), ...]. Из каждой таблицы берётся
+    по size заказов после ключа (keyset по индексам *_created_idx), они
+    сливаются по (created_at, id) — по два запроса на таблицу.
+    Кортежи, а не модели: на миллионах строк создание объектов
+    и prefetch_related на каждый заказ стоят дороже самих запросов.
+    """
+    # Архив читается вторым: заказ, перенесённый между двумя выборками,
+    # попадёт в обе, но не потеряется; дубль отбрасывается по id.
+    candidates = {}
+    for qs, item_model in querysets:
+        if after is not None:
+            created_at, order_id = after
+            # (created_at, id) > after; отдельное created_at >= даёт индексу
+            # начало диапазона, иначе SQLite сканирует индекс с самого начала
+            qs = qs.filter(
+                Q(created_at__gte=created_at) & (Q(created_at__gt=created_at) | Q(id__gt=order_id))
+            )
+        for row in qs[:size]:
+            candidates[row[0]] = (row, item_model)
+    chosen = sorted(candidates.values(), key=lambda c: (c[0][1], c[0][0]))[:size]
+
+    items = {}
+    for _, item_model in querysets:
+        ids = [row[0] for row, model in chosen if model is item_model]
+        if not ids:
+            continue
+        for order_id, *item in (
+            item_model.objects.filter(order_id__in=ids)
+            .order_by("id")
+            .values_list("order_id", "watch_id", "watch__name", "quantity", "price")
+        ):
+            items.setdefault(order_id, []).append(item)
+    return [(row, items.get(row[0], [])) for row, _ in chosen]
+
+
+def _order_values(row: tuple) -> list:
+    order_id, created_at, status, username, *rest, total_amount, items_count = row
+    return [
+        order_id,
+        timezone.localtime(created_at).isoformat(),
+        status,
+        username or "",
+        *rest,
+        str(total_amount),
+        items_count,
+    ]
+
+
+def _item_values(item: list) -> list:
+    watch_id, watch_name, quantity, price = item
+    return [watch_id, watch_name, quantity, str(price), str(price * quantity)]
+
+
+# С этих символов Excel/LibreOffice начинают формулу; адрес и телефон
+# вводит покупатель, так что в CSV такие ячейки идут с апострофом.
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_safe(values: list) -> list:
+    return [
+        "'" + value if isinstance(value, str) and value.startswith(FORMULA_PREFIXES) else value
+        for value in values
+    ]
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _format_chunk(orders: list, fmt: str) -> str:
+    if fmt == "ndjson":
+        return "".join(
+            json.dumps({
+                **dict(zip(ORDER_FIELDS, _order_values(order))),
+                "items": [dict(zip(ITEM_FIELDS, _item_values(item))) for item in items],
+            }, ensure_ascii=False) + "\n"
+            for order, items in orders
+        )
+
+    writer = csv.writer(_Echo(), lineterminator="\n")
+    lines = []
+    for order, items in orders:
+        values = _csv_safe(_order_values(order))
+        if not items:
+            lines.append(writer.writerow(values + [""] * len(ITEM_FIELDS)))
+        for item in items:
+            lines.append(writer.writerow(values + _csv_safe(_item_values(item))))
+    return "".join(lines)
+
+
+def _header() -> str:
+    return csv.writer(_Echo(), lineterminator="\n").writerow(CSV_HEADER)
+
+
+def export_chunks(start=None, end=None, fmt: str = "csv", chunk_size: int = None):
+    """
+    Генератор кусков файла (по куску на чанк заказов) — для записи в файл
+    и StreamingHttpResponse под WSGI.
+    """
+    chunk_size = chunk_size or settings.ORDER_EXPORT_CHUNK_SIZE
+    querysets = _querysets(start, end)
+    if fmt == "csv":
+        yield _header()
+    after = None
+    while True:
+        orders = _fetch_chunk(querysets, after, chunk_size)
+        if not orders:
+            return
+        yield _format_chunk(orders, fmt)
+        after = (orders[-1][0][1], orders[-1][0][0])
+
+
+async def aexport_chunks(start=None, end=None, fmt: str = "csv", chunk_size: int = None):
+    """
+    То же для ASGI: синхронный итератор Django под ASGI сначала собрал бы
+    в список целиком, поэтому здесь async-генератор с выборкой в потоке.
+    """
+    chunk_size = chunk_size or settings.ORDER_EXPORT_CHUNK_SIZE
+    querysets = _querysets(start, end)
+    if fmt == "csv":
+        yield _header()
+    after = None
+    while True:
+        orders = await sync_to_async(_fetch_chunk)(querysets, after, chunk_size)
+        if not orders:
+            return
+        yield _format_chunk(orders, fmt)  # всё уже выбрано, без запросов
+        after = (orders[-1][0][1], orders[-1][0][0])
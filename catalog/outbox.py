@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import telegram
+from .models import TelegramOutbox
+
+
+def enqueue_order_notification(order) -> TelegramOutbox:
+    """
+    Ставит уведомление о заказе в очередь. Вызывать в той же транзакции,
+    что и создание заказа: уведомление появится только вместе с заказом.
+    """
+    return TelegramOutbox.objects.create(order=order)
+
+
+def backoff(attempts: int) -> timedelta:
+    """
+    Экспоненциальная задержка перед следующей попыткой.
+    """
+    seconds = settings.TELEGRAM_OUTBOX_BACKOFF * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(seconds, settings.TELEGRAM_OUTBOX_BACKOFF_MAX))
+
+
+def claim_batch(limit: int) -> list:
+    """
+    Забирает пачку готовых к отправке записей и продлевает им
+    next_attempt_at на время аренды, чтобы параллельный воркер их не взял.
+    Если воркер упадёт, записи вернутся в очередь после окончания аренды.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        entries = list(
+            TelegramOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:limit]
+        )
+        ids = [e.id for e in entries]
+        TelegramOutbox.objects.filter(id__in=ids).update(
+            next_attempt_at=now + timedelta(seconds=settings.TELEGRAM_OUTBOX_LEASE),
+        )
+    return entries
+
+
+def deliver(entry: TelegramOutbox) -> bool:
+    """
+    Одна попытка отправки. True — доставлено.
+    message_id главного сообщения сохраняем сразу, чтобы повтор после
+    ошибки на фото не дублировал текст заказа.
+    """
+    entry.attempts += 1
+    try:
+        if entry.message_id is None:
+            entry.message_id = telegram.send_order_message(entry.order)
+            entry.save(update_fields=["message_id"])
+        telegram.send_order_photos(entry.order, reply_to_message_id=entry.message_id)
+    except Exception as e:
+        entry.last_error = f"{type(e).__name__}: {e}"
+        if entry.attempts >= settings.TELEGRAM_OUTBOX_MAX_ATTEMPTS:
+            entry.status = "failed"
+        else:
+            entry.next_attempt_at = timezone.now() + backoff(entry.attempts)
+        entry.save(update_fields=["attempts", "last_error", "status", "next_attempt_at"])
+        return False
+
+    entry.status = "sent"
+    entry.sent_at = timezone.now()
+    entry.last_error = ""
+    entry.save(update_fields=["attempts", "last_error", "status", "sent_at"])
+    return True
+
+
+def deliver_pending(limit: int = 20) -> tuple:
+    """
+    Отправляет одну пачку. Возвращает (доставлено, ошибок).
+    """
+    sent = failed = 0
+    for entry in claim_batch(limit):
+        if deliver(entry):
+            sent += 1
+        else:
+            failed += 1
+    return sent, failed
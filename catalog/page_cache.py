@@ -0,0 +1,151 @@
+"""
+Кэш целых страниц витрины (пока — пустая корзина, cart.html).
+
+В кэше лежит анонимный рендер страницы на версию каталога (та же
+инвалидация, что у API: любое изменение Watch). Всё, что зависит от
+посетителя, шаблон выводит тегом {% page_fragment "<имя>" %}
+(catalog/templatetags/page_cache.py): при рендере для кэша это метка
+<!--page-cache:<имя>-->, которую при каждом ответе заменяет свежий
+фрагмент из FRAGMENTS. Попадание в кэш — без шаблонов и без ORM;
+анонимному посетителю без сессии — без единого SQL.
+
+{% csrf_token %} в кэшируемых шаблонах не годится (токен у каждого свой) —
+нужен {% page_fragment "csrf_token" %}. Если рендер всё же взял токен,
+страница отдаётся, но не кэшируется.
+
+cached_page вешается только на вьюхи, шаблоны которых уже переведены
+на page_fragment: {{ user }} и прочее посетительское в непереведённом
+шаблоне попало бы в кэш в анонимном виде и ушло всем.
+"""
+import copy
+import hashlib
+import logging
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.urls import reverse
+from django.utils.cache import patch_vary_headers
+from django.utils.html import format_html
+
+from . import metrics
+from .cache import catalog_key
+from .cart import Cart
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER = "<!--page-cache:{}-->"
+
+# имя фрагмента -> функция(request) -> html
+FRAGMENTS = {}
+
+
+def fragment(name: str):
+    def register(func):
+        FRAGMENTS[name] = func
+        return func
+    return register
+
+
+@fragment("auth")
+def _auth_fragment(request) -> str:
+    # без шаблона: фрагмент собирается на каждом ответе
+    if request.user.is_authenticated:
+        return format_html(
+            '<span class="mono" style="margin-right: 16px">{}</span> <a href="{}">Выйти</a>',
+            request.user.username, reverse("logout"),
+        )
+    return format_html(
+        '<a href="{}">Войти</a> <a href="{}">Регистрация</a>',
+        reverse("login"), reverse("signup"),
+    )
+
+
+@fragment("cart_count")
+def _cart_count_fragment(request) -> str:
+    return str(len(Cart(request)))
+
+
+@fragment("csrf_token")
+def _csrf_token_fragment(request) -> str:
+    return format_html('<input type="hidden" name="csrfmiddlewaretoken" value="{}">', get_token(request))
+
+
+def is_cache_render(request) -> bool:
+    """
+    True, если страница сейчас рендерится для кэша (тогда теги выводят метки).
+    """
+    return getattr(request, "_page_cache_render", False)
+
+
+def _render_request(request):
+    """
+    Копия запроса для анонимного рендера: без пользователя и сообщений,
+    со своим META, чтобы get_token() копии был виден отдельно.
+    """
+    render_request = copy.copy(request)
+    render_request.META = request.META.copy()
+    render_request.user = AnonymousUser()
+    render_request._messages = []
+    render_request._page_cache_render = True
+    return render_request
+
+
+def _substitute(body: bytes, request) -> bytes:
+    for name, render in FRAGMENTS.items():
+        marker = PLACEHOLDER.format(name).encode()
+        if marker in body:
+            body = body.replace(marker, render(request).encode("utf-8"))
+    return body
+
+
+def cached_page(name: str, cacheable=None):
+    """
+    Декоратор вьюхи страницы. cacheable(request) -> False — запрос мимо
+    кэша (например, непустая корзина). Кэшируются только GET/HEAD с ответом 200.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (
+                not getattr(settings, "PAGE_CACHE", True)
+                or request.method not in ("GET", "HEAD")
+                or (cacheable is not None and not cacheable(request))
+            ):
+                metrics.PAGE_CACHE.inc(page=name, result="bypass")
+                return view(request, *args, **kwargs)
+
+            path = hashlib.md5(request.get_full_path().encode("utf-8")).hexdigest()[:16]
+            key = catalog_key(f"page:{name}:{path}")
+            cached = cache.get(key)
+            if cached is not None:
+                metrics.PAGE_CACHE.inc(page=name, result="hit")
+                body, content_type = cached
+            else:
+                metrics.PAGE_CACHE.inc(page=name, result="miss")
+                render_request = _render_request(request)
+                response = view(render_request, *args, **kwargs)
+                if response.status_code != 200 or response.streaming:
+                    return response
+                body, content_type = response.content, response["Content-Type"]
+
+                if render_request.META.get("CSRF_COOKIE_NEEDS_UPDATE"):
+                    # шаблон взял {% csrf_token %} напрямую: токен уже в html,
+                    # cookie с ним должна уйти этому посетителю
+                    logger.warning("page %s uses {%% csrf_token %%}, not cached", name)
+                    request.META["CSRF_COOKIE"] = render_request.META["CSRF_COOKIE"]
+                    request.META["CSRF_COOKIE_NEEDS_UPDATE"] = True
+                else:
+                    cache.set(key, (body, content_type), settings.CATALOG_CACHE_TIMEOUT)
+
+            response = HttpResponse(_substitute(body, request), content_type=content_type)
+            # тело зависит от сессии/корзины/CSRF — общим кэшам его не делить
+            patch_vary_headers(response, ("Cookie",))
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,127 @@
+from datetime import timedelta
+from math import ceil
+
+from django.conf import settings
+from django.db.models import Count, DecimalField, F, Prefetch, Sum
+from django.utils import timezone
+
+from .models import Order, OrderItem
+
+PERIODS = {
+    "hour": (timedelta(hours=1), "🕐 Заказы за последний час"),
+    "day": (timedelta(days=1), "📅 Заказы за последний день"),
+    "week": (timedelta(days=7), "🗓 Заказы за последнюю неделю"),
+}
+
+TOP_WATCHES = 5
+
+# лимит Telegram на длину сообщения
+MESSAGE_LIMIT = 4096
+
+
+def order_report(period: str, page: int = 1) -> dict:
+    """
+    Сводка по заказам за период. Все агрегаты считаются в БД, без лимита
+    на количество заказов; в Python приходит только текущая страница списка.
+    """
+    if period not in PERIODS:
+        period = "week"
+    delta, title = PERIODS[period]
+    since = timezone.now() - delta
+
+    orders = Order.objects.filter(created_at__gte=since)
+    summary = orders.aggregate(
+        count=Count("id"),
+        revenue=Sum("total_amount"),
+        units=Sum("items_count"),
+    )
+    statuses = dict(
+        orders.order_by().values_list("status").annotate(n=Count("id"))
+    )
+    top = list(
+        # подзапрос по id, а не JOIN: так план идёт от order_created_idx
+        OrderItem.objects.filter(order__in=orders.values("id"))
+        .values("watch_id", "watch__name")
+        .annotate(
+            units=Sum("quantity"),
+            revenue=Sum(
+                F("price") * F("quantity"),
+                output_field=DecimalField(max_digits=14, decimal_places=2),
+            ),
+        )
+        .order_by("-units", "watch_id")[:TOP_WATCHES]
+    )
+
+    per_page = settings.ORDER_REPORT_PAGE_SIZE
+    pages = max(1, ceil(summary["count"] / per_page))
+    page = min(max(1, page), pages)
+    detail = list(
+        orders.order_by("-created_at", "-id")
+        .prefetch_related(Prefetch("items", queryset=OrderItem.objects.select_related("watch")))
+        [(page - 1) * per_page:page * per_page]
+    )
+
+    return {
+        "period": period,
+        "title": title,
+        "count": summary["count"],
+        "revenue": summary["revenue"] or 0,
+        "units": summary["units"] or 0,
+        "statuses": [
+            (label, statuses[code]) for code, label in Order.STATUS_CHOICES if code in statuses
+        ],
+        "top": top,
+        "page": page,
+        "pages": pages,
+        "orders": detail,
+    }
+
+
+def format_report(report: dict) -> str:
+    if not report["count"]:
+        return f"{report['title']}\n\nНет заказов."
+
+    lines = [
+        report["title"],
+        "",
+        f"Заказов: {report['count']} · Выручка: {report['revenue']} сум · Товаров: {report['units']} шт.",
+        "По статусам: " + ", ".join(f"{label} — {n}" for label, n in report["statuses"]),
+        "",
+        "Топ моделей:",
+    ]
+    for i, row in enumerate(report["top"], 1):
+        lines.append(f"{i}. {row['watch__name']} — {row['units']} шт. ({row['revenue']} сум)")
+
+    lines.append("")
+    lines.append(f"Заказы (стр. {report['page']}/{report['pages']}):")
+    for o in report["orders"]:
+        goods = [f"{it.watch.name} ({it.quantity})" for it in o.items.all()]
+        goods_text = ", ".join(goods) if goods else "—"
+        lines.append(
+            f"#{o.id} | {o.created_at:%d.%m %H:%M} | "
+            f"{o.get_status_display()} | {o.total_amount} сум | "
+            f"{o.phone} | Товары: {goods_text}"
+        )
+
+    text = "\n".join(lines)
+    if len(text) > MESSAGE_LIMIT:
+        text = text[:MESSAGE_LIMIT - 1] + "…"
+    return text
+
+
+def report_keyboard(report: dict) -> dict:
+    """
+    Кнопки листания списка заказов: orders:<period>:<page>.
+    """
+    buttons = []
+    if report["page"] > 1:
+        buttons.append({
+            "text": "← Новее",
+            "callback_data": f"orders:{report['period']}:{report['page'] - 1}",
+        })
+    if report["page"] < report["pages"]:
+        buttons.append({
+            "text": "Старее →",
+            "callback_data": f"orders:{report['period']}:{report['page'] + 1}",
+        })
+    return {"inline_keyboard": [buttons] if buttons else []}
@@ -0,0 +1,196 @@
+"""
+Полнотекстовый поиск по каталогу: name, tag, description, badge.
+
+Индекс — отдельная таблица catalog_watch_search (создаётся миграцией 0014
+под текущую СУБД):
+  * SQLite — виртуальная таблица FTS5 (rowid = id часов), ранжирование bm25;
+  * PostgreSQL — tsvector с весами + GIN-индекс, ранжирование ts_rank.
+В индексе только активные часы. Синхронизация — сигналы Watch
+(см. signals.py); после массовых update()/bulk_create —
+`manage.py rebuild_search_index`.
+
+На других СУБД (или если FTS5 недоступен) — запасной вариант через icontains.
+"""
+import re
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.db.models import Q
+
+from .models import Watch
+
+SEARCH_TABLE = "catalog_watch_search"
+
+MAX_TERMS = 8
+MAX_TERM_LENGTH = 64
+
+# веса полей: name важнее всего, description — меньше всего
+_SQLITE_WEIGHTS = {"name": 10.0, "tag": 4.0, "description": 1.0, "badge": 2.0}
+_POSTGRES_WEIGHTS = {"name": "A", "tag": "B", "badge": "C", "description": "D"}
+
+
+def _config() -> str:
+    # 'simple' — без стемминга: в каталоге вперемешку русский и английский
+    return getattr(settings, "WATCH_SEARCH_CONFIG", "simple")
+
+
+def terms(query: str) -> list:
+    """
+    Слова запроса без спецсимволов — безопасно подставлять в MATCH / to_tsquery.
+    """
+    words = re.findall(r"\w+", query.lower())
+    return [w[:MAX_TERM_LENGTH] for w in words[:MAX_TERMS]]
+
+
+def is_available(using=None) -> bool:
+    """
+    Есть ли таблица индекса. Проверяется один раз на соединение.
+    """
+    conn = using or connection
+    available = getattr(conn, "_watch_search_available", None)
+    if available is None:
+        available = conn.vendor in ("sqlite", "postgresql")
+        if available:
+            with conn.cursor() as cursor:
+                available = SEARCH_TABLE in conn.introspection.table_names(cursor)
+        conn._watch_search_available = available
+    return available
+
+
+# =========================
+# Схема (вызывается из миграции)
+# =========================
+
+def create_index(schema_editor) -> None:
+    conn = schema_editor.connection
+    if conn.vendor == "sqlite":
+        try:
+            # savepoint: ошибка не должна ломать транзакцию миграции
+            with transaction.atomic(using=conn.alias):
+                schema_editor.execute(
+                    f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+                    "name, tag, description, badge, "
+                    "tokenize = 'unicode61 remove_diacritics 2')"
+                )
+        except OperationalError:
+            # SQLite собран без FTS5 ("no such module: fts5") — остаётся icontains
+            conn._watch_search_available = False
+            return
+    elif conn.vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE TABLE {SEARCH_TABLE} ("
+            "watch_id bigint PRIMARY KEY "
+            "REFERENCES catalog_watch (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX {SEARCH_TABLE}_document_idx ON {SEARCH_TABLE} USING GIN (document)"
+        )
+    else:
+        return
+    conn._watch_search_available = True
+    index_watches(using=conn)
+
+
+def drop_index(schema_editor) -> None:
+    conn = schema_editor.connection
+    if conn.vendor in ("sqlite", "postgresql"):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+    conn._watch_search_available = False
+
+
+# =========================
+# Синхронизация
+# =========================
+
+def _id_filter(ids, column: str):
+    if ids is None:
+        return "", []
+    placeholders = ", ".join(["%s"] * len(ids))
+    return f" AND {column} IN ({placeholders})", list(ids)
+
+
+def index_watches(ids=None, using=None) -> None:
+    """
+    Переиндексирует часы с указанными id (None — весь каталог).
+    Неактивные и удалённые из индекса убираются.
+    """
+    conn = using or connection
+    if ids is not None:
+        ids = [int(i) for i in ids]
+        if not ids:
+            return
+    if not is_available(conn):
+        return
+
+    remove_watches(ids, using=conn)
+    where, params = _id_filter(ids, "id")
+    with conn.cursor() as cursor:
+        if conn.vendor == "sqlite":
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, name, tag, description, badge) "
+                "SELECT id, name, tag, description, badge FROM catalog_watch "
+                f"WHERE is_active{where}",
+                params,
+            )
+        else:
+            document = " || ".join(
+                f"setweight(to_tsvector(%s::regconfig, coalesce({field}, '')), '{weight}')"
+                for field, weight in _POSTGRES_WEIGHTS.items()
+            )
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (watch_id, document) "
+                f"SELECT id, {document} FROM catalog_watch WHERE is_active{where}",
+                [_config()] * len(_POSTGRES_WEIGHTS) + params,
+            )
+
+
+def remove_watches(ids=None, using=None) -> None:
+    conn = using or connection
+    if not is_available(conn):
+        return
+    column = "rowid" if conn.vendor == "sqlite" else "watch_id"
+    where, params = _id_filter(ids, column)
+    with conn.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE 1 = 1{where}", params)
+
+
+# =========================
+# Поиск
+# =========================
+
+def search_watch_ids(query: str, limit: int) -> list:
+    """
+    id активных часов по убыванию релевантности. Каждое слово ищется
+    по префиксу ("omeg" найдёт Omega), все слова обязательны.
+    """
+    words = terms(query)
+    if not words:
+        return []
+
+    if not is_available():
+        qs = Watch.objects.filter(is_active=True)
+        for word in words:
+            qs = qs.filter(
+                Q(name__icontains=word) | Q(tag__icontains=word)
+                | Q(description__icontains=word) | Q(badge__icontains=word)
+            )
+        return list(qs.order_by("sort_order", "id").values_list("id", flat=True)[:limit])
+
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            match = " ".join(f'"{w}"*' for w in words)
+            weights = ", ".join(str(w) for w in _SQLITE_WEIGHTS.values())
+            cursor.execute(
+                f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s "
+                f"ORDER BY bm25({SEARCH_TABLE}, {weights}), rowid LIMIT %s",
+                [match, limit],
+            )
+        else:
+            cursor.execute(
+                f"SELECT watch_id FROM {SEARCH_TABLE}, to_tsquery(%s::regconfig, %s) query "
+                "WHERE document @@ query "
+                "ORDER BY ts_rank(document, query) DESC, watch_id LIMIT %s",
+                [_config(), " & ".join(f"{w}:*" for w in words), limit],
+            )
+        return [row[0] for row in cursor.fetchall()]
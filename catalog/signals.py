@@ -0,0 +1,63 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import search
+from .cache import bump_catalog_version
+from .images import delete_derivatives, schedule_derivatives
+from .models import Order, OrderItem, Watch
+
+
+@receiver(post_save, sender=Watch)
+@receiver(post_delete, sender=Watch)
+def invalidate_catalog_cache(sender, instance, **kwargs):
+    """
+    Любое изменение часов сбрасывает кэш API каталога.
+    Сбрасываем после коммита, чтобы параллельный запрос не закэшировал
+    старые данные под новой версией.
+    """
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=Watch)
+def update_search_index(sender, instance, **kwargs):
+    """
+    Индекс поиска обновляется в той же транзакции, что и сами часы.
+    """
+    search.index_watches([instance.id])
+
+
+@receiver(post_delete, sender=Watch)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.remove_watches([instance.id])
+
+
+@receiver(post_save, sender=Watch)
+def refresh_image_derivatives(sender, instance, **kwargs):
+    """
+    Новое (или убранное) фото — перегенерировать превью в фоне.
+    """
+    source = (instance.image_derivatives or {}).get("source")
+    if instance.image.name != source and (instance.image or source):
+        schedule_derivatives(instance.id)
+
+
+@receiver(post_delete, sender=Watch)
+def remove_image_derivatives(sender, instance, **kwargs):
+    """
+    Превью удалённых часов больше никому не нужны; сам оригинал не трогаем.
+    Файлы удаляем после коммита — при откате часы (и превью) остаются.
+    """
+    data = instance.image_derivatives
+    if data:
+        transaction.on_commit(lambda: delete_derivatives(data))
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def refresh_order_totals(sender, instance, **kwargs):
+    """
+    Держит Order.total_amount / items_count в актуальном состоянии
+    при правке отдельных позиций (bulk_create в create_order считает сам).
+    """
+    Order.refresh_totals([instance.order_id])
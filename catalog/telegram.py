@@ -0,0 +1,362 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+
+import httpx
+import requests
+from django.conf import settings
+from django.core.files.storage import default_storage
+from requests.adapters import HTTPAdapter
+
+from . import instrumentation, metrics
+from .models import Watch
+
+logger = logging.getLogger(__name__)
+
+
+class TelegramError(Exception):
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+def is_configured() -> bool:
+    return bool(
+        getattr(settings, "TELEGRAM_BOT_TOKEN", None)
+        and getattr(settings, "TELEGRAM_CHAT_ID", None)
+    )
+
+
+def api_url(method: str) -> str:
+    token = getattr(settings, "TELEGRAM_BOT_TOKEN", None)
+    return f"{settings.TELEGRAM_API_URL}/bot{token}/{method}"
+
+
+# =========================
+# HTTP-клиент: одна keep-alive сессия на процесс
+# =========================
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Общая requests.Session процесса с пулом соединений.
+    После fork (gunicorn) каждый воркер заводит свою.
+    """
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=settings.TELEGRAM_POOL_SIZE,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session, _session_pid = session, pid
+    return _session
+
+
+def _record(method: str, seconds: float, error: bool) -> None:
+    instrumentation.record("tg", seconds)
+    metrics.TELEGRAM_LATENCY.observe(seconds, method=method)
+    if error:
+        metrics.TELEGRAM_ERRORS.inc(method=method)
+    with _stats_lock:
+        st = _stats.setdefault(method, {"calls": 0, "errors": 0, "total": 0.0, "max": 0.0})
+        st["calls"] += 1
+        st["errors"] += int(error)
+        st["total"] += seconds
+        st["max"] = max(st["max"], seconds)
+
+
+def get_stats() -> dict:
+    """
+    Задержки вызовов Bot API в этом процессе по методам (секунды).
+    """
+    with _stats_lock:
+        return {
+            method: {**st, "avg": st["total"] / st["calls"] if st["calls"] else 0.0}
+            for method, st in _stats.items()
+        }
+
+
+def reset_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
+def _result(r):
+    """
+    Возвращает result из ответа Telegram или бросает TelegramError.
+    """
+    try:
+        data = r.json()
+    except ValueError:
+        raise TelegramError(f"HTTP {r.status_code}: ответ не JSON", r.status_code)
+    if not isinstance(data, dict) or not data.get("ok"):
+        description = data.get("description") if isinstance(data, dict) else data
+        raise TelegramError(f"HTTP {r.status_code}: {description}", r.status_code)
+    return data.get("result")
+
+
+def _retry_after(r):
+    if r.status_code != 429:
+        return None
+    try:
+        return int(r.json().get("parameters", {}).get("retry_after", 1))
+    except (ValueError, AttributeError):
+        return 1
+
+
+def call(method: str, *, json=None, data=None, files=None, timeout=None, silent=False):
+    """
+    Вызов метода Bot API через общую сессию. Возвращает result.
+    На 429 ждёт retry_after (не дольше TELEGRAM_MAX_RETRY_AFTER) и повторяет.
+    silent=True — ошибки только логируются, возвращается None
+    (для ответов в webhook, где падать нельзя).
+    """
+    timeout = timeout or settings.TELEGRAM_TIMEOUT
+    attempt = 0
+    while True:
+        attempt += 1
+        start = time.perf_counter()
+        try:
+            r = get_session().post(
+                api_url(method), json=json, data=data, files=files, timeout=timeout
+            )
+            wait = _retry_after(r)
+            if wait is not None and attempt <= settings.TELEGRAM_MAX_RETRIES \
+                    and wait <= settings.TELEGRAM_MAX_RETRY_AFTER:
+                _record(method, time.perf_counter() - start, error=True)
+                time.sleep(wait)
+                for f in (files or {}).values():
+                    f.seek(0)
+                continue
+            result = _result(r)
+        except (requests.RequestException, TelegramError) as e:
+            _record(method, time.perf_counter() - start, error=True)
+            if silent:
+                logger.warning("Telegram %s: %s", method, e)
+                return None
+            if isinstance(e, TelegramError):
+                raise
+            raise TelegramError(f"{method}: {e}") from e
+        _record(method, time.perf_counter() - start, error=False)
+        return result
+
+
+# =========================
+# Асинхронный клиент (ASGI-вьюхи, бот)
+# =========================
+
+# свой httpx.AsyncClient на каждый event loop: клиент нельзя делить между циклами
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _httpx_timeout(timeout) -> httpx.Timeout:
+    connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+    return httpx.Timeout(read, connect=connect)
+
+
+def get_async_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.TELEGRAM_POOL_SIZE,
+                max_keepalive_connections=settings.TELEGRAM_POOL_SIZE,
+            ),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def aclose_async_client() -> None:
+    """
+    Закрывает клиент текущего event loop (в долгоживущих воркерах — перед выходом).
+    """
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def acall(method: str, *, json=None, timeout=None, silent=False):
+    """
+    Асинхронный аналог call() для JSON-методов Bot API: те же повторы
+    на 429, та же статистика и то же поведение silent.
+    """
+    timeout = _httpx_timeout(timeout or settings.TELEGRAM_TIMEOUT)
+    attempt = 0
+    while True:
+        attempt += 1
+        start = time.perf_counter()
+        try:
+            r = await get_async_client().post(api_url(method), json=json, timeout=timeout)
+            wait = _retry_after(r)
+            if wait is not None and attempt <= settings.TELEGRAM_MAX_RETRIES \
+                    and wait <= settings.TELEGRAM_MAX_RETRY_AFTER:
+                _record(method, time.perf_counter() - start, error=True)
+                await asyncio.sleep(wait)
+                continue
+            result = _result(r)
+        except (httpx.HTTPError, TelegramError) as e:
+            _record(method, time.perf_counter() - start, error=True)
+            if silent:
+                logger.warning("Telegram %s: %s", method, e)
+                return None
+            if isinstance(e, TelegramError):
+                raise
+            raise TelegramError(f"{method}: {e}") from e
+        _record(method, time.perf_counter() - start, error=False)
+        return result
+
+
+# =========================
+# Заказ: 1 сообщение + фото ответом
+# =========================
+
+def send_order_message(order) -> int:
+    """
+    Главное сообщение о заказе (текст + кнопки). Возвращает message_id.
+    """
+    lat = getattr(order, "latitude", None)
+    lon = getattr(order, "longitude", None)
+    has_coords = lat is not None and lon is not None
+
+    items = list(order.items.select_related("watch").all())
+
+    lines = [
+        f"🧾 Новый заказ #{order.id}",
+        f"Статус: {order.get_status_display()}",
+        f"Создан: {order.created_at}",
+        f"Телефон: {order.phone}",
+        f"Адрес (текст): {order.location}",
+    ]
+    if has_coords:
+        lines.append(f"Координаты: {lat}, {lon}")
+        lines.append(f"Карта: https://www.google.com/maps?q={lat},{lon}")
+
+    lines.append(f"Сумма: {order.total_amount} сум")
+    lines.append("")
+    lines.append("Товары:")
+    for item in items:
+        lines.append(f"• {item.watch.name} — {item.quantity} шт. × {item.price} сум")
+
+    text = "\n".join(lines)
+
+    # Кнопки (ВАЖНО: deliver/cancel соответствуют webhook)
+    keyboard = {
+        "inline_keyboard": [[
+            {"text": "✅ Подтвердить", "callback_data": f"deliver:{order.id}"},
+            {"text": "❌ Отказать",    "callback_data": f"cancel:{order.id}"},
+        ]]
+    }
+
+    result = call(
+        "sendMessage",
+        json={"chat_id": settings.TELEGRAM_CHAT_ID, "text": text, "reply_markup": keyboard},
+    )
+    return result["message_id"]
+
+
+def _upload_name(watch) -> str:
+    """
+    Что загружать в Telegram: самую крупную JPEG-копию (catalog/images.py),
+    если она сделана для текущего фото, иначе оригинал.
+    """
+    derivatives = watch.image_derivatives or {}
+    jpeg = derivatives.get("jpeg") or {}
+    if jpeg and derivatives.get("source") == watch.image.name:
+        return jpeg[max(jpeg, key=int)]
+    return watch.image.name
+
+
+def send_order_photos(order, reply_to_message_id=None) -> None:
+    """
+    Фото товаров — reply на главное сообщение (чтобы выглядело как один блок).
+    Фото, уже загруженные в Telegram, отправляются по file_id без загрузки;
+    для новых file_id запоминается в Watch после отправки.
+    """
+    items = [it for it in order.items.select_related("watch") if it.watch.image]
+
+    for start in range(0, len(items), 10):
+        media = []
+        files = {}
+        uploaded = {}   # индекс в media -> Watch, для которого запомним file_id
+        cached = []     # Watch, отправленные по сохранённому file_id
+
+        try:
+            for it in items[start:start + 10]:
+                watch = it.watch
+                if watch.telegram_file_id and watch.telegram_file_source == watch.image.name:
+                    ref = watch.telegram_file_id
+                    cached.append(watch.id)
+                else:
+                    name = f"photo{len(files) + 1}"
+                    try:
+                        files[name] = default_storage.open(_upload_name(watch), "rb")
+                    except Exception:
+                        continue
+                    ref = f"attach://{name}"
+                    uploaded[len(media)] = watch
+
+                media.append({
+                    "type": "photo",
+                    "media": ref,
+                    "caption": f"{watch.name}\n{it.quantity} шт. × {it.price} сум",
+                })
+
+            if not media:
+                continue
+
+            payload = {"chat_id": settings.TELEGRAM_CHAT_ID, "media": json.dumps(media)}
+            if reply_to_message_id:
+                payload["reply_to_message_id"] = reply_to_message_id
+
+            try:
+                result = call(
+                    "sendMediaGroup",
+                    data=payload,
+                    files=files,
+                    timeout=settings.TELEGRAM_UPLOAD_TIMEOUT,
+                )
+            except TelegramError as e:
+                # Telegram не принял file_id (например, сменился бот) —
+                # забываем их, повтор загрузит фото заново
+                if e.status == 400 and cached:
+                    Watch.objects.filter(id__in=cached).update(
+                        telegram_file_id="", telegram_file_source="",
+                    )
+                raise
+        finally:
+            for f in files.values():
+                try:
+                    f.close()
+                except Exception:
+                    pass
+
+        for index, watch in uploaded.items():
+            try:
+                file_id = result[index]["photo"][-1]["file_id"]
+            except (IndexError, KeyError, TypeError):
+                continue
+            Watch.objects.filter(id=watch.id, image=watch.image.name).update(
+                telegram_file_id=file_id,
+                telegram_file_source=watch.image.name,
+            )
+            watch.telegram_file_id = file_id
+            watch.telegram_file_source = watch.image.name
@@ -0,0 +1,21 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from catalog.page_cache import FRAGMENTS, PLACEHOLDER, is_cache_render
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def page_fragment(context, name):
+    """
+    {% page_fragment "auth" %} / "cart_count" / "csrf_token" — часть страницы,
+    зависящая от посетителя. В кэшируемом рендере — метка для подстановки
+    (catalog/page_cache.py), в обычном — сам фрагмент.
+    """
+    if name not in FRAGMENTS:
+        raise template.TemplateSyntaxError(f"Unknown page fragment: {name}")
+    request = context["request"]
+    if is_cache_render(request):
+        return mark_safe(PLACEHOLDER.format(name))
+    return mark_safe(FRAGMENTS[name](request))
@@ -0,0 +1,5 @@
+# локальный кэш вместо файлового — те же алиасы, что в settings.CACHES
+LOCMEM_CACHES = {
+    alias: {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": alias}
+    for alias in ("default", "catalog_meta", "carts")
+}
@@ -0,0 +1,75 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from catalog.archive import archive_orders
+from catalog.models import ArchivedOrder, Order, OrderItem, Watch
+from catalog.tests import LOCMEM_CACHES
+
+# сессия, пользователь, COUNT, страница заказов, позиции с часами, профиль
+ACCOUNT_QUERIES = 6
+
+
+@override_settings(CACHES=LOCMEM_CACHES, ACCOUNT_ORDERS_PER_PAGE=20)
+class AccountOrderHistoryTests(TestCase):
+    """
+    /account/ делает одно и то же число запросов при любой истории заказов,
+    в том числе когда часть заказов уже в архиве.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user("buyer", password="x")
+        self.watches = [
+            Watch.objects.create(name=f"Noir {i}", price=1_000_000 + i, image=f"watches/{i}.jpg")
+            for i in range(3)
+        ]
+        self.client.force_login(self.user)
+
+    def make_orders(self, count: int, days_apart: int = 0) -> list:
+        now = timezone.now()
+        orders = []
+        for i in range(count):
+            order = Order.objects.create(
+                user=self.user, location="Ташкент", phone="+998900000000", status="delivered",
+            )
+            for k in range(1 + i % 3):
+                OrderItem.objects.create(
+                    order=order, watch=self.watches[k], quantity=k + 1, price=Decimal("1000000"),
+                )
+            Order.objects.filter(pk=order.pk).update(created_at=now - timedelta(days=i * days_apart))
+            orders.append(order)
+        return orders
+
+    def get_account(self, page=None):
+        with self.assertNumQueries(ACCOUNT_QUERIES):
+            response = self.client.get(reverse("account"), {"page": page} if page else {})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_single_order(self):
+        order, = self.make_orders(1)
+
+        response = self.get_account()
+        self.assertContains(response, f"Заказ #{order.id}")
+        self.assertContains(response, "Noir 0")
+
+    def test_many_orders_live_and_archived(self):
+        orders = self.make_orders(50, days_apart=10)
+        archive_orders(days=255)  # заказы 26..49 (старше 255 дней) уходят в архив
+        self.assertEqual(ArchivedOrder.objects.filter(user=self.user).count(), 24)
+
+        # страница 1 — только рабочие заказы, 2 — вперемешку, 3 — только архив
+        for page in (1, 2, 3):
+            self.get_account(page)
+
+        response = self.get_account(2)
+        shown = [order.id for order in response.context["orders"]]
+        self.assertEqual(shown, [order.id for order in orders[20:40]])
+        self.assertEqual(
+            {type(order) for order in response.context["orders"]}, {Order, ArchivedOrder},
+        )
+        self.assertContains(response, "Noir 2")
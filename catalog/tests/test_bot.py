@@ -0,0 +1,76 @@
+from asgiref.sync import async_to_sync
+from django.test import TestCase, override_settings
+
+from catalog import telegram
+from catalog.management.commands._bench import fake_telegram_server
+from catalog.models import Order, TelegramUpdate
+from catalog.tests import LOCMEM_CACHES
+from catalog.updates import claim_batch, enqueue_update, process_batch
+
+
+@async_to_sync
+async def process(entries):
+    try:
+        return await process_batch(entries)
+    finally:
+        await telegram.aclose_async_client()
+
+
+def error(status, description):
+    return status, {"ok": False, "error_code": status, "description": description}
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    TELEGRAM_BOT_TOKEN="test",
+    TELEGRAM_ADMIN_IDS=[],
+    TELEGRAM_UPDATES_MAX_ATTEMPTS=3,
+)
+class BotUpdateTests(TestCase):
+    """
+    Ошибки Bot API при обработке апдейта: временные — повтор через
+    очередь, окончательные 4xx — апдейт считается обработанным.
+    """
+
+    def process(self, update, responses=()):
+        enqueue_update(update)
+        calls = []
+        with fake_telegram_server(responses=list(responses), calls=calls) as url:
+            with self.settings(TELEGRAM_API_URL=url):
+                result = process(claim_batch(10))
+        return result, [method for method, _ in calls]
+
+    def orders_command(self, update_id=1):
+        return {"update_id": update_id, "message": {"chat": {"id": 5}, "text": "/orders"}}
+
+    def test_success_marks_update_done(self):
+        result, methods = self.process(self.orders_command())
+        self.assertEqual(result, (1, 0))
+        self.assertEqual(methods, ["sendMessage"])
+        self.assertEqual(TelegramUpdate.objects.get().status, "done")
+
+    def test_server_error_is_retried(self):
+        result, _ = self.process(self.orders_command(), [error(502, "Bad Gateway")])
+
+        self.assertEqual(result, (0, 1))
+        entry = TelegramUpdate.objects.get()
+        self.assertEqual((entry.status, entry.attempts), ("pending", 1))
+        self.assertIn("HTTP 502", entry.last_error)
+
+    def test_final_client_error_is_not_retried(self):
+        order = Order.objects.create(location="Ташкент", phone="+998900000000")
+        update = {"update_id": 2, "callback_query": {
+            "id": "cq", "data": f"deliver:{order.id}",
+            "message": {"chat": {"id": 5}, "message_id": 7},
+        }}
+        with self.assertLogs("catalog.bot", "WARNING") as logs:
+            result, methods = self.process(update, [
+                error(400, "Bad Request: query is too old and response timeout expired"),
+            ])
+        self.assertIn("query is too old", logs.output[0])
+
+        self.assertEqual(result, (1, 0))
+        self.assertCountEqual(methods, ["answerCallbackQuery", "editMessageReplyMarkup"])
+        self.assertEqual(TelegramUpdate.objects.get().status, "done")
+        order.refresh_from_db()
+        self.assertEqual(order.status, "delivered")
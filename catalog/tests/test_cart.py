@@ -0,0 +1,65 @@
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from catalog.models import Watch
+from catalog.tests import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES, CART_STORAGE="catalog.cart_storage.SessionCartStorage")
+class CartPageTests(TestCase):
+    def setUp(self):
+        self.watch = Watch.objects.create(name="Noir", price=1_000_000)
+
+    def test_cart_with_items(self):
+        self.client.post(reverse("cart_add", args=[self.watch.id]), {"quantity": 2})
+
+        response = self.client.get(reverse("cart_detail"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Noir")
+        self.assertContains(response, "Корзина (2)")
+        self.assertContains(response, 'name="csrfmiddlewaretoken"', count=2)
+        self.assertNotContains(response, "<!--page-cache:")
+
+    def test_unknown_or_inactive_watch_is_not_added(self):
+        hidden = Watch.objects.create(name="Hidden", price=1_000_000, is_active=False)
+        for watch_id in (hidden.id, 999_999):
+            response = self.client.post(reverse("cart_add", args=[watch_id]), {"quantity": 5})
+            self.assertEqual(response.status_code, 404)
+
+        self.assertContains(self.client.get(reverse("cart_detail")), "Корзина (0)")
+
+    def test_checkout_errors_render_cart(self):
+        self.client.post(reverse("cart_add", args=[self.watch.id]))
+
+        response = self.client.post(reverse("checkout"), {"location": "Ташкент"})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Укажите номер телефона.")
+        self.assertContains(response, 'value="Ташкент"')
+
+    def test_empty_cart_served_from_page_cache(self):
+        url = reverse("cart_detail")
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+
+        for response in (first, second):
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, "Корзина пуста.")
+            self.assertContains(response, "Корзина (0)")
+            self.assertNotContains(response, "<!--page-cache:")
+
+
+@override_settings(CACHES=LOCMEM_CACHES, CART_STORAGE="catalog.cart_storage.CacheCartStorage")
+class CacheCartStorageTests(TestCase):
+    def test_cart_kept_apart_from_catalog_cache(self):
+        watch = Watch.objects.create(name="Noir", price=1_000_000)
+        self.client.post(reverse("cart_add", args=[watch.id]), {"quantity": 3})
+
+        cart_id = self.client.cookies["cart"].value
+        self.assertEqual(caches["carts"].get(f"cart:{cart_id}"), {str(watch.id): 3})
+        self.assertIsNone(caches["default"].get(f"cart:{cart_id}"))
+
+        # сброс кэша каталога корзины не трогает
+        caches["default"].clear()
+        self.assertContains(self.client.get(reverse("cart_detail")), "Корзина (3)")
@@ -0,0 +1,82 @@
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from catalog.cache import CATALOG_VERSION_KEY, get_catalog_version
+from catalog.models import Watch
+from catalog.tests import LOCMEM_CACHES
+
+# основной кэш крошечный, с полной очисткой при переполнении
+CULLING_CACHES = {
+    **LOCMEM_CACHES,
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "culling",
+        "OPTIONS": {"MAX_ENTRIES": 5, "CULL_FREQUENCY": 0},
+    },
+}
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    WATCHES_PAGE_SIZE=100,
+    API_CACHED_LIMITS=(10, 20),
+    WATCH_PRICE_BUCKETS=[1_000_000, 5_000_000],
+)
+class CatalogCacheKeyTests(TestCase):
+    """
+    Ключи кэша API строятся только из канонических значений параметров.
+    """
+
+    def setUp(self):
+        for i in range(3):
+            Watch.objects.create(name=f"Noir {i}", price=1_000_000 * (i + 1), sort_order=i)
+        self.url = reverse("watches_all")
+
+    def assertCached(self, first: dict, second: dict):
+        self.assertEqual(self.client.get(self.url, first).status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url, second).status_code, 200)
+
+    def assertNotCached(self, params: dict, queries: int):
+        self.client.get(self.url, params)
+        with self.assertNumQueries(queries):
+            self.assertEqual(self.client.get(self.url, params).status_code, 200)
+
+    def test_fields_order_shares_a_key(self):
+        self.assertCached({"fields": "name,id,price"}, {"fields": "price,name"})
+
+    def test_listed_limits_are_cached(self):
+        self.assertCached({"limit": 20}, {"limit": 20})
+
+    def test_other_limits_are_not_cached(self):
+        # страница; счётчики фасетов от limit не зависят и остаются в кэше
+        self.assertNotCached({"limit": 7}, queries=1)
+
+    def test_bucket_prices_are_cached(self):
+        self.assertCached({"price_min": 1_000_000}, {"price_min": 1_000_000})
+
+    def test_arbitrary_prices_are_not_cached(self):
+        # страница + счётчики фасетов
+        self.assertNotCached({"price_min": 1_234_567}, queries=2)
+
+    def test_arbitrary_search_limit_is_not_cached(self):
+        url = reverse("watches_search")
+        self.client.get(url, {"q": "noir", "limit": 7})
+        with self.assertNumQueries(2):
+            self.client.get(url, {"q": "noir", "limit": 7})
+
+
+@override_settings(CACHES=CULLING_CACHES)
+class CatalogVersionTests(TestCase):
+    def test_version_survives_cull_of_response_cache(self):
+        Watch.objects.create(name="Noir", price=1_000_000)
+        etag = self.client.get(reverse("hero_watch"))["ETag"]
+        version = get_catalog_version()
+
+        for i in range(20):
+            self.client.get(reverse("watches_all"), {"badge": f"b{i}"})
+
+        self.assertEqual(caches["catalog_meta"].get(CATALOG_VERSION_KEY), version)
+        self.assertIsNone(caches["default"].get(CATALOG_VERSION_KEY))
+        self.assertEqual(self.client.get(reverse("hero_watch"))["ETag"], etag)
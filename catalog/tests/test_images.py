@@ -0,0 +1,83 @@
+import tempfile
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import SimpleTestCase, TestCase, override_settings
+from PIL import Image
+
+from catalog.images import build_derivatives, derivative_name, refresh_watch_derivatives
+from catalog.models import Watch
+from catalog.tests import LOCMEM_CACHES
+
+
+class DerivativeNameTests(SimpleTestCase):
+    def test_source_extension_is_kept(self):
+        self.assertEqual(derivative_name("watches/noir.png", 640, "webp"), "watches/noir.png__w640.webp")
+        self.assertNotEqual(
+            derivative_name("watches/noir.png", 640, "jpeg"),
+            derivative_name("watches/noir.jpg", 640, "jpeg"),
+        )
+
+    def test_same_stem_sources_do_not_collide(self):
+        with tempfile.TemporaryDirectory() as media, override_settings(
+            MEDIA_ROOT=media, IMAGE_DERIVATIVE_WIDTHS=(320,),
+        ):
+            for name, fmt, color in (("watches/noir.png", "PNG", "red"), ("watches/noir.jpg", "JPEG", "blue")):
+                buf = BytesIO()
+                Image.new("RGB", (400, 200), color).save(buf, fmt)
+                default_storage.save(name, ContentFile(buf.getvalue()))
+
+            png = build_derivatives("watches/noir.png")
+            jpg = build_derivatives("watches/noir.jpg")
+
+            self.assertEqual(png["jpeg"]["320"], "watches/noir.png__w320.jpg")
+            self.assertEqual(jpg["jpeg"]["320"], "watches/noir.jpg__w320.jpg")
+            # превью png не затёрто превью jpg
+            with default_storage.open(png["jpeg"]["320"]) as f:
+                red, _, blue = Image.open(f).convert("RGB").getpixel((0, 0))
+            self.assertGreater(red, blue)
+
+
+class SaveDerivativesTests(TestCase):
+    def test_rebuild_removes_files_with_old_names(self):
+        with tempfile.TemporaryDirectory() as media, override_settings(
+            CACHES=LOCMEM_CACHES, MEDIA_ROOT=media, IMAGE_DERIVATIVE_WIDTHS=(320,),
+            IMAGE_DERIVATIVES_ASYNC=False,
+        ):
+            buf = BytesIO()
+            Image.new("RGB", (400, 200), "red").save(buf, "PNG")
+            name = default_storage.save("watches/noir.png", ContentFile(buf.getvalue()))
+            legacy = default_storage.save("watches/noir__w320.webp", ContentFile(b"old"))
+            watch = Watch.objects.create(name="Noir", price=1, image=name)
+            Watch.objects.filter(id=watch.id).update(
+                image_derivatives={"source": name, "webp": {"320": legacy}},
+            )
+
+            self.assertTrue(refresh_watch_derivatives(watch.id, force=True))
+
+            self.assertFalse(default_storage.exists(legacy))
+            data = Watch.objects.get(id=watch.id).image_derivatives
+            self.assertEqual(data["webp"]["320"], "watches/noir.png__w320.webp")
+            self.assertTrue(default_storage.exists(data["webp"]["320"]))
+
+
+class DeleteWatchTests(TestCase):
+    def test_derivatives_removed_after_commit(self):
+        with tempfile.TemporaryDirectory() as media, override_settings(
+            CACHES=LOCMEM_CACHES, MEDIA_ROOT=media,
+        ):
+            source = default_storage.save("watches/noir.png", ContentFile(b"png"))
+            preview = default_storage.save("watches/noir.png__w320.webp", ContentFile(b"webp"))
+            watch = Watch.objects.create(name="Noir", price=1)
+            Watch.objects.filter(id=watch.id).update(
+                image=source, image_derivatives={"source": source, "webp": {"320": preview}},
+            )
+            watch.refresh_from_db()
+
+            with self.captureOnCommitCallbacks(execute=True):
+                watch.delete()
+                self.assertTrue(default_storage.exists(preview))
+
+            self.assertFalse(default_storage.exists(preview))
+            self.assertTrue(default_storage.exists(source))
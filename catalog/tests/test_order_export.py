@@ -0,0 +1,64 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from catalog.archive import archive_orders
+from catalog.models import ArchivedOrder, Order, OrderItem, Watch
+from catalog.order_export import export_chunks
+from catalog.tests import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class OrderExportTests(TestCase):
+    def setUp(self):
+        self.watch = Watch.objects.create(name="Noir", price=1_000_000)
+        now = timezone.now()
+        # 10 заказов раз в 60 дней; старше 180 дней уйдут в архив
+        self.orders = []
+        for i in range(10):
+            order = Order.objects.create(
+                location=f"Адрес {i}", phone="+998900000000", status="delivered",
+            )
+            OrderItem.objects.create(order=order, watch=self.watch, quantity=i + 1, price=1_000_000)
+            Order.objects.filter(pk=order.pk).update(created_at=now - timedelta(days=(9 - i) * 60))
+            self.orders.append(order)
+
+    def export(self, fmt="csv", **kwargs):
+        return "".join(export_chunks(fmt=fmt, chunk_size=3, **kwargs))
+
+    def test_export_spans_live_and_archived_orders(self):
+        archive_orders(days=180)
+        self.assertEqual(ArchivedOrder.objects.count(), 7)
+        self.assertEqual(Order.objects.count(), 3)
+
+        rows = list(csv.DictReader(io.StringIO(self.export())))
+        self.assertEqual([int(r["order_id"]) for r in rows], [o.id for o in self.orders])
+        self.assertEqual([int(r["item_quantity"]) for r in rows], list(range(1, 11)))
+        self.assertEqual({r["item_watch_name"] for r in rows}, {"Noir"})
+
+    def test_date_range_across_tables(self):
+        archive_orders(days=180)
+        start = timezone.now() - timedelta(days=250)
+
+        lines = self.export(fmt="ndjson", start=start).splitlines()
+        self.assertEqual(
+            [json.loads(line)["order_id"] for line in lines], [o.id for o in self.orders[5:]],
+        )
+
+    def test_csv_cells_are_not_formulas(self):
+        Order.objects.filter(pk=self.orders[0].pk).update(location='=HYPERLINK("http://x")')
+        Watch.objects.filter(pk=self.watch.pk).update(name="@SUM(A1)")
+
+        rows = list(csv.DictReader(io.StringIO(self.export())))
+        self.assertEqual(rows[0]["location"], '\'=HYPERLINK("http://x")')
+        self.assertEqual(rows[0]["phone"], "'+998900000000")
+        self.assertEqual(rows[0]["item_watch_name"], "'@SUM(A1)")
+        self.assertEqual(rows[1]["location"], "Адрес 1")
+
+        # NDJSON — данные, а не таблица: без изменений
+        first = json.loads(self.export(fmt="ndjson").splitlines()[0])
+        self.assertEqual(first["location"], '=HYPERLINK("http://x")')
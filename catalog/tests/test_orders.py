@@ -0,0 +1,62 @@
+import json
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from catalog.models import Order, TelegramOutbox, Watch
+from catalog.tests import LOCMEM_CACHES
+
+ADDRESS = {"location": "Ташкент", "phone": "+998900000000", "latitude": 41.3, "longitude": 69.2}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, CART_STORAGE="catalog.cart_storage.SessionCartStorage")
+class CreateOrderTests(TestCase):
+    def setUp(self):
+        self.watch = Watch.objects.create(name="Noir", price=1_000_000)
+        self.hidden = Watch.objects.create(name="Blanc", price=2_000_000, is_active=False)
+
+    def api_order(self, items):
+        return self.client.post(
+            reverse("api_create_order"), json.dumps({**ADDRESS, "items": items}),
+            content_type="application/json",
+        )
+
+    def test_prices_come_from_the_catalog(self):
+        response = self.api_order([
+            {"id": self.watch.id, "quantity": 2, "price": 1},
+            {"id": self.watch.id, "quantity": 1, "price": 1},
+        ])
+        self.assertEqual(response.status_code, 200)
+
+        order = Order.objects.get(id=response.json()["order_id"])
+        self.assertEqual(order.total_amount, Decimal("3000000"))
+        self.assertEqual(order.items_count, 3)
+        item, = order.items.all()
+        self.assertEqual((item.quantity, item.price), (3, Decimal("1000000")))
+        self.assertTrue(TelegramOutbox.objects.filter(order=order).exists())
+
+    def test_unavailable_watches_reject_the_order(self):
+        response = self.api_order([
+            {"id": self.watch.id, "quantity": 1},
+            {"id": self.hidden.id, "quantity": 3},
+            {"id": 99999, "quantity": 1},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(f"#{self.hidden.id}", response.json()["error"])
+        self.assertIn("#99999", response.json()["error"])
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(TelegramOutbox.objects.exists())
+
+    def test_checkout_reports_watch_hidden_after_adding_to_cart(self):
+        hidden_later = Watch.objects.create(name="Gris", price=3_000_000)
+        for watch in (self.watch, hidden_later):
+            self.client.post(reverse("cart_add", args=[watch.id]))
+        Watch.objects.filter(id=hidden_later.id).update(is_active=False)
+
+        response = self.client.post(reverse("checkout"), {
+            key: str(value) for key, value in ADDRESS.items()
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, f"Товары недоступны для заказа: #{hidden_later.id}")
+        self.assertFalse(Order.objects.exists())
@@ -0,0 +1,124 @@
+import json
+import time
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from catalog.management.commands._bench import fake_telegram_server
+from catalog.models import Order, OrderItem, TelegramOutbox, Watch
+from catalog.outbox import backoff, deliver, deliver_pending
+from catalog.tests import LOCMEM_CACHES
+
+
+def error(status, description="Internal Server Error", **extra):
+    return status, {"ok": False, "error_code": status, "description": description, **extra}
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    TELEGRAM_BOT_TOKEN="test",
+    TELEGRAM_CHAT_ID=1,
+    TELEGRAM_OUTBOX_MAX_ATTEMPTS=3,
+    TELEGRAM_MAX_RETRY_AFTER=2,
+)
+class OutboxDeliveryTests(TestCase):
+    """
+    Доставка уведомлений о заказах через локальный фейковый Bot API.
+    """
+
+    def setUp(self):
+        # фото уже загружено в Telegram — отправляется по file_id, без файла на диске
+        watch = Watch.objects.create(
+            name="Noir", price=1_000_000, image="watches/noir.jpg",
+            telegram_file_id="file-1", telegram_file_source="watches/noir.jpg",
+        )
+        self.order = Order.objects.create(location="Ташкент", phone="+998900000000")
+        OrderItem.objects.create(order=self.order, watch=watch, quantity=1, price=watch.price)
+        self.entry = TelegramOutbox.objects.create(order=self.order)
+
+    def deliver(self, responses=()):
+        calls = []
+        with fake_telegram_server(responses=responses, calls=calls) as url:
+            with self.settings(TELEGRAM_API_URL=url):
+                result = deliver(TelegramOutbox.objects.get(pk=self.entry.pk))
+        self.entry.refresh_from_db()
+        return result, [method for method, _ in calls]
+
+    def test_success_stores_message_id(self):
+        calls = []
+        with fake_telegram_server(
+            responses=[(200, {"ok": True, "result": {"message_id": 42}})], calls=calls,
+        ) as url:
+            with self.settings(TELEGRAM_API_URL=url):
+                self.assertEqual(deliver_pending(), (1, 0))
+
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.status, "sent")
+        self.assertEqual(self.entry.message_id, 42)
+        self.assertEqual(self.entry.attempts, 1)
+        self.assertIsNotNone(self.entry.sent_at)
+        self.assertEqual([method for method, _ in calls], ["sendMessage", "sendMediaGroup"])
+        self.assertIn(f"#{self.order.id}", json.loads(calls[0][1])["text"])
+
+    def test_server_error_backs_off(self):
+        before = timezone.now()
+        delivered, methods = self.deliver([error(502, "Bad Gateway")])
+
+        self.assertFalse(delivered)
+        self.assertEqual(methods, ["sendMessage"])
+        self.assertEqual(self.entry.status, "pending")
+        self.assertEqual(self.entry.attempts, 1)
+        self.assertIsNone(self.entry.message_id)
+        self.assertIn("HTTP 502", self.entry.last_error)
+        self.assertGreaterEqual(self.entry.next_attempt_at, before + backoff(1))
+
+        # пока не вышла задержка, воркер запись не берёт
+        with fake_telegram_server() as url, self.settings(TELEGRAM_API_URL=url):
+            self.assertEqual(deliver_pending(), (0, 0))
+
+    def test_max_attempts_marks_failed(self):
+        TelegramOutbox.objects.filter(pk=self.entry.pk).update(attempts=2)
+        delivered, _ = self.deliver([error(500)])
+
+        self.assertFalse(delivered)
+        self.assertEqual(self.entry.status, "failed")
+        self.assertEqual(self.entry.attempts, 3)
+
+    def test_retry_after_message_sent_does_not_resend_text(self):
+        delivered, methods = self.deliver([
+            (200, {"ok": True, "result": {"message_id": 7}}),
+            error(500),
+        ])
+        self.assertFalse(delivered)
+        self.assertEqual(methods, ["sendMessage", "sendMediaGroup"])
+        self.assertEqual(self.entry.message_id, 7)
+        self.assertEqual(self.entry.status, "pending")
+
+        delivered, methods = self.deliver()
+        self.assertTrue(delivered)
+        self.assertEqual(methods, ["sendMediaGroup"])
+        self.assertEqual(self.entry.status, "sent")
+        self.assertEqual(self.entry.attempts, 2)
+
+    def test_rate_limit_waits_retry_after(self):
+        start = time.monotonic()
+        delivered, methods = self.deliver([
+            error(429, "Too Many Requests: retry after 1", parameters={"retry_after": 1}),
+        ])
+
+        self.assertTrue(delivered)
+        self.assertEqual(methods, ["sendMessage", "sendMessage", "sendMediaGroup"])
+        self.assertGreaterEqual(time.monotonic() - start, 1)
+        self.assertEqual(self.entry.status, "sent")
+        self.assertEqual(self.entry.attempts, 1)
+
+    def test_rate_limit_longer_than_allowed_is_an_error(self):
+        delivered, methods = self.deliver([
+            error(429, "Too Many Requests: retry after 30", parameters={"retry_after": 30}),
+        ])
+
+        self.assertFalse(delivered)
+        self.assertEqual(methods, ["sendMessage"])
+        self.assertIn("HTTP 429", self.entry.last_error)
+        self.assertGreater(self.entry.next_attempt_at, timezone.now() + timedelta(seconds=1))
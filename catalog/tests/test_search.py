@@ -0,0 +1,29 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.db import OperationalError, connection
+from django.test import TestCase
+
+from catalog import search
+from catalog.models import Watch
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.watch = Watch.objects.create(name="Omega Noir", price=1_000_000)
+        self.addCleanup(setattr, connection, "_watch_search_available", None)
+
+    def test_search_by_prefix(self):
+        self.assertEqual(search.search_watch_ids("omeg", 10), [self.watch.id])
+
+    def test_sqlite_without_fts5_falls_back_to_icontains(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("FTS5 есть только в SQLite")
+        editor = SimpleNamespace(
+            connection=connection,
+            execute=mock.Mock(side_effect=OperationalError("no such module: fts5")),
+        )
+        search.create_index(editor)
+
+        self.assertFalse(search.is_available())
+        self.assertEqual(search.search_watch_ids("noir", 10), [self.watch.id])
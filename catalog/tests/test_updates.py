@@ -0,0 +1,53 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from catalog.models import TelegramUpdate
+from catalog.tests import LOCMEM_CACHES
+from catalog.updates import claim_batch
+
+
+def update(update_id, chat_id, **fields):
+    return TelegramUpdate.objects.create(
+        update_id=update_id, chat_id=chat_id, payload={"update_id": update_id}, **fields,
+    )
+
+
+@override_settings(CACHES=LOCMEM_CACHES, TELEGRAM_UPDATES_LEASE=60)
+class ClaimBatchTests(TestCase):
+    def claimed(self, limit=10, **kwargs):
+        return [entry.update_id for entry in claim_batch(limit, **kwargs)]
+
+    def test_blocked_chat_does_not_starve_others(self):
+        # апдейт 1 чата 100 ждёт повтора; за ним сотня апдейтов того же чата
+        update(1, 100, next_attempt_at=timezone.now() + timedelta(minutes=5))
+        for update_id in range(2, 102):
+            update(update_id, 100)
+        update(500, 200)
+        update(501, 300)
+
+        self.assertEqual(self.claimed(limit=2), [500, 501])
+
+    def test_chat_order_is_kept(self):
+        for update_id, chat_id in ((1, 100), (2, 200), (3, 100)):
+            update(update_id, chat_id)
+
+        self.assertEqual(self.claimed(), [1, 2, 3])
+        # все взяты в аренду: повторно не выдаются
+        self.assertEqual(self.claimed(), [])
+
+    def test_leased_update_blocks_later_ones_of_its_chat(self):
+        update(1, 100)
+        self.assertEqual(self.claimed(), [1])
+
+        update(2, 100)
+        update(3, 200)
+        self.assertEqual(self.claimed(), [3])
+
+    def test_shards_split_chats(self):
+        for update_id, chat_id in ((1, 100), (2, 101), (3, 102)):
+            update(update_id, chat_id)
+
+        self.assertEqual(self.claimed(shard=1, shards=2), [2])
+        self.assertEqual(self.claimed(shard=0, shards=2), [1, 3])
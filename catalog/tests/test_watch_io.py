@@ -0,0 +1,47 @@
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+
+from catalog.models import Watch
+from catalog.tests import LOCMEM_CACHES
+from catalog.watch_io import import_rows, read_rows
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class WatchImportTests(TestCase):
+    def setUp(self):
+        self.watch = Watch.objects.create(name="Noir", price=1_000_000)
+
+    def test_id_only_rows_are_reported_not_fatal(self):
+        csv_result = import_rows(read_rows(["id\n", f"{self.watch.id}\n"], "csv"))
+        ndjson_result = import_rows(read_rows([f'{{"id": {self.watch.id}}}\n'], "ndjson"))
+
+        for result in (csv_result, ndjson_result):
+            self.assertEqual((result.created, result.updated), (0, 0))
+            self.assertEqual(len(result.errors), 1)
+            self.assertIn("нечего обновлять", result.errors[0][1])
+
+    def test_id_only_row_next_to_real_updates(self):
+        result = import_rows(read_rows([
+            f'{{"id": {self.watch.id}}}\n',
+            f'{{"id": {self.watch.id}, "price": 2000000}}\n',
+        ], "ndjson"))
+
+        self.assertEqual(result.updated, 1)
+        self.assertEqual([line for line, _ in result.errors], [1])
+        self.watch.refresh_from_db()
+        self.assertEqual(self.watch.price, 2_000_000)
+
+    def test_failed_batch_reports_each_row_once(self):
+        lines = [
+            '{"name": "Blanc", "price": 1000}\n',
+            '{"name": "Gris", "price": "дорого"}\n',
+        ]
+        with mock.patch.object(Watch.objects, "bulk_create", side_effect=DatabaseError("locked")):
+            result = import_rows(read_rows(lines, "ndjson"))
+
+        self.assertEqual(result.created, 0)
+        self.assertEqual([line for line, _ in result.errors], [1, 2])
+        self.assertIn("пачка не сохранена", result.errors[0][1])
+        self.assertNotIn("пачка не сохранена", result.errors[1][1])
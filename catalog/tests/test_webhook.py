@@ -0,0 +1,68 @@
+import json
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from catalog.checks import telegram_webhook_secret
+from catalog.models import TelegramUpdate
+from catalog.tests import LOCMEM_CACHES
+
+UPDATE = {"update_id": 10, "message": {"chat": {"id": 5}, "text": "/orders"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, TELEGRAM_BOT_TOKEN="test", TELEGRAM_WEBHOOK_SECRET="s3cret")
+class TelegramWebhookTests(TestCase):
+    """
+    Webhook ставит в очередь только апдейты с верным секретом и update_id —
+    одинаково под WSGI (views) и ASGI (async_views).
+    """
+
+    def post(self, body, secret="s3cret"):
+        headers = {"X-Telegram-Bot-Api-Secret-Token": secret} if secret is not None else {}
+        return self.client.post(
+            reverse("telegram_webhook"), body, content_type="application/json", headers=headers,
+        )
+
+    async def apost(self, body, secret="s3cret"):
+        headers = {"X-Telegram-Bot-Api-Secret-Token": secret} if secret is not None else {}
+        return await self.async_client.post(
+            reverse("telegram_webhook"), body, content_type="application/json", headers=headers,
+        )
+
+    def test_valid_update_is_queued(self):
+        self.assertEqual(self.post(json.dumps(UPDATE)).status_code, 200)
+        entry = TelegramUpdate.objects.get()
+        self.assertEqual((entry.update_id, entry.chat_id), (10, 5))
+
+    def test_secret_is_required(self):
+        for secret in (None, "", "wrong"):
+            self.assertEqual(self.post(json.dumps(UPDATE), secret=secret).status_code, 403)
+        with self.settings(TELEGRAM_WEBHOOK_SECRET=""):
+            self.assertEqual(self.post(json.dumps(UPDATE), secret="").status_code, 403)
+        self.assertFalse(TelegramUpdate.objects.exists())
+
+    def test_update_id_is_required(self):
+        for body in ("not json", "[]", '{"message": {}}', '{"update_id": "10"}', '{"update_id": true}'):
+            self.assertEqual(self.post(body).status_code, 400, body)
+        self.assertFalse(TelegramUpdate.objects.exists())
+
+    async def test_async_webhook(self):
+        self.assertEqual((await self.apost(json.dumps(UPDATE), secret="wrong")).status_code, 403)
+        self.assertEqual((await self.apost('{"update_id": "10"}')).status_code, 400)
+        self.assertFalse(await TelegramUpdate.objects.aexists())
+
+        self.assertEqual((await self.apost(json.dumps(UPDATE))).status_code, 200)
+        self.assertEqual(await TelegramUpdate.objects.acount(), 1)
+
+
+class WebhookSecretCheckTests(SimpleTestCase):
+    def test_token_without_secret_is_an_error(self):
+        with self.settings(TELEGRAM_BOT_TOKEN="test", TELEGRAM_WEBHOOK_SECRET=""):
+            errors = telegram_webhook_secret(None)
+        self.assertEqual([e.id for e in errors], ["catalog.E001"])
+        self.assertIn("setWebhook", errors[0].hint)
+
+    def test_configured_or_disabled_bot_passes(self):
+        for token, secret in (("test", "s3cret"), ("", "")):
+            with self.settings(TELEGRAM_BOT_TOKEN=token, TELEGRAM_WEBHOOK_SECRET=secret):
+                self.assertEqual(telegram_webhook_secret(None), [])
@@ -0,0 +1,151 @@
+"""
+Очередь входящих апдейтов бота (см. TelegramUpdate).
+
+Webhook: enqueue_update / aenqueue_update — один INSERT с ignore_conflicts,
+так что повторная доставка того же update_id ничего не делает.
+Воркер: claim_batch забирает готовые апдейты, process_batch обрабатывает их
+через bot.handle_update — чаты параллельно, внутри чата строго по update_id.
+Если апдейт не обработался, следующие апдейты этого чата ждут его повтора.
+"""
+import asyncio
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+from django.db.models.functions import Coalesce, Mod
+from django.utils import timezone
+
+from . import bot
+from .models import TelegramUpdate
+from .outbox import backoff
+
+
+def _chat_id(update: dict):
+    if "callback_query" in update:
+        cq = update["callback_query"]
+        return cq.get("message", {}).get("chat", {}).get("id") or cq.get("from", {}).get("id")
+    for key in ("message", "edited_message", "channel_post"):
+        if key in update:
+            return update[key].get("chat", {}).get("id")
+    return None
+
+
+def _new_update(update: dict):
+    """
+    TelegramUpdate для вставки или None, если это не апдейт Bot API.
+    """
+    update_id = update.get("update_id") if isinstance(update, dict) else None
+    if not isinstance(update_id, int) or isinstance(update_id, bool):
+        return None
+    chat_id = _chat_id(update)
+    return TelegramUpdate(
+        update_id=update_id,
+        chat_id=chat_id if isinstance(chat_id, int) else None,
+        payload=update,
+    )
+
+
+def enqueue_update(update: dict) -> None:
+    entry = _new_update(update)
+    if entry is not None:
+        TelegramUpdate.objects.bulk_create([entry], ignore_conflicts=True)
+
+
+async def aenqueue_update(update: dict) -> None:
+    entry = _new_update(update)
+    if entry is not None:
+        await TelegramUpdate.objects.abulk_create([entry], ignore_conflicts=True)
+
+
+def claim_batch(limit: int, shard: int = 0, shards: int = 1) -> list:
+    """
+    Забирает до limit готовых апдейтов (по возрастанию update_id) и
+    продлевает им next_attempt_at на время аренды. Чат, у которого более
+    ранний апдейт ещё ждёт повтора или занят, в пачку не попадает — это
+    отсекается в SQL (NOT EXISTS по индексу tg_update_pending_chat_idx),
+    так что один застрявший чат не занимает окно выборки остальных.
+
+    Несколько воркеров делят чаты через shard/shards (chat_id % shards):
+    так порядок внутри чата держит один воркер.
+    """
+    now = timezone.now()
+    waiting = TelegramUpdate.objects.filter(
+        status="pending",
+        chat_id=OuterRef("chat_id"),
+        update_id__lt=OuterRef("update_id"),
+        next_attempt_at__gt=now,
+    )
+    qs = TelegramUpdate.objects.filter(status="pending", next_attempt_at__lte=now).filter(
+        ~Exists(waiting)
+    )
+    if shards > 1:
+        qs = qs.alias(shard=Mod(Coalesce(F("chat_id"), 0), shards)).filter(shard=shard)
+
+    with transaction.atomic():
+        claimed = list(qs.select_for_update().order_by("update_id")[:limit])
+        TelegramUpdate.objects.filter(update_id__in=[e.update_id for e in claimed]).update(
+            next_attempt_at=now + timedelta(seconds=settings.TELEGRAM_UPDATES_LEASE),
+        )
+    return claimed
+
+
+def _finish(entry: TelegramUpdate, error=None) -> None:
+    entry.attempts += 1
+    if error is None:
+        entry.status = "done"
+        entry.processed_at = timezone.now()
+        entry.last_error = ""
+    else:
+        entry.last_error = f"{type(error).__name__}: {error}"
+        if entry.attempts >= settings.TELEGRAM_UPDATES_MAX_ATTEMPTS:
+            entry.status = "failed"
+            entry.processed_at = timezone.now()
+        else:
+            entry.next_attempt_at = timezone.now() + backoff(entry.attempts)
+    entry.save(update_fields=["attempts", "status", "processed_at", "last_error", "next_attempt_at"])
+
+
+async def _process_chat(entries: list) -> tuple:
+    done = failed = 0
+    for index, entry in enumerate(entries):
+        try:
+            await bot.handle_update(entry.payload)
+        except Exception as e:
+            await sync_to_async(_finish)(entry, e)
+            failed += 1
+            # остальные апдейты чата ждут повтора этого (или идут сразу,
+            # если попытки кончились)
+            release_at = entry.next_attempt_at if entry.status == "pending" else timezone.now()
+            await TelegramUpdate.objects.filter(
+                update_id__in=[rest.update_id for rest in entries[index + 1:]],
+            ).aupdate(next_attempt_at=release_at)
+            break
+        await sync_to_async(_finish)(entry)
+        done += 1
+    return done, failed
+
+
+async def process_batch(entries: list) -> tuple:
+    """
+    Обрабатывает пачку: разные чаты параллельно, один чат — по порядку.
+    Возвращает (обработано, ошибок).
+    """
+    chats = {}
+    for entry in entries:
+        chats.setdefault(entry.chat_id, []).append(entry)
+    results = await asyncio.gather(*(_process_chat(chat) for chat in chats.values()))
+    return sum(r[0] for r in results), sum(r[1] for r in results)
+
+
+def purge_processed(days: int) -> int:
+    """
+    Удаляет обработанные апдейты старше days дней (их update_id уже
+    не придут повторно). Возвращает число удалённых.
+    """
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = TelegramUpdate.objects.filter(
+        status="done", processed_at__lt=cutoff,
+    ).delete()
+    return deleted
@@ -10,6 +10,7 @@ urlpatterns = [
     path("api/watches/hero/", views.hero_watch, name="hero_watch"),
     path("api/watches/featured/", views.watches_featured, name="watches_featured"),
     path("api/watches/all/", views.watches_all, name="watches_all"),
+    path("api/watches/search/", views.watches_search, name="watches_search"),
 
     # корзина
     path("cart/", views.cart_detail, name="cart_detail"),
@@ -23,6 +24,12 @@ urlpatterns = [
     # аккаунт
     path("account/", views.account, name="account"),
 
+    # выгрузка заказов (staff)
+    path("orders/export/", views.orders_export, name="orders_export"),
+
+    # метрики Prometheus
+    path("metrics", views.metrics_view, name="metrics"),
+
     # webhook от Telegram
     path("telegram/webhook/", views.telegram_webhook, name="telegram_webhook"),
 ]
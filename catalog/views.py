@@ -1,6 +1,8 @@
+import base64
+import hashlib
+import hmac
 import json
-import requests
-from datetime import timedelta
+
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import UserCreationForm
@@ -11,14 +13,25 @@ from django.contrib.auth import logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
-from django.http import JsonResponse
-from django.shortcuts import redirect, render
-from django.utils import timezone
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import condition, require_POST
 
+from . import metrics, order_export, search
+from .archive import UserOrderHistory
+from .cache import cached_json_response, catalog_etag, catalog_last_modified
 from .cart import Cart
-from .models import Watch, Order, OrderItem
+from .facets import apply_filters, facet_counts, filters_key, parse_filters, prices_on_buckets
+from .images import srcset
+from .models import Watch
+from .page_cache import cached_page
+from .services import OrderError, create_order
+from .updates import enqueue_update
 
 
 # =========================
@@ -64,6 +77,10 @@ def index(request):
     return render(request, "index.html")
 
 
+# Шаблонов index.html и catalog.html в этом дереве нет (витрина — отдельный
+# фронтенд), так что обе страницы отдают TemplateDoesNotExist. Без
+# cached_page: когда шаблоны появятся, сначала перевести шапку на
+# {% page_fragment %}, как в cart.html, иначе в кэш попадёт чужая шапка.
 def catalog_page(request):
     return render(request, "catalog.html")
 
@@ -72,41 +89,203 @@ def catalog_page(request):
 # API часов
 # =========================
 
-def _serialize_watch(w: Watch) -> dict:
+# поле ответа -> (поле модели для .only(), как достать значение)
+WATCH_API_FIELDS = {
+    "id": ("id", lambda w: w.id),
+    "name": ("name", lambda w: w.name),
+    "tag": ("tag", lambda w: w.tag),
+    "description": ("description", lambda w: w.description),
+    "price": ("price", lambda w: w.price),
+    "currency": ("currency", lambda w: w.currency),
+    "badge": ("badge", lambda w: w.badge),
+    "image_url": ("image", lambda w: w.image.url if w.image else ""),
+    "image_srcset": ("image_derivatives", lambda w: srcset(w.image_derivatives)),
+}
+
+
+def _serialize_watch(w: Watch, fields=None) -> dict:
+    fields = fields or WATCH_API_FIELDS
+    return {name: WATCH_API_FIELDS[name][1](w) for name in fields}
+
+
+def _parse_fields(raw: str):
+    """
+    ?fields=id,name,price -> список полей ответа в каноническом порядке.
+    Пустое значение — все поля. Неизвестное поле — ValueError.
+    """
+    if not raw:
+        return list(WATCH_API_FIELDS)
+    requested = {f.strip() for f in raw.split(",") if f.strip()}
+    unknown = requested - set(WATCH_API_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return [name for name in WATCH_API_FIELDS if name in requested or name == "id"]
+
+
+def _encode_cursor(watch: Watch) -> str:
+    raw = f"{watch.sort_order}:{watch.id}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+    """
+    Непрозрачный курсор -> (sort_order, id) последней отданной записи.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_order, watch_id = raw.decode("ascii").split(":")
+        return int(sort_order), int(watch_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+# Разбор параметров и запросы общие для этих вьюх и их async-версий
+# (catalog/async_views.py, под ASGI).
+
+def _hero_queryset():
+    return Watch.objects.filter(is_active=True, is_hero=True).order_by("sort_order", "id")
+
+
+def _featured_queryset():
+    return Watch.objects.filter(is_active=True, is_featured=True).order_by("sort_order", "id")[:3]
+
+
+def _cacheable_limit(limit: int, default: int) -> bool:
+    return limit == default or limit in getattr(settings, "API_CACHED_LIMITS", ())
+
+
+def _watches_all_params(request) -> dict:
+    """
+    Параметры /api/watches/all/; некорректные — ValueError.
+    """
+    fields = _parse_fields(request.GET.get("fields", ""))
+    filters = parse_filters(request.GET)
+    cursor = request.GET.get("cursor", "")
+    after = _decode_cursor(cursor) if cursor else None
+    limit = int(request.GET.get("limit") or settings.WATCHES_PAGE_SIZE)
+    limit = max(1, min(limit, settings.WATCHES_PAGE_SIZE_MAX))
+    # значения фильтров — произвольный текст, в ключ кэша идёт только хэш
+    filtered = hashlib.md5(filters_key(filters).encode("utf-8")).hexdigest() if filters else ""
+    # ключ — из разобранных значений: ?fields=name,id и ?fields=id,name,
+    # курсор с "=" и без — один ответ и одна запись кэша
+    position = "{}:{}".format(*after) if after else ""
+    cacheable = _cacheable_limit(limit, settings.WATCHES_PAGE_SIZE) and prices_on_buckets(filters)
     return {
-        "id": w.id,
-        "name": w.name,
-        "tag": w.tag,
-        "description": w.description,
-        "price": w.price,
-        "currency": w.currency,
-        "badge": w.badge,
-        "image_url": w.image.url if w.image else "",
+        "fields": fields,
+        "filters": filters,
+        "cursor": cursor,
+        "after": after,
+        "limit": limit,
+        "cache_name": f"all:{position}:{limit}:{','.join(fields)}:{filtered}" if cacheable else None,
     }
 
 
-def hero_watch(request):
-    watch = (
-        Watch.objects.filter(is_active=True, is_hero=True)
+def _watches_all_queryset(params: dict):
+    """
+    На одну запись больше limit — чтобы понять, есть ли следующая страница.
+    """
+    qs = (
+        apply_filters(Watch.objects.filter(is_active=True), params["filters"])
+        .only("sort_order", *(WATCH_API_FIELDS[f][0] for f in params["fields"]))
         .order_by("sort_order", "id")
-        .first()
     )
-    if not watch:
-        return JsonResponse({"item": None})
-    return JsonResponse({"item": _serialize_watch(watch)})
+    if params["after"]:
+        sort_order, watch_id = params["after"]
+        qs = qs.filter(
+            Q(sort_order__gt=sort_order) | Q(sort_order=sort_order, id__gt=watch_id)
+        )
+    return qs[:params["limit"] + 1]
+
 
+def _watches_all_page(watches: list, params: dict) -> dict:
+    limit = params["limit"]
+    page = watches[:limit]
+    return {
+        "items": [_serialize_watch(w, params["fields"]) for w in page],
+        "next_cursor": _encode_cursor(page[-1]) if len(watches) > limit else None,
+    }
+
+
+def _search_params(request) -> dict:
+    query = " ".join(search.terms(request.GET.get("q", "")))
+    fields = _parse_fields(request.GET.get("fields", ""))
+    limit = int(request.GET.get("limit") or settings.WATCH_SEARCH_LIMIT)
+    limit = max(1, min(limit, settings.WATCH_SEARCH_LIMIT_MAX))
+    key = hashlib.md5(f"{query}:{limit}:{','.join(fields)}".encode("utf-8")).hexdigest()
+    cacheable = _cacheable_limit(limit, settings.WATCH_SEARCH_LIMIT)
+    return {
+        "query": query, "fields": fields, "limit": limit,
+        "cache_name": f"search:{key}" if cacheable else None,
+    }
 
+
+def _search_queryset(fields):
+    return Watch.objects.filter(is_active=True).only(*(WATCH_API_FIELDS[f][0] for f in fields))
+
+
+def _search_page(ids: list, watches: dict, fields) -> dict:
+    return {"items": [_serialize_watch(watches[i], fields) for i in ids if i in watches]}
+
+
+@condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)
+def hero_watch(request):
+    def build():
+        watch = _hero_queryset().first()
+        return {"item": _serialize_watch(watch) if watch else None}
+
+    return cached_json_response("hero", build)
+
+
+@condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)
 def watches_featured(request):
-    watches = (
-        Watch.objects.filter(is_active=True, is_featured=True)
-        .order_by("sort_order", "id")[:3]
-    )
-    return JsonResponse({"items": [_serialize_watch(w) for w in watches]})
+    def build():
+        return {"items": [_serialize_watch(w) for w in _featured_queryset()]}
+
+    return cached_json_response("featured", build)
 
 
+@condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)
 def watches_all(request):
-    watches = Watch.objects.filter(is_active=True).order_by("sort_order", "id")
-    return JsonResponse({"items": [_serialize_watch(w) for w in watches]})
+    """
+    Keyset-пагинация по (sort_order, id):
+    ?limit=50&cursor=<next_cursor из прошлого ответа>&fields=id,name,price
+
+    Фильтры (см. catalog/facets.py):
+    ?badge=New,Limited&currency=сум&price_min=0&price_max=5000000&is_featured=1
+    На первой странице (без cursor) в ответе есть "facets" — счётчики
+    по каждому значению фильтра.
+    """
+    try:
+        params = _watches_all_params(request)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    def build():
+        data = _watches_all_page(list(_watches_all_queryset(params)), params)
+        if not params["cursor"]:
+            data["facets"] = facet_counts(params["filters"])
+        return data
+
+    return cached_json_response(params["cache_name"], build)
+
+
+@condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)
+def watches_search(request):
+    """
+    Полнотекстовый поиск: ?q=omega seamaster&limit=20&fields=id,name,price
+    Результаты — по убыванию релевантности (см. catalog/search.py).
+    """
+    try:
+        params = _search_params(request)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    def build():
+        ids = search.search_watch_ids(params["query"], params["limit"])
+        watches = _search_queryset(params["fields"]).in_bulk(ids) if ids else {}
+        return _search_page(ids, watches, params["fields"])
+
+    return cached_json_response(params["cache_name"], build)
 
 
 # =========================
@@ -115,10 +294,12 @@ def watches_all(request):
 
 @require_POST
 def cart_add(request, watch_id):
+    # несуществующие и снятые с продажи часы в корзину не попадают
+    watch = get_object_or_404(Watch, id=watch_id, is_active=True)
     cart = Cart(request)
     quantity = int(request.POST.get("quantity", 1))
     update = request.POST.get("update") == "1"
-    cart.add(watch_id=watch_id, quantity=quantity, update_quantity=update)
+    cart.add(watch_id=watch.id, quantity=quantity, update_quantity=update)
     return redirect("cart_detail")
 
 
@@ -128,6 +309,13 @@ def cart_remove(request, watch_id):
     return redirect("cart_detail")
 
 
+def _cart_page_cacheable(request) -> bool:
+    # одинакова для всех только пустая корзина гостя (у вошедшего форма
+    # заполняется из профиля)
+    return not Cart(request) and not request.user.is_authenticated
+
+
+@cached_page("cart", cacheable=_cart_page_cacheable)
 def cart_detail(request):
     cart = Cart(request)
     form_initial = {}
@@ -141,107 +329,6 @@ def cart_detail(request):
     return render(request, "cart.html", {"cart": cart, "errors": {}, "form": form_initial})
 
 
-# =========================
-# Telegram: отправка заказа (1 сообщение + фото ответом)
-# =========================
-
-def send_order_to_telegram(order: Order, request):
-    token = getattr(settings, "TELEGRAM_BOT_TOKEN", None)
-    chat_id = getattr(settings, "TELEGRAM_CHAT_ID", None)
-    if not token or not chat_id:
-        return
-
-    lat = getattr(order, "latitude", None)
-    lon = getattr(order, "longitude", None)
-    has_coords = lat is not None and lon is not None
-
-    items = list(order.items.select_related("watch").all())
-
-    lines = [
-        f"🧾 Новый заказ #{order.id}",
-        f"Статус: {order.get_status_display()}",
-        f"Создан: {order.created_at}",
-        f"Телефон: {order.phone}",
-        f"Адрес (текст): {order.location}",
-    ]
-    if has_coords:
-        lines.append(f"Координаты: {lat}, {lon}")
-        lines.append(f"Карта: https://www.google.com/maps?q={lat},{lon}")
-
-    lines.append(f"Сумма: {order.total_amount} сум")
-    lines.append("")
-    lines.append("Товары:")
-    for item in items:
-        lines.append(f"• {item.watch.name} — {item.quantity} шт. × {item.price} сум")
-
-    text = "\n".join(lines)
-
-    # Кнопки (ВАЖНО: deliver/cancel соответствуют webhook ниже)
-    keyboard = {
-        "inline_keyboard": [[
-            {"text": "✅ Подтвердить", "callback_data": f"deliver:{order.id}"},
-            {"text": "❌ Отказать",    "callback_data": f"cancel:{order.id}"},
-        ]]
-    }
-
-    # 1) Главное сообщение (текст+кнопки) — берем message_id
-    r = requests.post(
-        f"https://api.telegram.org/bot{token}/sendMessage",
-        json={"chat_id": chat_id, "text": text, "reply_markup": keyboard},
-        timeout=10,
-    )
-    data = r.json()
-    msg_id = None
-    if isinstance(data, dict) and data.get("ok") and data.get("result"):
-        msg_id = data["result"].get("message_id")
-
-    # 2) Фото товаров — reply на главное сообщение (чтобы выглядело как один блок)
-    media = []
-    files = {}
-    idx = 0
-
-    for it in items:
-        if it.watch.image:
-            idx += 1
-            name = f"photo{idx}"
-            try:
-                files[name] = open(it.watch.image.path, "rb")
-            except Exception:
-                continue
-
-            media.append({
-                "type": "photo",
-                "media": f"attach://{name}",
-                "caption": f"{it.watch.name}\n{it.quantity} шт. × {it.price} сум",
-            })
-
-    for start in range(0, len(media), 10):
-        batch = media[start:start + 10]
-
-        batch_files = {}
-        for m in batch:
-            n = m["media"].replace("attach://", "")
-            if n in files:
-                batch_files[n] = files[n]
-
-        payload = {"chat_id": chat_id, "media": json.dumps(batch)}
-        if msg_id:
-            payload["reply_to_message_id"] = msg_id
-
-        requests.post(
-            f"https://api.telegram.org/bot{token}/sendMediaGroup",
-            data=payload,
-            files=batch_files,
-            timeout=25,
-        )
-
-    for f in files.values():
-        try:
-            f.close()
-        except Exception:
-            pass
-
-
 # =========================
 # Оформление заказа
 # =========================
@@ -276,6 +363,20 @@ def checkout(request):
         if lat is None or lon is None:
             errors["map"] = "Выберите точку на карте."
 
+        if not errors:
+            try:
+                create_order(
+                    user=request.user,
+                    location=location,
+                    phone=phone,
+                    latitude=lat,
+                    longitude=lon,
+                    lines=cart.quantities().items(),
+                    source="checkout",
+                )
+            except OrderError as e:
+                errors["cart"] = str(e)
+
         if errors:
             return render(
                 request,
@@ -293,32 +394,12 @@ def checkout(request):
                 status=200,
             )
 
-        order = Order.objects.create(
-            user=request.user if request.user.is_authenticated else None,
-            location=location,
-            phone=phone,
-            latitude=lat,
-            longitude=lon,
-            status="waiting",
-        )
-
         if request.user.is_authenticated and hasattr(request.user, "profile"):
             profile = request.user.profile
             profile.location = location
             profile.phone = phone
             profile.save()
 
-        for item in cart:
-            OrderItem.objects.create(
-                order=order,
-                watch=item["watch"],
-                quantity=item["quantity"],
-                price=item["price"],
-            )
-
-        # отправляем в Telegram ДО очистки корзины
-        send_order_to_telegram(order, request)
-
         cart.clear()
         return redirect("account")
 
@@ -347,67 +428,41 @@ def api_create_order(request):
     if not location or not phone or latitude is None or longitude is None or not items:
         return JsonResponse({"error": "Missing fields"}, status=400)
 
-    # создаём заказ (если пользователь залогинен на backend — привяжется, иначе None)
-    order = Order.objects.create(
-        user=request.user if request.user.is_authenticated else None,
-        location=location,
-        phone=phone,
-        latitude=float(latitude),
-        longitude=float(longitude),
-        status="waiting",
-    )
-
-    # items ожидаем вида: [{id, price, quantity, ...}, ...]
-    for it in items:
-        watch_id = it.get("id")
-        price = it.get("price", 0)
-        quantity = it.get("quantity", 1)
-
-        if not watch_id:
-            continue
-
-        OrderItem.objects.create(
-            order=order,
-            watch_id=watch_id,   # важно: watch_id, потому что у тебя ForeignKey watch
-            quantity=int(quantity),
-            price=int(price),
+    # items ожидаем вида: [{id, quantity, ...}, ...]; цену берём из каталога
+    try:
+        order = create_order(
+            user=request.user,
+            location=location,
+            phone=phone,
+            latitude=float(latitude),
+            longitude=float(longitude),
+            lines=[(it.get("id"), it.get("quantity", 1)) for it in items if it.get("id")],
+            source="api_create_order",
         )
-
-    # отправка в Telegram (как у тебя уже сделано)
-    send_order_to_telegram(order, request)
+    except (OrderError, TypeError, ValueError, AttributeError) as e:
+        return JsonResponse({"error": str(e) or "Invalid items"}, status=400)
 
     return JsonResponse({"success": True, "order_id": order.id})
 
-def _is_admin_telegram_update(update: dict) -> bool:
-    admin_ids = getattr(settings, "TELEGRAM_ADMIN_IDS", [])
-    if not admin_ids:
-        return True  # если список не задан — не ограничиваем
-
-    user_id = None
-    if "message" in update:
-        user_id = update["message"].get("from", {}).get("id")
-    elif "callback_query" in update:
-        user_id = update["callback_query"].get("from", {}).get("id")
-
-    return user_id in admin_ids
-
-
-def _set_order_status_safe(order: Order, status_value: str) -> bool:
+def _webhook_update(request) -> dict:
     """
-    Ставит статус, только если он есть в choices.
-    Возвращает True если установили, иначе False.
+    Апдейт из тела webhook (общее для sync/async-вьюх).
+    Нет или не тот секрет (TELEGRAM_WEBHOOK_SECRET) — PermissionDenied;
+    тело — не апдейт Bot API с целым update_id — ValueError.
     """
+    secret = getattr(settings, "TELEGRAM_WEBHOOK_SECRET", "")
+    received = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+    if not secret or not hmac.compare_digest(received.encode("utf-8"), secret.encode("utf-8")):
+        raise PermissionDenied
+
     try:
-        choices = getattr(Order, "STATUS_CHOICES", None) or getattr(order, "STATUS_CHOICES", None)
-        if choices:
-            allowed = {k for (k, _) in choices}
-            if status_value not in allowed:
-                return False
-        order.status = status_value
-        order.save(update_fields=["status"])
-        return True
-    except Exception:
-        return False
+        update = json.loads(request.body.decode("utf-8"))
+    except (UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid JSON")
+    update_id = update.get("update_id") if isinstance(update, dict) else None
+    if not isinstance(update_id, int) or isinstance(update_id, bool):
+        raise ValueError("Invalid update_id")
+    return update
 
 
 @csrf_exempt
@@ -417,160 +472,70 @@ def telegram_webhook(request):
         return JsonResponse({"ok": True})
 
     try:
-        update = json.loads(request.body.decode("utf-8"))
-    except Exception:
-        return JsonResponse({"ok": True})
-
-    if not _is_admin_telegram_update(update):
-        return JsonResponse({"ok": True})
-
-    # =====================================================
-    # 1) CALLBACK QUERY (кнопки)
-    # =====================================================
-    if "callback_query" in update:
-        cq = update["callback_query"]
-        data = cq.get("data", "")
-        cq_id = cq.get("id")
-        message = cq.get("message", {})
-        chat_id = message.get("chat", {}).get("id")
-        message_id = message.get("message_id")
-
-        if ":" in data:
-            action, value = data.split(":", 1)
-
-            # -------------------------------------------------
-            # ✅ ПОДТВЕРДИТЬ / ОТКАЗАТЬ
-            # -------------------------------------------------
-            if action in ("deliver", "cancel"):
-                try:
-                    order = Order.objects.get(id=int(value))
-                except Exception:
-                    requests.post(
-                        f"https://api.telegram.org/bot{token}/answerCallbackQuery",
-                        json={"callback_query_id": cq_id, "text": "Заказ не найден"},
-                    )
-                    return JsonResponse({"ok": True})
-
-                if action == "deliver":
-                    ok = _set_order_status_safe(order, "delivered")
-                    text = "✅ Заказ подтверждён (Доставлен)" if ok else "❗ Статус delivered не найден"
-                else:
-                    ok = _set_order_status_safe(order, "cancelled")
-                    if not ok:
-                        ok = _set_order_status_safe(order, "canceled")
-                    text = "❌ Заказ отменён" if ok else "❗ Статус отмены не найден"
-
-                requests.post(
-                    f"https://api.telegram.org/bot{token}/answerCallbackQuery",
-                    json={"callback_query_id": cq_id, "text": text},
-                )
-
-                # убираем кнопки
-                requests.post(
-                    f"https://api.telegram.org/bot{token}/editMessageReplyMarkup",
-                    json={
-                        "chat_id": chat_id,
-                        "message_id": message_id,
-                        "reply_markup": {"inline_keyboard": []},
-                    },
-                )
-
-                return JsonResponse({"ok": True})
-
-            # -------------------------------------------------
-            # ✅ АРХИВ ЗАКАЗОВ (С ТОВАРАМИ)
-            # -------------------------------------------------
-            if action == "orders":
-                now = timezone.now()
-
-                if value == "hour":
-                    qs = Order.objects.filter(created_at__gte=now - timedelta(hours=1))
-                    title = "🕐 Заказы за последний час"
-                elif value == "day":
-                    qs = Order.objects.filter(created_at__gte=now - timedelta(days=1))
-                    title = "📅 Заказы за последний день"
-                else:
-                    qs = Order.objects.filter(created_at__gte=now - timedelta(days=7))
-                    title = "🗓 Заказы за последнюю неделю"
-
-                qs = (
-                    qs.order_by("-created_at")
-                      .prefetch_related("items__watch")[:50]
-                )
+        update = _webhook_update(request)
+    except PermissionDenied:
+        return JsonResponse({"ok": False}, status=403)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    # только сохраняем; обрабатывает `manage.py telegram_updates`
+    enqueue_update(update)
+    return JsonResponse({"ok": True})
 
-                if not qs:
-                    msg = f"{title}\n\nНет заказов."
-                else:
-                    lines = [title, ""]
-                    for o in qs:
-                        goods = []
-                        for it in o.items.all():
-                            goods.append(f"{it.watch.name} ({it.quantity})")
+# =========================
+# Callback оплаты (пока заглушка)
+# =========================
 
-                        goods_text = ", ".join(goods) if goods else "—"
+@csrf_exempt
+def payment_callback(request):
+    return JsonResponse({"result": "ok"})
 
-                        lines.append(
-                            f"#{o.id} | {o.created_at:%d.%m %H:%M} | "
-                            f"{o.get_status_display()} | {o.total_amount} сум | "
-                            f"{o.phone} | Товары: {goods_text}"
-                        )
 
-                    msg = "\n".join(lines)
+# =========================
+# Метрики Prometheus
+# =========================
 
-                requests.post(
-                    f"https://api.telegram.org/bot{token}/sendMessage",
-                    json={"chat_id": chat_id, "text": msg},
-                )
+def metrics_view(request):
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return HttpResponse(status=401)
+    return HttpResponse(
+        metrics.render(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
 
-                requests.post(
-                    f"https://api.telegram.org/bot{token}/answerCallbackQuery",
-                    json={"callback_query_id": cq_id, "text": "Готово"},
-                )
 
-                return JsonResponse({"ok": True})
+# =========================
+# Выгрузка заказов для бухгалтерии
+# =========================
 
-        # неизвестная кнопка
-        requests.post(
-            f"https://api.telegram.org/bot{token}/answerCallbackQuery",
-            json={"callback_query_id": cq_id, "text": "Неизвестное действие"},
-        )
-        return JsonResponse({"ok": True})
+def _order_export_params(request) -> dict:
+    fmt = request.GET.get("format", "csv")
+    if fmt not in order_export.FORMATS:
+        raise ValueError("Invalid format")
+    start, end = order_export.parse_range(request.GET.get("from"), request.GET.get("to"))
+    return {"start": start, "end": end, "fmt": fmt}
 
-    # =====================================================
-    # 2) КОМАНДА /orders
-    # =====================================================
-    if "message" in update and update["message"].get("text"):
-        chat_id = update["message"]["chat"]["id"]
-        text = update["message"]["text"].strip()
-
-        if text == "/orders":
-            keyboard = {
-                "inline_keyboard": [
-                    [{"text": "🕐 Последний час", "callback_data": "orders:hour"}],
-                    [{"text": "📅 Последний день", "callback_data": "orders:day"}],
-                    [{"text": "🗓 Последняя неделя", "callback_data": "orders:week"}],
-                ]
-            }
-
-            requests.post(
-                f"https://api.telegram.org/bot{token}/sendMessage",
-                json={
-                    "chat_id": chat_id,
-                    "text": "📦 Архив заказов — выберите период:",
-                    "reply_markup": keyboard,
-                },
-            )
-            return JsonResponse({"ok": True})
 
-    return JsonResponse({"ok": True})
+def _order_export_response(chunks, fmt: str) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(
+        chunks,
+        content_type="text/csv; charset=utf-8" if fmt == "csv" else "application/x-ndjson",
+    )
+    response["Content-Disposition"] = f'attachment; filename="orders.{fmt}"'
+    return response
 
-# =========================
-# Callback оплаты (пока заглушка)
-# =========================
 
-@csrf_exempt
-def payment_callback(request):
-    return JsonResponse({"result": "ok"})
+@staff_member_required
+def orders_export(request):
+    """
+    /orders/export/?from=2025-01-01&to=2025-01-31&format=csv|ndjson
+    """
+    try:
+        params = _order_export_params(request)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    return _order_export_response(order_export.export_chunks(**params), params["fmt"])
 
 
 # =========================
@@ -579,9 +544,14 @@ def payment_callback(request):
 
 @login_required
 def account(request):
-    orders = Order.objects.filter(user=request.user).order_by("-created_at")
+    # Рабочие и архивные заказы одной лентой. Число запросов не зависит от
+    # количества заказов: счётчики, UNION на страницу, заказы и позиции
+    # с часами из каждой таблицы; суммы хранятся в самих заказах.
+    orders = UserOrderHistory(request.user)
+    page = Paginator(orders, settings.ACCOUNT_ORDERS_PER_PAGE).get_page(request.GET.get("page"))
     return render(request, "account.html", {
-        "orders": orders,
+        "orders": page.object_list,
+        "page": page,
     })
 
 
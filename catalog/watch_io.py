@@ -0,0 +1,229 @@
+"""
+Массовый импорт/экспорт каталога (CSV и NDJSON) для команд
+import_watches/export_watches и действий в админке.
+
+Экспорт — потоком: iterator(chunk_size), память не растёт с размером
+каталога. Импорт — пачками по batch_size строк: одна выборка
+существующих часов + один INSERT ... ON CONFLICT (id) DO UPDATE на пачку.
+Строка с id обновляет часы (только переданные колонки), без id — создаёт
+новые. Ошибочные строки пропускаются и попадают в отчёт, остальные
+сохраняются.
+"""
+import csv
+import json
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+
+from . import search
+from .cache import bump_catalog_version
+from .models import Watch
+
+FIELDS = [
+    "id", "name", "tag", "currency", "description", "price", "badge",
+    "is_active", "is_hero", "is_featured", "sort_order",
+]
+REQUIRED_FOR_NEW = {"name", "price"}
+BOOLEAN_FIELDS = {"is_active", "is_hero", "is_featured"}
+TRUE_VALUES = {"1", "true", "yes", "да"}
+FALSE_VALUES = {"0", "false", "no", "нет", ""}
+
+FORMATS = ("csv", "ndjson")
+EXPORT_CHUNK_SIZE = 2000
+IMPORT_BATCH_SIZE = 1000
+
+
+def detect_format(filename: str, default: str = "csv") -> str:
+    return "ndjson" if filename.lower().endswith((".ndjson", ".jsonl")) else default
+
+
+# =========================
+# Экспорт
+# =========================
+
+class _Echo:
+    """
+    «Файл», который возвращает записанное — csv.writer пишет построчно в генератор.
+    """
+
+    def write(self, value):
+        return value
+
+
+def export_lines(queryset=None, fmt: str = "csv"):
+    """
+    Генератор строк файла (с переводом строки). Подходит и для записи
+    в файл, и для StreamingHttpResponse.
+    """
+    queryset = Watch.objects.all() if queryset is None else queryset
+    rows = queryset.order_by("id").values_list(*FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    if fmt == "ndjson":
+        for row in rows:
+            yield json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False) + "\n"
+        return
+
+    writer = csv.writer(_Echo(), lineterminator="\n")
+    yield writer.writerow(FIELDS)
+    for row in rows:
+        yield writer.writerow(
+            [int(v) if isinstance(v, bool) else v for v in row]
+        )
+
+
+# =========================
+# Импорт
+# =========================
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    updated: int = 0
+    errors: list = field(default_factory=list)  # [(номер строки, текст ошибки)]
+
+
+def read_rows(lines, fmt: str = "csv"):
+    """
+    (номер строки, dict | None) из текстового файла. None — строку
+    не удалось разобрать (ошибка попадёт в отчёт импорта).
+    """
+    if fmt == "ndjson":
+        for line_no, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_no, row if isinstance(row, dict) else None
+        return
+
+    reader = csv.DictReader(lines)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def _clean_row(row: dict) -> dict:
+    """
+    Значения строки -> python-значения полей Watch. ValidationError
+    с текстом вида "price: ..." при ошибке.
+    """
+    unknown = set(row) - set(FIELDS)
+    if unknown:
+        raise ValidationError(f"неизвестные колонки: {', '.join(sorted(map(str, unknown)))}")
+
+    values = {}
+    for name, raw in row.items():
+        if raw is None:
+            continue
+        if isinstance(raw, str):
+            raw = raw.strip()
+        if name == "id":
+            if raw == "":
+                continue
+        elif name in BOOLEAN_FIELDS and isinstance(raw, str):
+            lowered = raw.lower()
+            if lowered not in TRUE_VALUES | FALSE_VALUES:
+                raise ValidationError(f"{name}: ожидается 1/0 или true/false")
+            raw = lowered in TRUE_VALUES
+        try:
+            values[name] = Watch._meta.get_field(name).clean(raw, None)
+        except ValidationError as e:
+            raise ValidationError(f"{name}: {' '.join(e.messages)}")
+    return values
+
+
+def _apply_batch(batch: list, result: ImportResult, dry_run: bool) -> None:
+    cleaned = []
+    for line_no, row in batch:
+        if row is None:
+            result.errors.append((line_no, "строка не разобрана"))
+            continue
+        try:
+            cleaned.append((line_no, _clean_row(row)))
+        except ValidationError as e:
+            result.errors.append((line_no, " ".join(e.messages)))
+
+    ids = [values["id"] for _, values in cleaned if "id" in values]
+    existing = Watch.objects.in_bulk(ids) if ids else {}
+
+    watches = []
+    written = []  # номера строк, которые уходят в запись
+    seen = set()
+    columns = set()
+    created = updated = 0
+    for line_no, values in cleaned:
+        watch_id = values.pop("id", None)
+        if watch_id is not None:
+            watch = existing.get(watch_id)
+            if watch is None:
+                result.errors.append((line_no, f"нет часов с id={watch_id}"))
+                continue
+            if not values:
+                result.errors.append((line_no, "нечего обновлять: кроме id, полей нет"))
+                continue
+            updated += 1
+            written.append(line_no)
+            # повтор id в пачке: правки ложатся на тот же объект, последняя побеждает
+            if watch_id in seen:
+                for name, value in values.items():
+                    setattr(watch, name, value)
+                columns.update(values)
+                continue
+            seen.add(watch_id)
+        else:
+            missing = REQUIRED_FOR_NEW - set(values)
+            if missing:
+                result.errors.append((line_no, f"для новых часов нужны: {', '.join(sorted(missing))}"))
+                continue
+            watch = Watch()
+            created += 1
+            written.append(line_no)
+        for name, value in values.items():
+            setattr(watch, name, value)
+        columns.update(values)
+        watches.append(watch)
+
+    if not watches or dry_run:
+        result.created += created
+        result.updated += updated
+        return
+
+    try:
+        with transaction.atomic():
+            Watch.objects.bulk_create(
+                watches,
+                update_conflicts=True,
+                unique_fields=["id"],
+                update_fields=sorted(columns),
+            )
+            saved_ids = [w.pk for w in watches]
+            # bulk_create обходит сигналы: поиск и кэш обновляем сами
+            search.index_watches(None if None in saved_ids else saved_ids)
+            transaction.on_commit(bump_catalog_version)
+    except DatabaseError as e:
+        result.errors.extend((line_no, f"пачка не сохранена: {e}") for line_no in written)
+        return
+
+    result.created += created
+    result.updated += updated
+
+
+def import_rows(rows, batch_size: int = IMPORT_BATCH_SIZE, dry_run: bool = False) -> ImportResult:
+    """
+    rows — (номер строки, dict) из read_rows. Каждая пачка пишется
+    в своей транзакции; ошибка в строке не останавливает импорт.
+    dry_run — только проверка, без записи.
+    """
+    result = ImportResult()
+    batch = []
+    for item in rows:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            _apply_batch(batch, result, dry_run)
+            batch = []
+    if batch:
+        _apply_batch(batch, result, dry_run)
+    result.errors.sort()
+    return result
@@ -37,11 +37,14 @@ INSTALLED_APPS = [
 # Middleware
 # =========================
 MIDDLEWARE = [
+    "catalog.middleware.AsgiUrlconfMiddleware",
+    "catalog.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",  # ✅ важно: выше CommonMiddleware
     "whitenoise.middleware.WhiteNoiseMiddleware",
 
     "django.contrib.sessions.middleware.SessionMiddleware",
+    "catalog.middleware.CartMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -49,6 +52,21 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Замер запросов (SQL, шаблоны, Telegram) в Server-Timing и лог catalog.timing.
+# Включается переменной окружения REQUEST_TIMING=1.
+REQUEST_TIMING = os.environ.get("REQUEST_TIMING") == "1"
+REQUEST_TIMING_SLOW_MS = int(os.environ.get("REQUEST_TIMING_SLOW_MS", 500))
+REQUEST_TIMING_SLOW_SQL = 5  # сколько самых долгих SQL логировать
+
+if REQUEST_TIMING:
+    MIDDLEWARE.insert(0, "catalog.middleware.RequestTimingMiddleware")
+
+# /metrics (Prometheus). METRICS_TOKEN — если задан, нужен Authorization: Bearer.
+# METRICS_MULTIPROC_DIR — общий каталог, чтобы суммировать все gunicorn-воркеры.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+METRICS_MULTIPROC_DIR = os.environ.get("METRICS_MULTIPROC_DIR")
+METRICS_FLUSH_INTERVAL = 5
+
 ROOT_URLCONF = "timepiece_site.urls"
 
 # =========================
@@ -71,8 +89,15 @@ TEMPLATES = [
 ]
 
 
+if REQUEST_TIMING:
+    TEMPLATES[0]["BACKEND"] = "catalog.template_backends.TimedDjangoTemplates"
+
 WSGI_APPLICATION = "timepiece_site.wsgi.application"
 
+# Под ASGI (uvicorn timepiece_site.asgi:application) API каталога и webhook
+# обслуживают async-вьюхи: AsgiUrlconfMiddleware подставляет этот urlconf.
+ASGI_URLCONF = "timepiece_site.urls_asgi"
+
 # =========================
 # Database
 # =========================
@@ -82,6 +107,126 @@ DATABASES = {
     )
 }
 
+# =========================
+# Cache
+# =========================
+# Файловый кэш общий для всех gunicorn-воркеров инстанса, поэтому
+# сброс версии каталога сразу виден во всех процессах.
+CACHES = {
+    # Ответы API и страницы витрины. Число ключей растёт с вариантами
+    # запросов (курсоры, фильтры, поиск), поэтому предел задан явно:
+    # при переполнении выбрасывается треть записей — это просто промахи.
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND",
+            "django.core.cache.backends.filebased.FileBasedCache",
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", str(BASE_DIR / ".cache")),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.environ.get("CACHE_MAX_ENTRIES", 5000)),
+            "CULL_FREQUENCY": 3,
+        },
+    },
+    # Версия каталога и время изменения (catalog/cache.py) — два ключа
+    # без срока жизни. В "default" cull мог бы их вытеснить: все ETag
+    # и закэшированные ответы сбросились бы разом, и каждый воркер пошёл
+    # бы пересобирать их в БД. Здесь кроме них ничего нет.
+    "catalog_meta": {
+        "BACKEND": os.environ.get(
+            "CATALOG_META_CACHE_BACKEND",
+            "django.core.cache.backends.filebased.FileBasedCache",
+        ),
+        "LOCATION": os.environ.get("CATALOG_META_CACHE_LOCATION", str(BASE_DIR / ".cache-meta")),
+    },
+    # Корзины (CacheCartStorage) — отдельно от кэша каталога: там ключи
+    # одноразовые и при переполнении cull выбрасывает случайную треть,
+    # а потерянная корзина — потерянный заказ. Здесь своя папка (clear()
+    # и cull кэша каталога её не трогают) и запас на все живые корзины
+    # за CART_COOKIE_AGE. FileBasedCache при каждой записи пересчитывает
+    # файлы, поэтому при большом числе корзин — CART_CACHE_BACKEND=
+    # django.core.cache.backends.redis.RedisCache и CART_CACHE_LOCATION=redis://...
+    "carts": {
+        "BACKEND": os.environ.get(
+            "CART_CACHE_BACKEND",
+            "django.core.cache.backends.filebased.FileBasedCache",
+        ),
+        "LOCATION": os.environ.get("CART_CACHE_LOCATION", str(BASE_DIR / ".cache-carts")),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.environ.get("CART_CACHE_MAX_ENTRIES", 100_000)),
+        },
+    },
+}
+
+CATALOG_META_CACHE_ALIAS = "catalog_meta"
+
+# сколько живут закэшированные ответы API каталога (секунды)
+CATALOG_CACHE_TIMEOUT = int(os.environ.get("CATALOG_CACHE_TIMEOUT", 60 * 60 * 24))
+
+# кэш страниц витрины (catalog/page_cache.py): анонимный рендер на версию
+# каталога, данные посетителя подставляются в ответ
+PAGE_CACHE = os.environ.get("PAGE_CACHE", "1") == "1"
+
+# размер страницы /api/watches/all/ (по умолчанию и максимальный для ?limit=)
+WATCHES_PAGE_SIZE = 100
+WATCHES_PAGE_SIZE_MAX = 500
+
+# ?limit= API каталога, ответы с которыми кэшируются (плюс значения по
+# умолчанию); с любым другим ответ собирается без кэша, чтобы перебор
+# limit не плодил ключи
+API_CACHED_LIMITS = (10, 20, 50, 100, 200, 500)
+
+# границы ценовых корзин для фасета "price" в /api/watches/all/
+WATCH_PRICE_BUCKETS = [1_000_000, 5_000_000, 10_000_000, 50_000_000]
+
+# /api/watches/search/: размер выдачи и словарь PostgreSQL для tsvector
+WATCH_SEARCH_LIMIT = 20
+WATCH_SEARCH_LIMIT_MAX = 50
+WATCH_SEARCH_CONFIG = "simple"
+
+# =========================
+# Telegram
+# =========================
+# базовый адрес Bot API (в тестах можно подставить локальный фейковый сервер)
+TELEGRAM_API_URL = os.environ.get("TELEGRAM_API_URL", "https://api.telegram.org")
+
+# secret_token из setWebhook: Telegram шлёт его в заголовке
+# X-Telegram-Bot-Api-Secret-Token, без него /telegram/webhook/ отвечает 403
+# (иначе кто угодно мог бы подкладывать апдейты в очередь бота).
+# После того как секрет задан, webhook нужно переустановить с ним:
+#   curl https://api.telegram.org/bot<TOKEN>/setWebhook \
+#        -d url=https://<домен>/telegram/webhook/ -d secret_token=<секрет>
+# С токеном, но без секрета не пройдёт `manage.py check` (catalog.E001).
+TELEGRAM_WEBHOOK_SECRET = os.environ.get("TELEGRAM_WEBHOOK_SECRET", "")
+
+# HTTP-клиент Bot API: (connect, read) таймауты, пул keep-alive соединений,
+# повторы на 429 (ждём retry_after, но не дольше TELEGRAM_MAX_RETRY_AFTER сек)
+TELEGRAM_TIMEOUT = (5, 10)
+TELEGRAM_UPLOAD_TIMEOUT = (5, 25)
+TELEGRAM_POOL_SIZE = 4
+TELEGRAM_MAX_RETRIES = 2
+TELEGRAM_MAX_RETRY_AFTER = 10
+
+# очередь уведомлений о заказах (manage.py telegram_outbox)
+TELEGRAM_OUTBOX_MAX_ATTEMPTS = 8
+TELEGRAM_OUTBOX_BACKOFF = 5          # сек, удваивается с каждой попыткой
+TELEGRAM_OUTBOX_BACKOFF_MAX = 60 * 30
+TELEGRAM_OUTBOX_LEASE = 60 * 5       # сколько запись «занята» воркером
+
+# входящие апдейты бота (webhook -> очередь -> manage.py telegram_updates)
+TELEGRAM_UPDATES_MAX_ATTEMPTS = 5
+TELEGRAM_UPDATES_LEASE = 60          # сек, на сколько апдейт «занят» воркером
+
+# заказов на странице отчёта /orders в Telegram
+ORDER_REPORT_PAGE_SIZE = 20
+
+# заказов в одной выборке выгрузки /orders/export/ и export_orders
+ORDER_EXPORT_CHUNK_SIZE = 1000
+
+# `manage.py archive_orders`: доставленные/отменённые заказы старше стольких
+# дней уходят в архивные таблицы; заказов в одной транзакции переноса
+ORDER_ARCHIVE_AFTER_DAYS = 180
+ORDER_ARCHIVE_BATCH_SIZE = 500
+
 # =========================
 # Static / Media
 # =========================
@@ -95,11 +240,33 @@ STATICFILES_DIRS = [
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# ширины превью фото часов (WebP + JPEG рядом с оригиналом)
+IMAGE_DERIVATIVE_WIDTHS = (320, 640, 1280)
+# False — генерировать сразу после коммита в том же потоке (удобно в тестах)
+IMAGE_DERIVATIVES_ASYNC = True
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 LOGIN_REDIRECT_URL = "/account/"
 LOGOUT_REDIRECT_URL = "/"
 
+# =========================
+# Cart
+# =========================
+# Где хранится корзина:
+#   catalog.cart_storage.SessionCartStorage      — в сессии (строка в БД)
+#   catalog.cart_storage.SignedCookieCartStorage — в подписанной cookie
+#   catalog.cart_storage.CacheCartStorage        — в кэше CART_CACHE_ALIAS
+# С cookie/кэшем анонимный посетитель не пишет в БД вообще.
+CART_STORAGE = os.environ.get("CART_STORAGE", "catalog.cart_storage.SessionCartStorage")
+# свой алиас кэша, см. CACHES["carts"]
+CART_CACHE_ALIAS = "carts"
+CART_COOKIE_NAME = "cart"
+CART_COOKIE_AGE = 60 * 60 * 24 * 30
+
+# заказов на странице /account/
+ACCOUNT_ORDERS_PER_PAGE = 20
+
 # =========================
 # CSRF / CORS (Vercel <-> Render)
 # =========================
@@ -114,4 +281,18 @@ CORS_ALLOWED_ORIGINS = [
 CORS_ALLOW_CREDENTIALS = True
 LOGIN_REDIRECT_URL = "/account/"
 LOGOUT_REDIRECT_URL = "/"
-LOGIN_URL = "/login/"
\ No newline at end of file
+LOGIN_URL = "/login/"
+
+# =========================
+# Logging
+# =========================
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "catalog": {"handlers": ["console"], "level": "INFO"},
+    },
+}
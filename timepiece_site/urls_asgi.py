@@ -0,0 +1,19 @@
+"""
+URL-ы под ASGI: API каталога, webhook и выгрузка заказов — async-версии
+(catalog/async_views.py), всё остальное — как в timepiece_site/urls.py. Включается
+catalog.middleware.AsgiUrlconfMiddleware.
+"""
+from django.urls import path
+
+from catalog import async_views
+
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path("api/watches/hero/", async_views.hero_watch, name="hero_watch"),
+    path("api/watches/featured/", async_views.watches_featured, name="watches_featured"),
+    path("api/watches/all/", async_views.watches_all, name="watches_all"),
+    path("api/watches/search/", async_views.watches_search, name="watches_search"),
+    path("telegram/webhook/", async_views.telegram_webhook, name="telegram_webhook"),
+    path("orders/export/", async_views.orders_export, name="orders_export"),
+] + sync_urlpatterns